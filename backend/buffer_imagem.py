@@ -0,0 +1,18 @@
+import numpy as np
+
+
+def somente_leitura(matriz):
+    """Visão da matriz que não pode ser escrita (a própria matriz se já não puder)."""
+    if isinstance(matriz, np.ndarray) and matriz.flags.writeable:
+        matriz = matriz.view()
+        matriz.flags.writeable = False
+    return matriz
+
+
+def em_disco(matriz):
+    """True se a matriz (ou a matriz de que ela é visão) está mapeada de um arquivo."""
+    while isinstance(matriz, np.ndarray):
+        if isinstance(matriz, np.memmap):
+            return True
+        matriz = matriz.base
+    return False
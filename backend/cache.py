@@ -0,0 +1,174 @@
+import functools
+import hashlib
+import inspect
+import threading
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+from backend.buffer_imagem import em_disco, somente_leitura
+
+# Limite padrão da memória ocupada pelos resultados guardados, em bytes
+LIMITE_PADRAO = 256 * 1024 * 1024
+
+_impressoes = {}
+_lock_impressoes = threading.Lock()
+
+
+def impressao_digital(matriz):
+    """Chave de conteúdo de uma matriz: formato, tipo e hash blake2b dos bytes.
+
+    Matrizes somente leitura (como as guardadas pelo ImageManager) não mudam,
+    então o hash é guardado por identidade e calculado uma única vez.
+    """
+    memorizavel = not matriz.flags.writeable
+    if memorizavel:
+        with _lock_impressoes:
+            item = _impressoes.get(id(matriz))
+        if item is not None and item[0]() is matriz:
+            return item[1]
+
+    conteudo = hashlib.blake2b(np.ascontiguousarray(matriz).data, digest_size=16)
+    chave = (matriz.shape, matriz.dtype.str, conteudo.hexdigest())
+
+    if memorizavel:
+        identificador = id(matriz)
+        referencia = weakref.ref(matriz, lambda _: _esquecer(identificador))
+        with _lock_impressoes:
+            _impressoes[identificador] = (referencia, chave)
+    return chave
+
+
+def _esquecer(identificador):
+    with _lock_impressoes:
+        _impressoes.pop(identificador, None)
+
+
+class _NaoMemorizavel(Exception):
+    pass
+
+
+def _chave_valor(valor):
+    if isinstance(valor, np.ndarray):
+        if em_disco(valor):
+            # Imagens mapeadas (ou blocos delas) são grandes demais para hashear e guardar
+            raise _NaoMemorizavel
+        return ('matriz',) + impressao_digital(valor)
+    if valor is None or isinstance(valor, (bool, int, float, str, np.generic)):
+        return valor
+    if isinstance(valor, (tuple, list)):
+        return tuple(_chave_valor(v) for v in valor)
+    raise _NaoMemorizavel
+
+
+class CacheResultados:
+    """Cache LRU de resultados de operações, com limite de memória.
+
+    A chave é o nome da operação mais os argumentos, com matrizes
+    representadas pela impressão digital do conteúdo; reaplicar o mesmo
+    filtro com os mesmos parâmetros à mesma imagem (por exemplo depois de
+    "Resetar imagem") devolve o resultado guardado na hora.
+    """
+
+    def __init__(self, limite_bytes=LIMITE_PADRAO):
+        self.limite_bytes = limite_bytes
+        self._lock = threading.Lock()
+        self.limpar()
+
+    def limpar(self):
+        with self._lock:
+            self._itens = OrderedDict()
+            self.bytes = 0
+            self.acertos = 0
+            self.falhas = 0
+
+    def obter(self, chave):
+        with self._lock:
+            if chave not in self._itens:
+                self.falhas += 1
+                return None
+            self._itens.move_to_end(chave)
+            self.acertos += 1
+            return self._itens[chave]
+
+    def guardar(self, chave, valor):
+        tamanho = _tamanho(valor)
+        if tamanho > self.limite_bytes:
+            return
+        with self._lock:
+            if chave in self._itens:
+                self.bytes -= _tamanho(self._itens.pop(chave))
+            self._itens[chave] = valor
+            self.bytes += tamanho
+            while self.bytes > self.limite_bytes:
+                _, antigo = self._itens.popitem(last=False)
+                self.bytes -= _tamanho(antigo)
+
+    def estatisticas(self):
+        with self._lock:
+            consultas = self.acertos + self.falhas
+            return {
+                'acertos': self.acertos,
+                'falhas': self.falhas,
+                'taxa_acerto': self.acertos / consultas if consultas else 0.0,
+                'entradas': len(self._itens),
+                'bytes': self.bytes,
+            }
+
+
+def _tamanho(valor):
+    if isinstance(valor, np.ndarray):
+        return valor.nbytes
+    if isinstance(valor, tuple):
+        return sum(_tamanho(v) for v in valor)
+    return 0
+
+
+def _somente_leitura(valor):
+    # Resultados compartilhados entre chamadas não podem ser alterados
+    if isinstance(valor, tuple):
+        return tuple(_somente_leitura(v) for v in valor)
+    return somente_leitura(valor)
+
+
+cache_resultados = CacheResultados()
+
+
+def memorizar(funcao=None, *, ignorar=(), cache=None):
+    """Decorador que guarda os resultados de uma operação em `cache_resultados`.
+
+    Args:
+        ignorar: nomes de parâmetros que não entram na chave (caches auxiliares,
+            objetos de gradientes compartilhados, etc.)
+        cache: CacheResultados a usar (padrão: o global)
+
+    Chamadas com argumentos que não têm chave de conteúdo (por exemplo uma
+    ImagemBinaria ou uma matriz mapeada do disco) executam a operação
+    diretamente. Os resultados são devolvidos como somente leitura.
+    """
+    if funcao is None:
+        return lambda f: memorizar(f, ignorar=ignorar, cache=cache)
+
+    assinatura = inspect.signature(funcao)
+    nome = f"{funcao.__module__}.{funcao.__qualname__}"
+
+    @functools.wraps(funcao)
+    def envolvida(*args, **kwargs):
+        destino = cache if cache is not None else cache_resultados
+        argumentos = assinatura.bind(*args, **kwargs)
+        argumentos.apply_defaults()
+        try:
+            chave = (nome,) + tuple((parametro, _chave_valor(valor))
+                                    for parametro, valor in argumentos.arguments.items()
+                                    if parametro not in ignorar)
+        except _NaoMemorizavel:
+            return funcao(*args, **kwargs)
+
+        resultado = destino.obter(chave)
+        if resultado is None:
+            resultado = _somente_leitura(funcao(*args, **kwargs))
+            destino.guardar(chave, resultado)
+        return resultado
+
+    envolvida.sem_cache = funcao
+    return envolvida
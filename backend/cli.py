@@ -0,0 +1,211 @@
+"""Processamento em lote, sem interface gráfica.
+
+Aplica uma sequência de operações a todas as imagens de uma pasta, com os
+arquivos distribuídos entre processos. Exemplo:
+
+    python -m backend.cli entrada/ saida/ -o grayscale -o gaussiano:sigma=2 \\
+        -o rotacao:angulo=30,interpolacao=bicubica
+
+Um pipeline salvo pela interface (Arquivo > Salvar pipeline) pode ser
+reproduzido com --pipeline; as etapas passam pela otimização de
+backend.pipeline antes de cada imagem. Não importa tkinter, então pode rodar
+em servidores sem display.
+"""
+import argparse
+import ast
+import inspect
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+from PIL import Image
+
+from backend.operacoes import OPERACOES, parametros, validar_etapa
+from backend.paralelo import configurar_threads
+from backend.pipeline import carregar, reproduzir
+
+EXTENSOES = ('.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff', '.gif', '.webp', '.npy')
+MODOS_SUPORTADOS = ('L', 'RGB', 'RGBA')
+
+
+def ler_etapa(texto):
+    """Converte 'nome:parametro=valor,parametro=valor' em (nome, {parametro: valor}).
+
+    Os valores são literais Python (números, True, ...); o que não for um
+    literal fica como texto, então 'direcao=x' não precisa de aspas.
+    """
+    nome, _, resto = texto.partition(':')
+    argumentos = {}
+    for item in filter(None, resto.split(',')):
+        chave, separador, valor = item.partition('=')
+        if not separador:
+            raise ValueError(f"Parâmetro sem valor em '{texto}': {item}")
+        try:
+            argumentos[chave.strip()] = ast.literal_eval(valor.strip())
+        except (ValueError, SyntaxError):
+            argumentos[chave.strip()] = valor.strip()
+    nome = nome.strip()
+    validar_etapa(nome, argumentos)
+    return nome, argumentos
+
+
+def ler_imagem(caminho):
+    if caminho.lower().endswith('.npy'):
+        return np.load(caminho)
+    imagem = Image.open(caminho)
+    if imagem.mode not in MODOS_SUPORTADOS:
+        imagem = imagem.convert('RGBA' if 'A' in imagem.getbands() else 'RGB')
+    return np.array(imagem)
+
+
+def salvar_imagem(matriz, caminho):
+    if caminho.lower().endswith('.npy'):
+        np.save(caminho, matriz)
+    else:
+        Image.fromarray(matriz).save(caminho)
+
+
+def processar_arquivo(entrada, saida, etapas):
+    """Lê, processa e grava um arquivo (roda num processo de trabalho).
+
+    Returns:
+        tupla (megapixels lidos, segundos)
+    """
+    inicio = time.perf_counter()
+    matriz = ler_imagem(entrada)
+    salvar_imagem(reproduzir(etapas, matriz), saida)
+    return matriz.shape[0] * matriz.shape[1] / 1e6, time.perf_counter() - inicio
+
+
+def _iniciar_processo(threads):
+    # Os processos já ocupam as CPUs: cada um usa poucas threads nas faixas
+    configurar_threads(threads)
+
+
+def listar_arquivos(pasta):
+    return sorted(nome for nome in os.listdir(pasta)
+                  if nome.lower().endswith(EXTENSOES) and os.path.isfile(os.path.join(pasta, nome)))
+
+
+def destinos_saida(arquivos, pasta_saida, formato=None):
+    """Caminho de saída de cada arquivo de entrada.
+
+    Raises:
+        ValueError: se dois arquivos dariam o mesmo nome de saída (por
+            exemplo a.png e a.jpg com formato 'png')
+    """
+    destinos = {}
+    origens = {}
+    for nome in arquivos:
+        base, extensao = os.path.splitext(nome)
+        destino = os.path.join(pasta_saida, base + ('.' + formato.lstrip('.') if formato else extensao))
+        origens.setdefault(destino, []).append(nome)
+        destinos[nome] = destino
+    repetidos = [f"{os.path.basename(destino)} ({', '.join(nomes)})"
+                 for destino, nomes in origens.items() if len(nomes) > 1]
+    if repetidos:
+        raise ValueError("arquivos de entrada com o mesmo nome de saída: " + '; '.join(repetidos))
+    return destinos
+
+
+def executar_lote(pasta_entrada, pasta_saida, etapas, processos=None, formato=None):
+    """Aplica as etapas a cada imagem da pasta, em paralelo entre processos.
+
+    Args:
+        pasta_entrada: pasta com as imagens
+        pasta_saida: pasta onde os resultados são gravados (criada se preciso)
+        etapas: lista de (nome, {parametro: valor})
+        processos: número de processos (padrão: número de CPUs)
+        formato: extensão dos arquivos de saída, ex. 'png' (padrão: a da entrada)
+
+    Returns:
+        número de arquivos que falharam
+
+    Raises:
+        ValueError: se dois arquivos dariam o mesmo nome de saída (ver destinos_saida)
+    """
+    arquivos = listar_arquivos(pasta_entrada)
+    if not arquivos:
+        print(f"Nenhuma imagem em {pasta_entrada}")
+        return 0
+    destinos = destinos_saida(arquivos, pasta_saida, formato)
+    os.makedirs(pasta_saida, exist_ok=True)
+    processos = min(processos or os.cpu_count() or 1, len(arquivos))
+    threads = max(1, (os.cpu_count() or 1) // processos)
+
+    falhas = 0
+    megapixels = 0.0
+    inicio = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=processos, initializer=_iniciar_processo,
+                             initargs=(threads,)) as executor:
+        futuros = {}
+        for nome in arquivos:
+            futuro = executor.submit(processar_arquivo, os.path.join(pasta_entrada, nome),
+                                     destinos[nome], etapas)
+            futuros[futuro] = nome
+        for concluidos, futuro in enumerate(as_completed(futuros), 1):
+            nome = futuros[futuro]
+            try:
+                mp, segundos = futuro.result()
+            except Exception as erro:
+                falhas += 1
+                print(f"[{concluidos}/{len(arquivos)}] {nome}: erro: {erro}", file=sys.stderr)
+                continue
+            megapixels += mp
+            print(f"[{concluidos}/{len(arquivos)}] {nome}: {segundos:.2f} s")
+    total = time.perf_counter() - inicio
+
+    processados = len(arquivos) - falhas
+    print(f"{processados} imagens ({megapixels:.1f} MP) em {total:.2f} s com {processos} processos: "
+          f"{processados / total:.2f} imagens/s, {megapixels / total:.2f} MP/s")
+    if falhas:
+        print(f"{falhas} arquivos com erro", file=sys.stderr)
+    return falhas
+
+
+def _descrever_operacoes():
+    linhas = []
+    for nome in OPERACOES:
+        argumentos = ', '.join(p if padrao is inspect.Parameter.empty else f"{p}={padrao!r}"
+                               for p, padrao in parametros(nome).items())
+        linhas.append(f"  {nome}({argumentos})")
+    return '\n'.join(linhas)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m backend.cli",
+        description="Aplica uma sequência de operações a todas as imagens de uma pasta.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="operações disponíveis:\n" + _descrever_operacoes())
+    parser.add_argument('entrada', help="pasta com as imagens de entrada")
+    parser.add_argument('saida', help="pasta onde gravar os resultados")
+    parser.add_argument('--pipeline', metavar='ARQUIVO',
+                        help="pipeline em JSON salvo pela interface, aplicado antes das etapas -o")
+    parser.add_argument('-o', '--operacao', action='append', default=[], metavar='NOME[:P=V,...]',
+                        help="etapa do pipeline, na ordem em que aparece (pode repetir)")
+    parser.add_argument('-p', '--processos', type=int, default=None,
+                        help="número de processos (padrão: número de CPUs)")
+    parser.add_argument('-f', '--formato', default=None,
+                        help="formato dos arquivos de saída, ex. png (padrão: o da entrada)")
+    args = parser.parse_args(argv)
+
+    try:
+        etapas = carregar(args.pipeline) if args.pipeline else []
+        etapas += [ler_etapa(texto) for texto in args.operacao]
+    except (OSError, ValueError) as erro:
+        parser.error(str(erro))
+    if not os.path.isdir(args.entrada):
+        parser.error(f"pasta de entrada não encontrada: {args.entrada}")
+
+    try:
+        falhas = executar_lote(args.entrada, args.saida, etapas, args.processos, args.formato)
+    except ValueError as erro:
+        parser.error(str(erro))
+    return 1 if falhas else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,114 @@
+import numpy as np
+
+# Linhas processadas por vez nos passes separáveis; mantém os temporários no cache
+LINHAS_POR_BLOCO = 16
+# Somado antes do truncamento para inteiro: valores exatos inteiros (rampas,
+# regiões planas) não caem para o inteiro de baixo por erro de arredondamento
+TOLERANCIA_TRUNCAMENTO = 1e-3
+
+
+def kernel_gaussiano_1d(sigma, tamanho_kernel):
+    x = np.linspace(-(tamanho_kernel//2), tamanho_kernel//2, tamanho_kernel)
+    kernel = np.exp(-(x**2)/(2*sigma**2))
+    return kernel / kernel.sum()
+
+
+def _fatia(padded, eixo, inicio, tamanho):
+    indices = [slice(None)] * padded.ndim
+    indices[eixo] = slice(inicio, inicio + tamanho)
+    return padded[tuple(indices)]
+
+
+def _acumular(padded, kernel, eixo, tamanho, resultado, temp):
+    """Soma kernel[k] * fatia_k para todas as fatias deslocadas ao longo do eixo.
+
+    Kernels simétricos somam os pares de fatias antes de multiplicar, usando
+    metade das multiplicações.
+    """
+    tamanho_kernel = len(kernel)
+    centro = tamanho_kernel // 2
+    dtype = resultado.dtype
+    resultado[...] = 0
+
+    if np.allclose(kernel, kernel[::-1]):
+        for k in range(centro):
+            if kernel[k] == 0:
+                continue
+            np.add(_fatia(padded, eixo, k, tamanho),
+                   _fatia(padded, eixo, tamanho_kernel - 1 - k, tamanho),
+                   out=temp, dtype=dtype)
+            temp *= dtype.type(kernel[k])
+            resultado += temp
+        if kernel[centro] != 0:
+            np.multiply(_fatia(padded, eixo, centro, tamanho), dtype.type(kernel[centro]),
+                        out=temp, dtype=dtype)
+            resultado += temp
+    else:
+        for k in range(tamanho_kernel):
+            if kernel[k] == 0:
+                continue
+            np.multiply(_fatia(padded, eixo, k, tamanho), dtype.type(kernel[k]),
+                        out=temp, dtype=dtype)
+            resultado += temp
+
+    return resultado
+
+
+def _largura_pad(imagem, pad_h, pad_w):
+    return [(pad_h, pad_h), (pad_w, pad_w)] + [(0, 0)] * (imagem.ndim - 2)
+
+
+def convolucao_separavel(imagem, kernel_vertical, kernel_horizontal, modo='reflect',
+                         saida=None, dtype=np.float32):
+    """Aplica um kernel separável como dois passes 1D vetorizados (colunas e linhas).
+
+    Usa a mesma convenção de np.sum(vizinhanca * kernel) e o mesmo padding dos
+    filtros originais. Imagens em tons de cinza (H, W) e com canais (H, W, C)
+    são processadas de uma vez, em blocos de linhas para limitar a memória.
+
+    Args:
+        imagem: matriz da imagem
+        kernel_vertical, kernel_horizontal: kernels 1D
+        modo: modo de padding do np.pad
+        saida: matriz opcional que recebe o resultado; se for inteira, os
+            valores são limitados a 0-255 e truncados, como no astype dos
+            filtros originais. A soma em outra ordem pode mudar o truncamento
+            em 1 onde o valor exato é inteiro: o loop original às vezes caía
+            logo abaixo dele, aqui o inteiro é mantido (TOLERANCIA_TRUNCAMENTO)
+        dtype: tipo usado nos acumuladores
+
+    Returns:
+        matriz com o resultado (a própria saida, quando informada)
+    """
+    kernel_vertical = np.asarray(kernel_vertical, dtype=np.float64)
+    kernel_horizontal = np.asarray(kernel_horizontal, dtype=np.float64)
+    pad_v = len(kernel_vertical) // 2
+    pad_h = len(kernel_horizontal) // 2
+    altura, largura = imagem.shape[:2]
+    dtype = np.dtype(dtype)
+
+    if saida is None:
+        saida = np.empty(imagem.shape, dtype=dtype)
+    inteiro = np.issubdtype(saida.dtype, np.integer)
+
+    padded = np.pad(imagem, _largura_pad(imagem, pad_v, pad_h), mode=modo)
+    resto = imagem.shape[2:]
+    vertical = np.empty((LINHAS_POR_BLOCO, largura + 2 * pad_h) + resto, dtype=dtype)
+    temp_v = np.empty_like(vertical)
+    horizontal = np.empty((LINHAS_POR_BLOCO, largura) + resto, dtype=dtype)
+    temp_h = np.empty_like(horizontal)
+
+    for inicio in range(0, altura, LINHAS_POR_BLOCO):
+        fim = min(altura, inicio + LINHAS_POR_BLOCO)
+        n = fim - inicio
+        bloco = padded[inicio:fim + 2 * pad_v]
+
+        _acumular(bloco, kernel_vertical, 0, n, vertical[:n], temp_v[:n])
+        _acumular(vertical[:n], kernel_horizontal, 1, largura, horizontal[:n], temp_h[:n])
+
+        if inteiro:
+            horizontal[:n] += dtype.type(TOLERANCIA_TRUNCAMENTO)
+            np.clip(horizontal[:n], 0, 255, out=horizontal[:n])
+        saida[inicio:fim] = horizontal[:n]
+
+    return saida
@@ -263,7 +263,11 @@ def detectar_domino(image_manager):
     if matriz is None:
         return -1, -1
     
-    if len(matriz.shape) == 3:
+    gradientes = image_manager.get_gradientes()
+    if len(matriz.shape) == 3 and matriz.shape[2] == 3 and gradientes is not None:
+        # Mesma conversão da grayscale; reaproveita o cinza dos gradientes compartilhados
+        imagem_gray = gradientes.cinza
+    elif len(matriz.shape) == 3:
         matriz_gray_rgb = grayscale(matriz[:, :, :3] if matriz.shape[2] == 4 else matriz)
         imagem_gray = matriz_gray_rgb[:, :, 0]
     else:
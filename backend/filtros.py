@@ -1,11 +1,14 @@
 from PIL import Image
 import numpy as np
+from backend.cache import memorizar
 
 
+@memorizar
 def invert_colors(matrix):
     edited_matrix = 255 - matrix
     return edited_matrix
 
+@memorizar
 def grayscale(matrix):
     if len(matrix.shape) == 3 and matrix.shape[2] == 3:  
         gray_matrix = np.mean(matrix, axis=2).astype(np.uint8)  
@@ -14,6 +17,9 @@ def grayscale(matrix):
         edited_matrix = matrix  
     return edited_matrix
 
+@memorizar
 def brilho_contraste(matrix, brilho=0.0, contraste=1.0):
+    if brilho == 0 and contraste == 1 and matrix.dtype == np.uint8:
+        return matrix
     edited_matrix = np.clip(contraste * matrix + brilho, 0, 255).astype(np.uint8)
     return edited_matrix
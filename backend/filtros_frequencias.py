@@ -1,11 +1,30 @@
 import numpy as np
+from backend.cache import impressao_digital, memorizar
+from backend.convolucao import convolucao_separavel, kernel_gaussiano_1d
+from backend.mediana import mediana_histograma
+from backend.morfologia_binaria import ImagemBinaria
+from backend.gradientes import converter_cinza, obter_gradientes
+from backend.paralelo import processar_em_faixas
+from backend.tarefas import verificar_cancelamento
 
+# A partir deste tamanho de kernel o gaussiano é aplicado via FFT
+LIMIAR_FFT_GAUSSIANO = 151
+
+@memorizar
 def filtro_mediana(imagem, tamanho_kernel=3):
     if tamanho_kernel % 2 == 0:
         tamanho_kernel += 1
-    
+    if tamanho_kernel == 1:
+        return imagem
+    
+    # Imagens uint8 usam a mediana por histograma, de custo constante por pixel
+    if imagem.dtype == np.uint8:
+        return processar_em_faixas(imagem,
+                                   lambda faixa: mediana_histograma(faixa, tamanho_kernel),
+                                   raio=tamanho_kernel // 2)
+
     pad = tamanho_kernel // 2
-    
+
     if len(imagem.shape) == 3:
         resultado = np.zeros_like(imagem)
         for canal in range(3):
@@ -13,6 +32,7 @@ def filtro_mediana(imagem, tamanho_kernel=3):
             temp = np.zeros_like(imagem[:,:,canal])
             
             for i in range(imagem.shape[0]):
+                verificar_cancelamento((canal + i / imagem.shape[0]) / 3)
                 for j in range(imagem.shape[1]):
                     vizinhanca = padded[i:i+tamanho_kernel, j:j+tamanho_kernel]
                     temp[i,j] = np.median(vizinhanca)
@@ -24,16 +44,21 @@ def filtro_mediana(imagem, tamanho_kernel=3):
         resultado = np.zeros_like(imagem)
         
         for i in range(imagem.shape[0]):
+            verificar_cancelamento(i / imagem.shape[0])
             for j in range(imagem.shape[1]):
                 vizinhanca = padded[i:i+tamanho_kernel, j:j+tamanho_kernel]
                 resultado[i,j] = np.median(vizinhanca)
         
         return resultado
 
-def filtro_gaussiano(imagem, sigma=1.0):    
+def raio_gaussiano(sigma):
+    # Metade do kernel usado pelo filtro_gaussiano (cerca de 3 sigmas)
     tamanho_kernel = int(6 * sigma + 1)
-    if tamanho_kernel % 2 == 0:
-        tamanho_kernel += 1
+    return tamanho_kernel // 2
+
+@memorizar(ignorar=('cache',))
+def filtro_gaussiano(imagem, sigma=1.0, cache=None):    
+    tamanho_kernel = 2 * raio_gaussiano(sigma) + 1
     
     altura, largura = imagem.shape[:2]
     tamanho_max = min(altura, largura)
@@ -41,123 +66,41 @@ def filtro_gaussiano(imagem, sigma=1.0):
         tamanho_kernel = tamanho_max if tamanho_max % 2 == 1 else tamanho_max - 1
         if tamanho_kernel < 3:
             tamanho_kernel = 3    
-    x = np.linspace(-(tamanho_kernel//2), tamanho_kernel//2, tamanho_kernel)
-    x, y = np.meshgrid(x, x)
-    kernel = np.exp(-(x**2 + y**2)/(2*sigma**2))
-    kernel = kernel / kernel.sum()
+    # O kernel 2D é o produto externo do 1D por ele mesmo: dois passes 1D bastam
+    kernel_1d = kernel_gaussiano_1d(sigma, tamanho_kernel)
     
-    pad = tamanho_kernel // 2
+    if tamanho_kernel >= LIMIAR_FFT_GAUSSIANO:
+        # Kernels grandes ficam mais baratos no domínio da frequência
+        return _gaussiano_fft(imagem, kernel_1d, cache)
+
+    # Dois passes 1D sobre todos os canais (RGB ou RGBA) de uma vez, em faixas paralelas
+    def aplicar(faixa):
+        resultado = np.empty(faixa.shape, dtype=np.uint8)
+        return convolucao_separavel(faixa, kernel_1d, kernel_1d, modo='reflect', saida=resultado)
     
-    if len(imagem.shape) == 3:
-        num_canais = imagem.shape[2]  # Pode ser 3 (RGB) ou 4 (RGBA)
-        resultado = np.zeros_like(imagem, dtype=np.float64)
-        
-        for canal in range(num_canais):
-            padded = np.pad(imagem[:,:,canal], pad, mode='reflect')
-            temp = np.zeros(imagem[:,:,canal].shape, dtype=np.float64)
-            
-            for i in range(imagem.shape[0]):
-                for j in range(imagem.shape[1]):
-                    vizinhanca = padded[i:i+tamanho_kernel, j:j+tamanho_kernel]
-                    temp[i,j] = np.sum(vizinhanca * kernel)
-            
-            resultado[:,:,canal] = temp
-        
-        resultado = np.clip(resultado, 0, 255).astype(np.uint8)
-        print(f"[DEBUG Gaussiano] Saída ({num_canais} canais) - Shape: {resultado.shape}, dtype: {resultado.dtype}, min: {resultado.min()}, max: {resultado.max()}")
-        return resultado
-    else:
-        padded = np.pad(imagem, pad, mode='reflect')
-        resultado = np.zeros_like(imagem, dtype=np.float64)
-        
-        for i in range(imagem.shape[0]):
-            for j in range(imagem.shape[1]):
-                vizinhanca = padded[i:i+tamanho_kernel, j:j+tamanho_kernel]
-                resultado[i,j] = np.sum(vizinhanca * kernel)
-        
-        resultado = np.clip(resultado, 0, 255).astype(np.uint8)
-        print(f"[DEBUG Gaussiano] Saída Gray - Shape: {resultado.shape}, dtype: {resultado.dtype}, min: {resultado.min()}, max: {resultado.max()}")
-        return resultado
+    return processar_em_faixas(imagem, aplicar, raio=tamanho_kernel // 2, dtype=np.uint8)
 
-def filtro_laplaciano(imagem, ksize=3):
-    if imagem.dtype != np.uint8:
-        imagem = np.clip(imagem, 0, 255).astype(np.uint8)
+@memorizar(ignorar=('gradientes',))
+def filtro_laplaciano(imagem, ksize=3, gradientes=None):
+    gradientes = obter_gradientes(imagem, gradientes)
     
-    if len(imagem.shape) == 3:
-        imagem_gray = np.mean(imagem, axis=2).astype(np.uint8)
-    else:
-        imagem_gray = imagem
-        
-    if ksize == 3:
-        kernel = np.array([[0, 1, 0],
-                          [1, -4, 1],
-                          [0, 1, 0]])
-    else:  
-        kernel = np.array([[0, 0, 1, 0, 0],
-                          [0, 1, 2, 1, 0],
-                          [1, 2, -16, 2, 1],
-                          [0, 1, 2, 1, 0],
-                          [0, 0, 1, 0, 0]])
-    
-    pad = ksize // 2
-    padded = np.pad(imagem_gray, pad, mode='reflect')
-    bordas = np.zeros_like(imagem_gray, dtype=np.float64)
-    
-    for i in range(imagem_gray.shape[0]):
-        for j in range(imagem_gray.shape[1]):
-            vizinhanca = padded[i:i+ksize, j:j+ksize]
-            bordas[i,j] = np.sum(vizinhanca * kernel)
-    
-    bordas = np.absolute(bordas)
+    bordas = np.absolute(gradientes.laplaciano(ksize))
     bordas = np.clip(bordas, 0, 255).astype(np.uint8)
     
     if len(imagem.shape) == 3:
         return np.stack((bordas,)*3, axis=-1)
     return bordas
 
-def filtro_sobel(imagem, direcao='ambos', ksize=3):
-    if imagem.dtype != np.uint8:
-        imagem = np.clip(imagem, 0, 255).astype(np.uint8)
-    
-    if len(imagem.shape) == 3:
-        imagem_gray = np.mean(imagem, axis=2).astype(np.uint8)
-    else:
-        imagem_gray = imagem
-    
-    if ksize == 3:
-        kernel_x = np.array([[-1, 0, 1],
-                           [-2, 0, 2],
-                           [-1, 0, 1]])
-        kernel_y = np.array([[-1, -2, -1],
-                           [0, 0, 0],
-                           [1, 2, 1]])
-    else:  
-        kernel_x = np.array([[-1, -2, 0, 2, 1],
-                           [-4, -8, 0, 8, 4],
-                           [-6, -12, 0, 12, 6],
-                           [-4, -8, 0, 8, 4],
-                           [-1, -2, 0, 2, 1]])
-        kernel_y = kernel_x.T
-    
-    pad = ksize // 2
-    padded = np.pad(imagem_gray, pad, mode='reflect')
-    grad_x = np.zeros_like(imagem_gray, dtype=np.float64)
-    grad_y = np.zeros_like(imagem_gray, dtype=np.float64)
-    
-    for i in range(imagem_gray.shape[0]):
-        for j in range(imagem_gray.shape[1]):
-            vizinhanca = padded[i:i+ksize, j:j+ksize]
-            if direcao in ['x', 'ambos']:
-                grad_x[i,j] = np.sum(vizinhanca * kernel_x)
-            if direcao in ['y', 'ambos']:
-                grad_y[i,j] = np.sum(vizinhanca * kernel_y)
+@memorizar(ignorar=('gradientes',))
+def filtro_sobel(imagem, direcao='ambos', ksize=3, gradientes=None):
+    gradientes = obter_gradientes(imagem, gradientes)
     
     if direcao == 'x':
-        grad = np.absolute(grad_x)
+        grad = np.absolute(gradientes.gx(ksize))
     elif direcao == 'y':
-        grad = np.absolute(grad_y)
+        grad = np.absolute(gradientes.gy(ksize))
     else:
-        grad = np.sqrt(grad_x**2 + grad_y**2)
+        grad = gradientes.magnitude(ksize)
     
     grad = np.clip(grad, 0, 255).astype(np.uint8)
     
@@ -165,18 +108,148 @@ def filtro_sobel(imagem, direcao='ambos', ksize=3):
         return np.stack((grad,)*3, axis=-1)
     return grad
 
-def limiarizacao_global(imagem, limiar=127, valor_max=255): # threshold
-    if imagem.dtype != np.uint8:
-        imagem = np.clip(imagem, 0, 255).astype(np.uint8)
-    
-    if len(imagem.shape) == 3:
-        imagem_gray = np.mean(imagem, axis=2).astype(np.uint8)
+@memorizar(ignorar=('gradientes',))
+def limiarizacao_global(imagem, limiar=127, valor_max=255, gradientes=None): # threshold
+    if gradientes is not None and gradientes.imagem is imagem:
+        imagem_gray = gradientes.cinza
     else:
-        imagem_gray = imagem
+        imagem_gray = converter_cinza(imagem)
     
-    resultado = np.where(imagem_gray >= limiar, valor_max, 0).astype(np.uint8)
+    # Sai da ImagemBinaria: erosão, dilatação etc. aplicadas em seguida reaproveitam
+    # os bits empacotados, sem reconferir a imagem
+    binaria = ImagemBinaria.de_mascara(imagem_gray >= limiar)
+    formato = imagem.shape[:2] + ((3,) if len(imagem.shape) == 3 else ())
+    return binaria.para_matriz(np.asarray(valor_max).astype(np.uint8), formato)
+
+def _tamanho_fft(n):
+    # Menor potência de dois >= n
+    return 1 << (int(n) - 1).bit_length()
+
+def _margem_padrao(imagem):
+    return max(8, min(imagem.shape[:2]) // 8)
+
+class CacheEspectro:
+    """Guarda a FFT real da última matriz transformada.
+
+    O ImageManager mantém uma instância para a edited_matrix. A chave é o
+    conteúdo da matriz, então testar vários cortes (inclusive depois de
+    "Resetar imagem") não refaz a transformada direta.
+    """
+    def __init__(self):
+        self.limpar()
+
+    def limpar(self):
+        self.matriz = None
+        self.chave = None
+        self.margem = 0
+        self.espectro = None
+
+    def obter(self, imagem, margem):
+        if imagem is not self.matriz:
+            chave = impressao_digital(imagem)
+            if chave != self.chave:
+                self.chave = chave
+                self.margem = 0
+                self.espectro = None
+            self.matriz = imagem
+        
+        if self.espectro is None or margem > self.margem:
+            self.espectro = calcular_espectro(imagem, margem)
+            self.margem = margem
+        return self.espectro, self.margem
+
+def calcular_espectro(imagem, margem):
+    """FFT real 2D da imagem com padding 'reflect' até potências de dois.
+
+    A imagem fica deslocada de `margem` pixels em cada eixo; o restante do
+    padding vai para o fim. Canais são transformados juntos (eixos 0 e 1).
+    """
+    altura, largura = imagem.shape[:2]
+    n_altura = _tamanho_fft(altura + 2 * margem)
+    n_largura = _tamanho_fft(largura + 2 * margem)
     
-    if len(imagem.shape) == 3:
-        return np.stack((resultado,)*3, axis=-1)
-    return resultado
+    largura_pad = [(margem, n_altura - altura - margem),
+                   (margem, n_largura - largura - margem)] + [(0, 0)] * (imagem.ndim - 2)
+    padded = np.pad(imagem, largura_pad, mode='reflect').astype(np.float32)
+    return np.fft.rfft2(padded, axes=(0, 1))
+
+def _obter_espectro(imagem, margem, cache):
+    if cache is None:
+        return calcular_espectro(imagem, margem), margem
+    return cache.obter(imagem, margem)
+
+def _inversa(espectro, filtro, imagem, margem, arredondar=False):
+    altura, largura = imagem.shape[:2]
+    n_altura = espectro.shape[0]
+    n_largura = (espectro.shape[1] - 1) * 2
+    
+    if espectro.ndim == 3:
+        filtro = filtro[..., None]
+    resultado = np.fft.irfft2(espectro * filtro, s=(n_altura, n_largura), axes=(0, 1))
+    resultado = resultado[margem:margem+altura, margem:margem+largura]
+    if arredondar:
+        resultado = np.rint(resultado)
+    return np.clip(resultado, 0, 255).astype(np.uint8)
+
+def _gaussiano_fft(imagem, kernel_1d, cache=None):
+    pad = len(kernel_1d) // 2
+    margem = max(pad, _margem_padrao(imagem))
+    espectro, margem = _obter_espectro(imagem, margem, cache)
+    n_altura = espectro.shape[0]
+    n_largura = (espectro.shape[1] - 1) * 2
+    
+    # Kernel centrado na origem (circular), separável em linhas e colunas
+    kernel_y = np.zeros(n_altura)
+    kernel_y[:pad+1] = kernel_1d[pad:]
+    kernel_y[n_altura-pad:] = kernel_1d[:pad]
+    kernel_x = np.zeros(n_largura)
+    kernel_x[:pad+1] = kernel_1d[pad:]
+    kernel_x[n_largura-pad:] = kernel_1d[:pad]
+    filtro = np.fft.fft(kernel_y)[:, None] * np.fft.rfft(kernel_x)[None, :]
+    
+    return _inversa(espectro, filtro, imagem, margem)
+
+def _distancias_frequencia(espectro, imagem):
+    # Distância ao centro do espectro, na escala de uma imagem altura x largura
+    altura, largura = imagem.shape[:2]
+    n_altura = espectro.shape[0]
+    n_largura = (espectro.shape[1] - 1) * 2
+    fy = np.fft.fftfreq(n_altura)[:, None] * altura
+    fx = np.fft.rfftfreq(n_largura)[None, :] * largura
+    return np.sqrt(fy**2 + fx**2)
 
+@memorizar(ignorar=('cache',))
+def filtro_frequencia(imagem, tipo='gaussiano', passa='baixa', corte=30.0, ordem=2, cache=None):
+    """Filtra a imagem no domínio da frequência.
+    
+    Args:
+        imagem: matriz da imagem (cinza, RGB ou RGBA)
+        tipo: 'ideal', 'butterworth' ou 'gaussiano'
+        passa: 'baixa' ou 'alta'
+        corte: raio de corte D0, em pixels do espectro centrado
+        ordem: ordem n do filtro Butterworth
+        cache: CacheEspectro opcional para reaproveitar a FFT direta
+    
+    Returns:
+        matriz uint8 com a imagem filtrada
+    """
+    corte = max(float(corte), 1e-6)
+    margem = _margem_padrao(imagem)
+    espectro, margem = _obter_espectro(imagem, margem, cache)
+    D = _distancias_frequencia(espectro, imagem)
+    
+    if tipo == 'ideal':
+        filtro = (D <= corte).astype(np.float32)
+    elif tipo == 'butterworth':
+        filtro = 1.0 / (1.0 + (D / corte) ** (2 * ordem))
+    elif tipo == 'gaussiano':
+        filtro = np.exp(-(D**2) / (2 * corte**2))
+    else:
+        raise ValueError("Tipo deve ser 'ideal', 'butterworth' ou 'gaussiano'")
+    
+    if passa == 'alta':
+        filtro = 1.0 - filtro
+    elif passa != 'baixa':
+        raise ValueError("Passa deve ser 'baixa' ou 'alta'")
+    
+    return _inversa(espectro, filtro.astype(np.float32), imagem, margem, arredondar=True)
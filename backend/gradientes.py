@@ -0,0 +1,126 @@
+import numpy as np
+
+# Padding suficiente para todos os kernels; com 'reflect' a região central de um
+# buffer com pad 3 é idêntica à de um buffer com pad 1 ou 2
+PAD = 3
+
+SUAVIZACAO = {
+    3: np.array([1, 2, 1]),
+    5: np.array([1, 4, 6, 4, 1]),
+    7: np.array([1, 6, 15, 20, 15, 6, 1]),
+}
+DERIVADA = {
+    3: np.array([-1, 0, 1]),
+    5: np.array([-1, -2, 0, 2, 1]),
+    7: np.array([-1, -4, -5, 0, 5, 4, 1]),
+}
+
+LAPLACIANO = {
+    3: np.array([[0, 1, 0],
+                 [1, -4, 1],
+                 [0, 1, 0]]),
+    5: np.array([[0, 0, 1, 0, 0],
+                 [0, 1, 2, 1, 0],
+                 [1, 2, -16, 2, 1],
+                 [0, 1, 2, 1, 0],
+                 [0, 0, 1, 0, 0]]),
+}
+
+
+def converter_cinza(imagem):
+    if imagem.dtype != np.uint8:
+        imagem = np.clip(imagem, 0, 255).astype(np.uint8)
+
+    if len(imagem.shape) == 3:
+        return np.mean(imagem, axis=2).astype(np.uint8)
+    return imagem
+
+
+def _tamanho_kernel(ksize, tamanhos):
+    # Como nos filtros originais, tamanhos não suportados usam o kernel 5x5
+    return ksize if ksize in tamanhos else 5
+
+
+class Gradientes:
+    """Gradientes de uma imagem calculados a partir de um único buffer com padding.
+
+    Gx, Gy, magnitude e Laplaciano são obtidos por fatias deslocadas do mesmo
+    buffer em tons de cinza e guardados, de modo que mapas de borda,
+    limiarização e o detector do dominó reutilizam o que já foi calculado.
+    """
+
+    def __init__(self, imagem):
+        self.imagem = imagem
+        self.cinza = converter_cinza(imagem)
+        self.altura, self.largura = self.cinza.shape
+        self._padded = np.pad(self.cinza, PAD, mode='reflect').astype(np.int32)
+        self._resultados = {}
+
+    def _fatia(self, dy, dx):
+        # Deslocamento (dy, dx) em relação ao pixel central
+        i = PAD + dy
+        j = PAD + dx
+        return self._padded[i:i+self.altura, j:j+self.largura]
+
+    def _separavel(self, kernel_vertical, kernel_horizontal):
+        raio_v = len(kernel_vertical) // 2
+        raio_h = len(kernel_horizontal) // 2
+
+        # Passe horizontal sobre as linhas necessárias, depois o vertical
+        linhas = self._padded[PAD-raio_v:PAD+self.altura+raio_v]
+        horizontal = np.zeros((linhas.shape[0], self.largura), dtype=np.int32)
+        for k, peso in enumerate(kernel_horizontal):
+            if peso != 0:
+                j = PAD - raio_h + k
+                horizontal += peso * linhas[:, j:j+self.largura]
+
+        resultado = np.zeros((self.altura, self.largura), dtype=np.int32)
+        for k, peso in enumerate(kernel_vertical):
+            if peso != 0:
+                resultado += peso * horizontal[k:k+self.altura]
+        return resultado
+
+    def gx(self, ksize=3):
+        ksize = _tamanho_kernel(ksize, SUAVIZACAO)
+        chave = ('gx', ksize)
+        if chave not in self._resultados:
+            self._resultados[chave] = self._separavel(SUAVIZACAO[ksize], DERIVADA[ksize])
+        return self._resultados[chave]
+
+    def gy(self, ksize=3):
+        ksize = _tamanho_kernel(ksize, SUAVIZACAO)
+        chave = ('gy', ksize)
+        if chave not in self._resultados:
+            self._resultados[chave] = self._separavel(DERIVADA[ksize], SUAVIZACAO[ksize])
+        return self._resultados[chave]
+
+    def magnitude(self, ksize=3):
+        ksize = _tamanho_kernel(ksize, SUAVIZACAO)
+        chave = ('magnitude', ksize)
+        if chave not in self._resultados:
+            gx = self.gx(ksize).astype(np.float64)
+            gy = self.gy(ksize).astype(np.float64)
+            self._resultados[chave] = np.sqrt(gx**2 + gy**2)
+        return self._resultados[chave]
+
+    def laplaciano(self, ksize=3):
+        ksize = _tamanho_kernel(ksize, LAPLACIANO)
+        chave = ('laplaciano', ksize)
+        if chave not in self._resultados:
+            kernel = LAPLACIANO[ksize]
+            raio = ksize // 2
+            resultado = np.zeros((self.altura, self.largura), dtype=np.int32)
+            for di in range(ksize):
+                for dj in range(ksize):
+                    peso = kernel[di, dj]
+                    if peso != 0:
+                        resultado += peso * self._fatia(di - raio, dj - raio)
+            self._resultados[chave] = resultado
+        return self._resultados[chave]
+
+
+def obter_gradientes(imagem, gradientes=None):
+    """Reaproveita `gradientes` se ele foi calculado para a mesma matriz."""
+    if gradientes is not None and gradientes.imagem is imagem:
+        return gradientes
+    return Gradientes(imagem)
@@ -0,0 +1,320 @@
+import copy
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from backend.buffer_imagem import em_disco, somente_leitura as _somente_leitura
+
+# Orçamento padrão do histórico (desfazer + refazer), em bytes
+ORCAMENTO_PADRAO = 300 * 1024 * 1024
+# Entradas mais recentes que ficam sem compressão, para desfazer instantâneo
+RECENTES_SEM_COMPRESSAO = 2
+# Uma região alterada maior que esta fração da imagem é guardada inteira
+FRACAO_MAXIMA_REGIAO = 0.5
+# Linhas por faixa comprimida; faixas sem diferença não são guardadas nem descomprimidas
+LINHAS_POR_FAIXA = 256
+
+_segundo_plano = None
+
+
+def _obter_segundo_plano():
+    # Uma thread basta: descomprime a próxima entrada e comprime as antigas
+    # enquanto o usuário olha o estado atual (zlib libera o GIL)
+    global _segundo_plano
+    if _segundo_plano is None:
+        _segundo_plano = ThreadPoolExecutor(max_workers=1, thread_name_prefix="historico")
+    return _segundo_plano
+
+
+class _Entrada:
+    """Reconstrói um estado da imagem a partir do estado vizinho na pilha.
+
+    Enquanto recente, guarda só uma referência à matriz (sem cópia). Ao ser
+    compactada, passa a guardar a diferença para o estado vizinho (ou a
+    região alterada) comprimida com zlib, o que costuma ser bem menor.
+    """
+
+    def __init__(self, estado, referencia):
+        self.formato = estado.shape
+        self.dtype = estado.dtype
+        self.regiao = None
+        self.matriz = None
+        self.referencia = None
+        self.comprimido = None
+        # Faixas sendo descomprimidas em segundo plano (ver preparar)
+        self._preparadas = None
+        # +1: estado = referencia + delta; -1: estado = referencia - delta
+        self.delta = 0
+        # Pipeline de operações que produziu o estado guardado
+        self.etapas = ()
+
+        mesmo_formato = estado.shape == referencia.shape and estado.dtype == referencia.dtype
+        # Estados mapeados do disco não são comparados nem copiados: só referenciados
+        if not mesmo_formato or em_disco(estado) or em_disco(referencia):
+            self.matriz = _somente_leitura(estado)
+            return
+
+        regiao = _regiao_alterada(estado, referencia)
+        if regiao is None:
+            # Nada mudou: o estado é a própria referência
+            self.regiao = (0, 0, 0, 0)
+            self.matriz = np.empty((0, 0) + estado.shape[2:], dtype=estado.dtype)
+            return
+
+        y0, y1, x0, x1 = regiao
+        if (y1 - y0) * (x1 - x0) <= FRACAO_MAXIMA_REGIAO * estado.shape[0] * estado.shape[1]:
+            self.regiao = regiao
+            self.matriz = estado[y0:y1, x0:x1].copy()
+        else:
+            self.matriz = _somente_leitura(estado)
+            self.referencia = referencia
+
+    @property
+    def nbytes(self):
+        if self.comprimido is not None:
+            return sum(len(faixa) for _, faixa in self.comprimido)
+        if em_disco(self.matriz):
+            return 0
+        return self.matriz.nbytes
+
+    @property
+    def compactada(self):
+        return self.comprimido is not None
+
+    def compactar(self, nivel=1):
+        """Comprime as faixas de linhas separadamente, com zlib.
+
+        Numa diferença, as faixas sem alteração (só zeros) nem são guardadas:
+        restaurar só descomprime as que mudaram.
+        """
+        if self.compactada or em_disco(self.matriz):
+            return
+        dados = self.matriz
+        if self.referencia is not None and np.issubdtype(self.dtype, np.integer):
+            # Diferença com volta (mod 2^bits): estados vizinhos comprimem melhor
+            dados = np.subtract(self.matriz, self.referencia, dtype=self.dtype)
+            self.delta = 1
+        self.formato_dados = dados.shape
+        self.comprimido = []
+        for inicio in range(0, dados.shape[0], LINHAS_POR_FAIXA):
+            faixa = np.ascontiguousarray(dados[inicio:inicio + LINHAS_POR_FAIXA])
+            if self.delta and not faixa.any():
+                continue
+            self.comprimido.append((inicio, zlib.compress(faixa.data, nivel)))
+        self.matriz = None
+        self.referencia = None
+        self._preparadas = None
+
+    def preparar(self):
+        """Começa a descomprimir as faixas em segundo plano, antes de restaurar."""
+        if self.comprimido is not None and self._preparadas is None:
+            executor = _obter_segundo_plano()
+            self._preparadas = [(inicio, executor.submit(zlib.decompress, faixa))
+                                for inicio, faixa in self.comprimido]
+
+    def _faixas(self):
+        # (primeira linha, dados) de cada faixa guardada, já descomprimida
+        preparadas = self._preparadas
+        self._preparadas = None
+        largura = self.formato_dados[1:]
+        for i, (inicio, faixa) in enumerate(self.comprimido):
+            dados = preparadas[i][1].result() if preparadas else zlib.decompress(faixa)
+            dados = np.frombuffer(dados, dtype=self.dtype)
+            yield inicio, dados.reshape((-1,) + largura)
+
+    def _dados(self):
+        if self.comprimido is None:
+            return self.matriz
+        dados = np.empty(self.formato_dados, dtype=self.dtype)
+        for inicio, faixa in self._faixas():
+            dados[inicio:inicio + len(faixa)] = faixa
+        return dados
+
+    def restaurar(self, referencia):
+        """Estado guardado, dado o estado vizinho atual."""
+        if self.regiao is None and self.delta:
+            # Uma passada só: faixas alteradas somam a diferença, as outras são copiadas
+            operacao = np.add if self.delta > 0 else np.subtract
+            resultado = np.empty_like(referencia)
+            copiadas = 0
+            for inicio, faixa in self._faixas():
+                resultado[copiadas:inicio] = referencia[copiadas:inicio]
+                fim = inicio + len(faixa)
+                operacao(referencia[inicio:fim], faixa, out=resultado[inicio:fim], dtype=self.dtype)
+                copiadas = fim
+            resultado[copiadas:] = referencia[copiadas:]
+            return _somente_leitura(resultado)
+
+        dados = self._dados()
+        if self.regiao is None:
+            return dados if self.comprimido is None else _somente_leitura(dados)
+
+        y0, y1, x0, x1 = self.regiao
+        if y1 == y0:
+            return referencia
+        resultado = referencia.copy()
+        resultado[y0:y1, x0:x1] = dados
+        return _somente_leitura(resultado)
+
+    def inversa(self, atual, restaurado):
+        """Entrada que volta de `restaurado` para `atual`, sem comparar as imagens.
+
+        A diferença comprimida serve nos dois sentidos (só troca o sinal) e a
+        região alterada é a mesma; assim desfazer/refazer não recomprime nada.
+        """
+        entrada = copy.copy(self)
+        entrada._preparadas = None
+        entrada.formato = atual.shape
+        entrada.dtype = atual.dtype
+        if self.regiao is not None:
+            y0, y1, x0, x1 = self.regiao
+            entrada.matriz = atual[y0:y1, x0:x1].copy()
+            entrada.comprimido = None
+        elif self.delta:
+            entrada.delta = -self.delta
+        else:
+            entrada.matriz = _somente_leitura(atual)
+            entrada.referencia = restaurado if self.formato == atual.shape else None
+            entrada.comprimido = None
+        return entrada
+
+
+def _regiao_alterada(a, b):
+    """Menor retângulo (y0, y1, x0, x1) que contém todas as diferenças, ou None."""
+    diferente = a != b
+    if diferente.ndim == 3:
+        diferente = diferente.any(axis=2)
+    linhas = np.flatnonzero(diferente.any(axis=1))
+    if len(linhas) == 0:
+        return None
+    colunas = np.flatnonzero(diferente[linhas[0]:linhas[-1] + 1].any(axis=0))
+    return int(linhas[0]), int(linhas[-1]) + 1, int(colunas[0]), int(colunas[-1]) + 1
+
+
+class Historico:
+    """Pilhas de desfazer/refazer com orçamento de memória.
+
+    Cada entrada reconstrói o estado anterior (ou seguinte) a partir do estado
+    atual: só a região alterada, ou a imagem inteira. As entradas mais
+    recentes guardam uma referência à matriz e desfazem sem custo; quando o
+    total passa do orçamento, as mais antigas são comprimidas (diferença para
+    o estado vizinho + zlib) e, se ainda não couber, descartadas a partir da
+    mais antiga. Em desfazer/refazer isso roda em segundo plano.
+    """
+
+    def __init__(self, orcamento_bytes=ORCAMENTO_PADRAO, nivel_compressao=1):
+        self.orcamento_bytes = orcamento_bytes
+        self.nivel_compressao = nivel_compressao
+        self.limpar()
+
+    def limpar(self):
+        if getattr(self, '_pendente', None) is not None:
+            self._esperar()
+        self._pendente = None
+        self.desfazer_pilha = []
+        self.refazer_pilha = []
+        # Retângulo alterado pela última operação (None: desconhecido ou a imagem toda)
+        self.ultima_regiao = None
+        # Pipeline do estado devolvido pelo último desfazer/refazer
+        self.ultimas_etapas = ()
+
+    def pode_desfazer(self):
+        self._esperar()
+        return bool(self.desfazer_pilha)
+
+    def pode_refazer(self):
+        self._esperar()
+        return bool(self.refazer_pilha)
+
+    @property
+    def uso_bytes(self):
+        self._esperar()
+        return self._uso()
+
+    def _uso(self):
+        return sum(e.nbytes for e in self.desfazer_pilha + self.refazer_pilha)
+
+    def registrar(self, anterior, atual, etapas=()):
+        """Registra a troca de `anterior` por `atual`; apaga o que havia para refazer.
+
+        `etapas` é o pipeline que produziu `anterior`, devolvido em
+        ultimas_etapas ao desfazer.
+        """
+        self._esperar()
+        if anterior is None or anterior is atual:
+            self.ultima_regiao = None if anterior is None else (0, 0, 0, 0)
+            return
+        entrada = _Entrada(anterior, atual)
+        entrada.etapas = etapas
+        self.ultima_regiao = entrada.regiao
+        self.desfazer_pilha.append(entrada)
+        self.refazer_pilha = []
+        self._aplicar_orcamento()
+
+    def desfazer(self, atual, etapas=()):
+        """Estado anterior a `atual` (de pipeline `etapas`), ou None se não houver o que desfazer."""
+        self._esperar()
+        if not self.desfazer_pilha:
+            return None
+        entrada = self.desfazer_pilha.pop()
+        anterior = entrada.restaurar(atual)
+        self.ultima_regiao = entrada.regiao
+        self.ultimas_etapas = entrada.etapas
+        inversa = entrada.inversa(atual, anterior)
+        inversa.etapas = etapas
+        self.refazer_pilha.append(inversa)
+        self._em_segundo_plano()
+        return anterior
+
+    def refazer(self, atual, etapas=()):
+        self._esperar()
+        if not self.refazer_pilha:
+            return None
+        entrada = self.refazer_pilha.pop()
+        seguinte = entrada.restaurar(atual)
+        self.ultima_regiao = entrada.regiao
+        self.ultimas_etapas = entrada.etapas
+        inversa = entrada.inversa(atual, seguinte)
+        inversa.etapas = etapas
+        self.desfazer_pilha.append(inversa)
+        self._em_segundo_plano()
+        return seguinte
+
+    def _em_segundo_plano(self):
+        """Prepara o próximo passo e aplica o orçamento fora da thread da interface.
+
+        Quem desfaz (ou refaz) um passo costuma pedir o seguinte logo depois:
+        as entradas do topo começam a ser descomprimidas antes disso. A
+        compressão das antigas roda em seguida, na mesma thread; até ela
+        terminar o orçamento pode ficar excedido, e a próxima chamada a
+        espera (_esperar) antes de mexer nas pilhas.
+        """
+        for pilha in (self.desfazer_pilha, self.refazer_pilha):
+            if pilha:
+                pilha[-1].preparar()
+        self._pendente = _obter_segundo_plano().submit(self._aplicar_orcamento)
+
+    def _esperar(self):
+        if self._pendente is not None:
+            pendente, self._pendente = self._pendente, None
+            pendente.result()
+
+    def _aplicar_orcamento(self):
+        total = self._uso()
+        if total <= self.orcamento_bytes:
+            return
+
+        # Primeiro comprime, das entradas mais distantes do estado atual para as mais próximas
+        for pilha in (self.desfazer_pilha, self.refazer_pilha):
+            for entrada in pilha[:max(0, len(pilha) - RECENTES_SEM_COMPRESSAO)]:
+                if total <= self.orcamento_bytes:
+                    return
+                if not entrada.compactada:
+                    antes = entrada.nbytes
+                    entrada.compactar(self.nivel_compressao)
+                    total += entrada.nbytes - antes
+
+        # Depois descarta as mais antigas
+        for pilha in (self.desfazer_pilha, self.refazer_pilha):
+            while pilha and total > self.orcamento_bytes:
+                total -= pilha.pop(0).nbytes
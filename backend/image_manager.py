@@ -1,45 +1,323 @@
 import numpy as np
 from PIL import Image
-from .filtros_frequencias import filtro_mediana, filtro_gaussiano
+from .filtros_frequencias import filtro_mediana, filtro_gaussiano, CacheEspectro
+from .gradientes import obter_gradientes
+from .reamostragem import INTERPOLACOES, reamostrar_afim
+from .historico import Historico, ORCAMENTO_PADRAO
+from .buffer_imagem import somente_leitura
+from .imagem_mapeada import (abrir_mapeada, criar_temporaria, miniatura,
+                             processar_em_blocos, salvar_em_blocos)
+from .previa import REGIAO_VAZIA, TAMANHO_PREVIA, PiramideMip, unir_regioes
+from .pipeline import reproduzir
 
 
 class ImageManager:
-    def __init__(self):
-        self.original_matrix = None
-        self.edited_matrix = None
+    def __init__(self, orcamento_historico=ORCAMENTO_PADRAO):
+        # Visões somente leitura: original, editada, histórico e cache compartilham a
+        # memória, e nenhuma operação altera uma matriz que já foi entregue
+        self._original = None
+        self._editado = None
         self.image_mode = None
         self.image_path = None
+        # True quando a imagem está mapeada do disco (np.memmap) em vez de carregada
+        self.mapeada = False
         self.root = None 
+        self.cache_espectro = CacheEspectro()
+        self.gradientes = None
+        self.historico = Historico(orcamento_historico)
+        # Pirâmides das prévias e região da edited_matrix alterada desde a última prévia
+        self.piramide = PiramideMip()
+        self.piramide_original = PiramideMip()
+        self._regiao_previa = None
+        # Muda a cada alteração da edited_matrix; a janela só redesenha quando ela muda
+        self.versao = 0
+        # Operações (nome, parâmetros) que levaram da original à edited_matrix
+        self.etapas = ()
+        self.descartar_transformacoes()
+
+    @property
+    def original_matrix(self):
+        return self._original
+
+    @original_matrix.setter
+    def original_matrix(self, matriz):
+        self._original = None if matriz is None else somente_leitura(matriz)
+
+    @property
+    def edited_matrix(self):
+        return self._editado
+
+    @edited_matrix.setter
+    def edited_matrix(self, matriz):
+        self._editado = None if matriz is None else somente_leitura(matriz)
 
     def load_image(self):
         self.image_path = self.image_path
-        image = Image.open(self.image_path)
-        self.original_matrix = np.array(image)
-        self.edited_matrix = np.copy(self.original_matrix)  
-        self.image_mode = image.mode
+        mapeada = abrir_mapeada(self.image_path)
+        self.mapeada = mapeada is not None
+        if self.mapeada:
+            # Imagens muito grandes (.npy, TIFF sem compressão) não são decodificadas:
+            # os pixels são lidos do arquivo sob demanda
+            self.original_matrix, self.image_mode = mapeada
+        else:
+            image = Image.open(self.image_path)
+            self.original_matrix = np.array(image)
+            self.image_mode = image.mode
+        # Original e editada compartilham a memória até a primeira edição
+        self.edited_matrix = self.original_matrix
+        self.cache_espectro.limpar()
+        self.historico.limpar()
+        self._regiao_previa = None
+        self.versao += 1
+        self.etapas = ()
+        self.descartar_transformacoes()
         return self.original_matrix
 
     def save_image(self, output_path, use_original=False):
-        matrix_to_save = self.original_matrix if use_original else self.edited_matrix
+        matrix_to_save = self.original_matrix if use_original else self.get_edited_matrix()
         if matrix_to_save is None:
             raise ValueError("Nenhuma imagem foi carregada ainda")
+        if self.mapeada:
+            salvar_em_blocos(matrix_to_save, output_path, self.image_mode)
+            return
             
         image = Image.fromarray(matrix_to_save, self.image_mode)
         image.save(output_path)
 
     def reset_to_original(self):
         if self.original_matrix is not None:
-            self.edited_matrix = np.copy(self.original_matrix)
+            # Entra no histórico como qualquer outra edição, então pode ser desfeito
+            self.materializar()
+            self._substituir(self.original_matrix, etapas=())
+        self.descartar_transformacoes()
+
+    def desfazer(self):
+        """Volta ao estado anterior da edited_matrix; retorna False se não houver."""
+        atual = self.get_edited_matrix()
+        anterior = self.historico.desfazer(atual, self.etapas)
+        if anterior is None:
+            return False
+        self.edited_matrix = anterior
+        self.etapas = self.historico.ultimas_etapas
+        self._marcar_previa()
+        return True
+
+    def refazer(self):
+        atual = self.get_edited_matrix()
+        seguinte = self.historico.refazer(atual, self.etapas)
+        if seguinte is None:
+            return False
+        self.edited_matrix = seguinte
+        self.etapas = self.historico.ultimas_etapas
+        self._marcar_previa()
+        return True
+
+    def _substituir(self, nova, etapas=None):
+        # Toda troca da edited_matrix passa por aqui para entrar no histórico;
+        # `etapas` é o novo pipeline (None: o mesmo, para operações não gravadas)
+        anterior = self.edited_matrix
+        self.edited_matrix = nova
+        self.historico.registrar(anterior, self.edited_matrix, etapas=self.etapas)
+        if etapas is not None:
+            self.etapas = tuple(etapas)
+        self._marcar_previa()
+
+    def _marcar_previa(self):
+        # Acumula a região que o histórico acabou de comparar, para a pirâmide da prévia
+        regiao = self.historico.ultima_regiao
+        if regiao != REGIAO_VAZIA:
+            self._regiao_previa = unir_regioes(self._regiao_previa, regiao)
+            self.versao += 1
 
     def get_original_matrix(self):
         return self.original_matrix
 
     def get_edited_matrix(self):
+        self.materializar()
         return self.edited_matrix
 
-    def set_edited_matrix(self, new_matrix):
-        self.edited_matrix = new_matrix
-    
+    def get_display_matrix(self, use_original=False, tamanho_max=TAMANHO_PREVIA):
+        """Matriz reduzida para exibição, com lado maior entre tamanho_max e 2 * tamanho_max.
+
+        Sai de uma pirâmide mip que só é recalculada na região alterada desde
+        a última prévia; com a imagem mapeada, de uma amostra das linhas. As
+        transformações pendentes são aplicadas só à prévia, sem materializar
+        a edited_matrix.
+        """
+        matriz = self.original_matrix if use_original else self.edited_matrix
+        if matriz is None:
+            return None
+        if self.mapeada:
+            previa = miniatura(matriz, tamanho_max)
+        elif use_original:
+            if self.piramide_original.origem is not matriz:
+                self.piramide_original.atualizar(matriz)
+            return self.piramide_original.nivel(tamanho_max)
+        else:
+            self.piramide.atualizar(matriz, self._regiao_previa)
+            self._regiao_previa = REGIAO_VAZIA
+            previa = self.piramide.nivel(tamanho_max)
+        if use_original or not self.transformacoes_pendentes:
+            return previa
+        return self._transformar_previa(previa, matriz.shape[:2])
+
+    def _transformar_previa(self, previa, formato_origem):
+        # A afim pendente levada para as coordenadas reduzidas (centros de pixel):
+        # reamostra só os pixels exibidos, na resolução da prévia da imagem atual
+        # (sem passar do lado maior dela, no caso de ampliações)
+        altura, largura = self.formato_pendente
+        escala_y = previa.shape[0] / formato_origem[0]
+        escala_x = previa.shape[1] / formato_origem[1]
+        fator = min(escala_x, max(previa.shape[:2]) / max(altura, largura))
+        formato = (max(1, round(altura * fator)), max(1, round(largura * fator)))
+        para_previa = np.array([[escala_x, 0, 0.5 * escala_x - 0.5],
+                                [0, escala_y, 0.5 * escala_y - 0.5],
+                                [0, 0, 1]])
+        da_saida = np.array([[1 / fator, 0, 0.5 / fator - 0.5],
+                             [0, 1 / fator, 0.5 / fator - 0.5],
+                             [0, 0, 1]])
+        inversa = para_previa @ np.linalg.inv(self.afim_pendente) @ da_saida
+        return reamostrar_afim(previa, inversa, formato, self.interpolacao_pendente)
+
+    def processar(self, operacao, raio=0, etapas=()):
+        """Aplica `operacao` à edited_matrix e guarda o resultado."""
+        matriz = self.get_edited_matrix()
+        if matriz is None:
+            return None
+        resultado = self.calcular(matriz, operacao, raio)
+        self.set_edited_matrix(resultado, etapas)
+        return resultado
+
+    def calcular(self, matriz, operacao, raio=0):
+        """Resultado de `operacao` sobre `matriz`, sem alterar o estado do gerenciador.
+
+        Pode rodar numa thread de trabalho. Com a imagem mapeada, a operação
+        roda bloco a bloco (com `raio` linhas de vizinhança) e o resultado vai
+        para um arquivo temporário mapeado.
+
+        Args:
+            matriz: normalmente a edited_matrix obtida antes, na thread da interface
+            operacao: função matriz -> matriz que mantém altura e largura
+            raio: alcance vertical da vizinhança que a operação usa; None para
+                operações globais (FFT, afinamento...), que precisam da imagem inteira
+        """
+        if self.mapeada and raio is not None:
+            return processar_em_blocos(matriz, operacao, raio)
+        return operacao(matriz)
+
+    def get_formato(self):
+        # (altura, largura) da imagem editada, contando as transformações pendentes
+        if self.formato_pendente is not None:
+            return self.formato_pendente
+        if self.edited_matrix is None:
+            return None
+        return self.edited_matrix.shape[:2]
+
+    def transformar(self, matriz, formato, operacao, interpolacao="bilinear", etapa=None):
+        """Acumula uma transformação geométrica sem reamostrar a imagem.
+
+        As matrizes 3x3 (em coordenadas x, y, 1) são compostas numa única
+        transformação afim pendente; a imagem só é reamostrada, uma vez, quando
+        alguém pede os pixels (get_edited_matrix, salvar, outros filtros). A
+        prévia (get_display_matrix) aplica a afim só aos pixels exibidos.
+
+        Args:
+            matriz: matriz 3x3 da transformação sobre a imagem atual
+            formato: (altura, largura) da imagem depois da transformação
+            operacao: função que aplica só esta transformação a uma matriz;
+                usada quando ela é a única pendente, para manter o resultado exato
+            interpolacao: interpolação que a transformação pede
+            etapa: (nome, parâmetros) da transformação, para o pipeline gravado
+        """
+        self.transformacoes_pendentes.append(operacao)
+        if etapa is not None:
+            self.etapas_pendentes.append(etapa)
+        self.afim_pendente = np.asarray(matriz, dtype=np.float64) @ self.afim_pendente
+        self.formato_pendente = tuple(formato)
+        self.interpolacao_pendente = max(self.interpolacao_pendente, interpolacao,
+                                         key=INTERPOLACOES.index)
+        self.versao += 1
+
+    def materializar(self):
+        if not self.transformacoes_pendentes:
+            return
+        pendentes = self.transformacoes_pendentes
+        afim, formato = self.afim_pendente, self.formato_pendente
+        interpolacao = self.interpolacao_pendente
+        etapas = self.etapas + self._etapas_pendentes()
+        self.descartar_transformacoes()
+
+        if formato == self.edited_matrix.shape[:2] and np.allclose(afim, np.eye(3)):
+            # A cadeia se cancelou (ex.: dois espelhamentos iguais)
+            self.etapas = etapas
+            return
+        if self.mapeada:
+            # Saída direto em um arquivo temporário, sem alocar a imagem inteira
+            saida = criar_temporaria(tuple(formato) + self.edited_matrix.shape[2:],
+                                     self.edited_matrix.dtype)
+            self._substituir(reamostrar_afim(self.edited_matrix, np.linalg.inv(afim),
+                                             formato, interpolacao, saida=saida), etapas)
+        elif len(pendentes) == 1:
+            self._substituir(pendentes[0](self.edited_matrix), etapas)
+        else:
+            self._substituir(reamostrar_afim(self.edited_matrix, np.linalg.inv(afim),
+                                             formato, interpolacao), etapas)
+
+    def descartar_transformacoes(self):
+        self.transformacoes_pendentes = []
+        self.etapas_pendentes = []
+        self.afim_pendente = np.eye(3)
+        self.formato_pendente = None
+        self.interpolacao_pendente = INTERPOLACOES[0]
+
+    def get_gradientes(self, matriz=None):
+        # Gradientes da edited_matrix atual (ou de `matriz`, numa thread de trabalho),
+        # compartilhados entre os filtros de borda, a limiarização e o detector do
+        # dominó (não usados com a imagem mapeada)
+        if self.mapeada:
+            return None
+        if matriz is None:
+            matriz = self.get_edited_matrix()
+            if matriz is None:
+                return None
+        self.gradientes = obter_gradientes(matriz, self.gradientes)
+        return self.gradientes
+
+    def set_edited_matrix(self, new_matrix, etapas=()):
+        """Troca a edited_matrix pelo resultado das operações `etapas`.
+
+        `etapas` (lista de (nome, parâmetros), ver backend.operacoes) entra no
+        pipeline gravado; resultados de operações fora do registro não são gravados.
+        """
+        self.descartar_transformacoes()
+        self._substituir(new_matrix, self.etapas + tuple(etapas))
+
+    def _etapas_pendentes(self):
+        # Várias transformações pendentes são reamostradas de uma vez; no pipeline
+        # viram uma etapa 'transformacoes', que a reprodução aplica do mesmo jeito
+        if len(self.etapas_pendentes) > 1:
+            return (('transformacoes', {'etapas': [list(etapa) for etapa in self.etapas_pendentes]}),)
+        return tuple(self.etapas_pendentes)
+
+    def get_pipeline(self):
+        """Etapas aplicadas desde a imagem original, incluindo as transformações pendentes."""
+        return list(self.etapas) + list(self._etapas_pendentes())
+
+    def reproduzir_pipeline(self, imagens, etapas=None):
+        """Aplica o pipeline gravado (ou `etapas`), otimizado, a outras imagens.
+
+        Args:
+            imagens: matriz ou lista de matrizes
+            etapas: pipeline a reproduzir (padrão: o da imagem atual)
+
+        Returns:
+            matriz ou lista de matrizes resultantes
+        """
+        etapas = self.get_pipeline() if etapas is None else etapas
+        if isinstance(imagens, np.ndarray):
+            return reproduzir(etapas, imagens)
+        return [reproduzir(etapas, imagem) for imagem in imagens]
+
     def set_image_path(self, path):
         self.image_path = path
     
@@ -47,4 +325,5 @@ class ImageManager:
         return self.image_path
         
     def set_root(self, root):
-        self.root = root
\ No newline at end of file
+        self.root = root
+
@@ -0,0 +1,199 @@
+import os
+import struct
+import tempfile
+
+import numpy as np
+from PIL import Image
+
+from backend.tarefas import concluir_parte, dividir_tarefa, executar_como, publicar_parcial
+
+# Acima deste número de pixels TIFFs sem compressão são mapeados em vez de decodificados
+LIMITE_PIXELS_MEMORIA = 100_000_000
+# Tamanho aproximado de cada bloco de linhas lido/escrito de uma vez
+BYTES_POR_BLOCO = 64 * 1024 * 1024
+
+MODOS_POR_CANAIS = {1: 'L', 3: 'RGB', 4: 'RGBA'}
+CANAIS_POR_MODO = {'L': 1, 'RGB': 3, 'RGBA': 4}
+
+
+def modo_da_matriz(matriz):
+    canais = 1 if matriz.ndim == 2 else matriz.shape[2]
+    return MODOS_POR_CANAIS.get(canais)
+
+
+def _tiff_contiguo(imagem):
+    """Offset dos pixels de um TIFF 8 bits sem compressão em faixa única, ou None."""
+    tags = imagem.tag_v2
+    if imagem.mode not in CANAIS_POR_MODO or tags.get(259, 1) != 1:
+        return None
+    if tags.get(284, 1) != 1 or 322 in tags:  # planos separados ou tiles
+        return None
+    if any(bits != 8 for bits in np.atleast_1d(tags.get(258, 8))):
+        return None
+
+    offsets = list(tags.get(273, ()))
+    tamanhos = list(tags.get(279, ()))
+    if not offsets or len(offsets) != len(tamanhos):
+        return None
+    for i in range(1, len(offsets)):
+        if offsets[i] != offsets[i - 1] + tamanhos[i - 1]:
+            return None
+    largura, altura = imagem.size
+    if sum(tamanhos) != altura * largura * CANAIS_POR_MODO[imagem.mode]:
+        return None
+    return offsets[0]
+
+
+def abrir_mapeada(caminho, forcar=False):
+    """Abre a imagem como np.memmap somente leitura, sem decodificar os pixels.
+
+    Aceita arquivos .npy e TIFF 8 bits sem compressão (L, RGB ou RGBA) com os
+    pixels contíguos. TIFFs só são mapeados acima de LIMITE_PIXELS_MEMORIA,
+    a menos que `forcar` seja True.
+
+    Returns:
+        tupla (matriz mapeada, modo PIL) ou None se o arquivo não puder ser mapeado
+    """
+    extensao = os.path.splitext(caminho)[1].lower()
+    if extensao == '.npy':
+        matriz = np.load(caminho, mmap_mode='r')
+        modo = modo_da_matriz(matriz)
+        return (matriz, modo) if modo and matriz.dtype == np.uint8 else None
+
+    if extensao not in ('.tif', '.tiff'):
+        return None
+
+    # Só os cabeçalhos são lidos; o limite anti "decompression bomb" não se aplica
+    limite = Image.MAX_IMAGE_PIXELS
+    Image.MAX_IMAGE_PIXELS = None
+    try:
+        with Image.open(caminho) as imagem:
+            largura, altura = imagem.size
+            if not forcar and largura * altura <= LIMITE_PIXELS_MEMORIA:
+                return None
+            offset = _tiff_contiguo(imagem)
+            modo = imagem.mode
+    finally:
+        Image.MAX_IMAGE_PIXELS = limite
+
+    if offset is None:
+        return None
+    canais = CANAIS_POR_MODO[modo]
+    formato = (altura, largura) if canais == 1 else (altura, largura, canais)
+    return np.memmap(caminho, dtype=np.uint8, mode='r', offset=offset, shape=formato), modo
+
+
+def criar_temporaria(formato, dtype=np.uint8):
+    """Matriz gravável em um arquivo temporário mapeado (apagado ao ser liberada)."""
+    arquivo = tempfile.TemporaryFile(prefix='image-stream-')
+    return np.memmap(arquivo, dtype=dtype, mode='w+', shape=tuple(formato))
+
+
+def linhas_por_bloco(matriz, raio=0):
+    bytes_linha = max(1, matriz.nbytes // max(1, matriz.shape[0]))
+    return max(1, BYTES_POR_BLOCO // bytes_linha, 2 * raio + 1)
+
+
+def processar_em_blocos(imagem, operacao, raio=0, saida=None):
+    """Aplica uma operação de vizinhança bloco a bloco, para imagens que não cabem na memória.
+
+    Cada bloco de linhas é lido com `raio` linhas de halo, processado (a
+    operação pode paralelizar por dentro) e escrito na saída, por padrão uma
+    matriz temporária mapeada em disco. A operação deve manter altura e largura.
+    """
+    altura = imagem.shape[0]
+    passo = linhas_por_bloco(imagem, raio)
+    inicios = range(0, altura, passo)
+    for inicio, parte in zip(inicios, dividir_tarefa(len(inicios))):
+        fim = min(altura, inicio + passo)
+        fim_halo = min(altura, fim + raio)
+        # O último bloco pode ser curto: estende para cima, para a operação
+        # sempre ver pelo menos a altura do seu kernel
+        inicio_halo = max(0, min(inicio - raio, fim_halo - (2 * raio + 1)))
+        resultado = np.asarray(executar_como(parte, operacao, np.asarray(imagem[inicio_halo:fim_halo])))
+        if saida is None:
+            saida = criar_temporaria((altura,) + resultado.shape[1:], resultado.dtype)
+        if inicio == 0:
+            parcial = publicar_parcial(saida)
+        saida[inicio:fim] = resultado[inicio - inicio_halo:fim - inicio_halo]
+        if parcial is not None:
+            parcial.marcar(inicio, fim)
+        concluir_parte(parte)
+    if isinstance(saida, np.memmap):
+        saida.flush()
+    return saida
+
+
+def miniatura(matriz, tamanho_max=500):
+    """Amostra da matriz com lado máximo ~tamanho_max, lendo só as linhas usadas."""
+    passo = max(1, -(-max(matriz.shape[:2]) // tamanho_max))
+    return np.ascontiguousarray(matriz[::passo, ::passo])
+
+
+def _escrever_tiff(matriz, caminho):
+    # TIFF baseline sem compressão, em faixa única, escrito bloco a bloco
+    altura, largura = matriz.shape[:2]
+    canais = 1 if matriz.ndim == 2 else matriz.shape[2]
+    tamanho = altura * largura * canais
+    if tamanho >= 2**32 - 4096:
+        raise ValueError("Imagem grande demais para TIFF clássico; salve como .npy")
+
+    entradas = [
+        (256, 4, 1, largura),                          # ImageWidth
+        (257, 4, 1, altura),                           # ImageLength
+        (258, 3, 1, 8),                                # BitsPerSample (ver abaixo)
+        (259, 3, 1, 1),                                # Compression: nenhuma
+        (262, 3, 1, 1 if canais == 1 else 2),          # Photometric
+        (273, 4, 1, 0),                                # StripOffsets (preenchido abaixo)
+        (277, 3, 1, canais),                           # SamplesPerPixel
+        (278, 4, 1, altura),                           # RowsPerStrip
+        (279, 4, 1, tamanho),                          # StripByteCounts
+        (284, 3, 1, 1),                                # PlanarConfiguration
+    ]
+    if canais == 4:
+        entradas.append((338, 3, 1, 2))                # ExtraSamples: alfa
+    extra = b''
+    inicio_ifd = 8
+    fim_ifd = inicio_ifd + 2 + 12 * len(entradas) + 4
+    if canais > 1:
+        # Com mais de um valor, BitsPerSample aponta para uma lista fora da IFD
+        entradas[2] = (258, 3, canais, fim_ifd)
+        extra = struct.pack(f'<{canais}H', *([8] * canais))
+    offset_pixels = fim_ifd + len(extra)
+    entradas[5] = (273, 4, 1, offset_pixels)
+
+    with open(caminho, 'wb') as arquivo:
+        arquivo.write(b'II*\x00' + struct.pack('<I', inicio_ifd))
+        arquivo.write(struct.pack('<H', len(entradas)))
+        for tag, tipo, quantidade, valor in entradas:
+            if tipo == 3 and quantidade == 1:
+                arquivo.write(struct.pack('<HHIHH', tag, tipo, quantidade, valor, 0))
+            else:
+                arquivo.write(struct.pack('<HHII', tag, tipo, quantidade, valor))
+        arquivo.write(struct.pack('<I', 0))
+        arquivo.write(extra)
+
+        passo = linhas_por_bloco(matriz)
+        for inicio in range(0, altura, passo):
+            arquivo.write(np.ascontiguousarray(matriz[inicio:inicio + passo]).tobytes())
+
+
+def salvar_em_blocos(matriz, caminho, modo=None):
+    """Salva uma matriz (possivelmente mapeada) sem carregá-la inteira na memória.
+
+    .npy e .tif/.tiff são escritos bloco a bloco; outros formatos passam pelo
+    PIL, que precisa da imagem inteira.
+    """
+    extensao = os.path.splitext(caminho)[1].lower()
+    if extensao == '.npy':
+        destino = np.lib.format.open_memmap(caminho, mode='w+', dtype=matriz.dtype,
+                                            shape=matriz.shape)
+        passo = linhas_por_bloco(matriz)
+        for inicio in range(0, matriz.shape[0], passo):
+            destino[inicio:inicio + passo] = matriz[inicio:inicio + passo]
+        destino.flush()
+        del destino
+    elif extensao in ('.tif', '.tiff') and matriz.dtype == np.uint8 and modo_da_matriz(matriz):
+        _escrever_tiff(matriz, caminho)
+    else:
+        Image.fromarray(np.asarray(matriz), modo).save(caminho)
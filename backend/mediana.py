@@ -0,0 +1,88 @@
+import numpy as np
+from backend.tarefas import verificar_cancelamento
+
+# Histograma em dois níveis: 16 faixas grossas (4 bits altos) de 16 valores finos
+NUM_FAIXAS = 16
+
+
+def mediana_histograma(imagem, tamanho_kernel=3):
+    """Filtro de mediana para imagens uint8 com histogramas por coluna.
+
+    Segue a ideia de Huang / Perreault-Hébert: cada coluna mantém o histograma
+    da sua janela vertical, atualizado com uma remoção e uma inserção por linha.
+    O histograma do kernel é obtido por somas acumuladas ao longo das colunas,
+    primeiro nas 16 faixas grossas e depois só nos 16 valores da faixa onde
+    está a mediana. O custo por pixel não depende do tamanho do kernel.
+
+    Todas as colunas e todos os canais (cinza, RGB ou RGBA) de uma linha são
+    processados juntos. O padding é 'reflect', como no filtro original.
+
+    Args:
+        imagem: matriz uint8 (H, W) ou (H, W, C)
+        tamanho_kernel: lado do kernel (ímpar)
+
+    Returns:
+        matriz uint8 com o mesmo formato da entrada
+    """
+    if tamanho_kernel % 2 == 0:
+        tamanho_kernel += 1
+    k = tamanho_kernel
+    pad = k // 2
+    altura, largura = imagem.shape[:2]
+
+    canais = imagem.reshape(altura, largura, -1)
+    padded = np.pad(canais, ((pad, pad), (pad, pad), (0, 0)), mode='reflect')
+    padded = np.ascontiguousarray(padded.transpose(2, 0, 1))
+    num_canais, _, largura_pad = padded.shape
+
+    # hist_grosso[c, coluna, faixa] e hist_fino[faixa, c, coluna, valor]
+    hist_grosso = np.zeros((num_canais, largura_pad, NUM_FAIXAS), dtype=np.int32)
+    hist_fino = np.zeros((NUM_FAIXAS, num_canais, largura_pad, 16), dtype=np.int32)
+    idx_canal = np.arange(num_canais)[:, None]
+    idx_coluna = np.arange(largura_pad)[None, :]
+
+    def atualizar(linha, delta):
+        faixa = linha >> 4
+        hist_grosso[idx_canal, idx_coluna, faixa] += delta
+        hist_fino[faixa, idx_canal, idx_coluna, linha & 15] += delta
+
+    for r in range(k):
+        atualizar(padded[:, r], 1)
+
+    posicao = k * k // 2
+    resultado = np.empty((num_canais, altura, largura), dtype=np.uint8)
+    acum_grosso = np.zeros((num_canais, largura_pad + 1, NUM_FAIXAS), dtype=np.int32)
+    acum_fino = np.zeros((num_canais, largura_pad + 1, 16), dtype=np.int32)
+
+    for i in range(altura):
+        verificar_cancelamento(i / altura)
+        if i > 0:
+            atualizar(padded[:, i - 1], -1)
+            atualizar(padded[:, i + k - 1], 1)
+
+        # Faixa grossa da mediana e quantos valores ficam abaixo dela
+        np.cumsum(hist_grosso, axis=1, out=acum_grosso[:, 1:])
+        janela = acum_grosso[:, k:] - acum_grosso[:, :-k]
+        acumulado = np.cumsum(janela, axis=2)
+        faixa = (acumulado <= posicao).sum(axis=2)
+        abaixo = (np.take_along_axis(acumulado, faixa[..., None], 2)[..., 0]
+                  - np.take_along_axis(janela, faixa[..., None], 2)[..., 0])
+
+        # Valor fino dentro da faixa, uma faixa distinta por vez
+        linha = resultado[:, i]
+        contagem = np.bincount(faixa.ravel(), minlength=NUM_FAIXAS)
+        for f in np.flatnonzero(contagem):
+            np.cumsum(hist_fino[f], axis=1, out=acum_fino[:, 1:])
+            if contagem[f] == faixa.size:
+                janela_fina = acum_fino[:, k:] - acum_fino[:, :-k]
+                np.cumsum(janela_fina, axis=2, out=janela_fina)
+                janela_fina += abaixo[..., None]
+                linha[...] = 16 * f + (janela_fina <= posicao).sum(axis=2)
+            else:
+                mascara = faixa == f
+                janela_fina = acum_fino[:, k:][mascara] - acum_fino[:, :-k][mascara]
+                janela_fina = np.cumsum(janela_fina, axis=1)
+                janela_fina += abaixo[mascara][:, None]
+                linha[mascara] = 16 * f + (janela_fina <= posicao).sum(axis=1)
+
+    return resultado.transpose(1, 2, 0).reshape(imagem.shape)
@@ -1,4 +1,12 @@
+from functools import lru_cache
+
 import numpy as np
+from backend.cache import memorizar
+from backend.paralelo import executar_em_faixas
+from backend.tarefas import verificar_cancelamento
+from backend.morfologia_binaria import (
+    ImagemBinaria, erosao_binaria, dilatacao_binaria, diferenca_binaria
+)
 
 def criar_elemento_estruturante(forma='quadrado', tamanho=3):
 
@@ -13,67 +21,404 @@ def criar_elemento_estruturante(forma='quadrado', tamanho=3):
         elemento[centro, :] = 1
         elemento[:, centro] = 1
         return elemento
+    elif forma == 'disco':
+        raio = tamanho // 2
+        y, x = np.ogrid[-raio:raio+1, -raio:raio+1]
+        return (x**2 + y**2 <= raio**2 + raio).astype(np.uint8)
+    elif forma == 'linha_horizontal':
+        return np.ones((1, tamanho), dtype=np.uint8)
+    elif forma == 'linha_vertical':
+        return np.ones((tamanho, 1), dtype=np.uint8)
     else:
-        raise ValueError("Forma deve ser 'quadrado' ou 'cruz'")
+        raise ValueError("Forma deve ser 'quadrado', 'cruz', 'disco', 'linha_horizontal' ou 'linha_vertical'")
 
-def erosao(imagem, elemento_estruturante):
-  
-    if len(imagem.shape) == 3:
-        resultado = np.zeros_like(imagem)
-        for canal in range(3):
-            resultado[:,:,canal] = erosao(imagem[:,:,canal], elemento_estruturante)
-        return resultado
+# Custo estimado (em passes sobre a imagem) de uma janela 1D van Herk/Gil-Werman
+CUSTO_SEGMENTO = 6
+
+def _minmax_valido(imagem, tamanho, eixo, operacao):
+    """Mínimo/máximo em janela deslizante (van Herk/Gil-Werman), modo 'valid'.
+
+    O eixo é dividido em blocos do tamanho da janela; em cada bloco calculam-se
+    o acumulado da esquerda para a direita (g) e da direita para a esquerda (h).
+    A janela que começa em i é operacao(h[i], g[i+tamanho-1]), o que custa cerca
+    de três comparações por pixel, qualquer que seja o tamanho. Retorna
+    n - tamanho + 1 posições ao longo do eixo.
+    """
+    if tamanho == 1:
+        return imagem
+    
+    imagem = np.moveaxis(imagem, eixo, 0)
+    n = imagem.shape[0]
+    m = n - tamanho + 1
+    num_blocos = -(-n // tamanho)
+    # O complemento do último bloco nunca entra numa janela válida
+    largura_pad = [(0, num_blocos * tamanho - n)] + [(0, 0)] * (imagem.ndim - 1)
+    padded = np.pad(imagem, largura_pad, mode='edge')
+    blocos = padded.reshape((num_blocos, tamanho) + padded.shape[1:])
+    
+    g = operacao.accumulate(blocos, axis=1).reshape(padded.shape)
+    h = operacao.accumulate(blocos[:, ::-1], axis=1)[:, ::-1].reshape(padded.shape)
+    
+    resultado = operacao(h[:m], g[tamanho-1:tamanho-1+m])
+    return np.moveaxis(resultado, 0, eixo)
+
+def _preencher_padded(imagem, pad_h, pad_w, buffer=None):
+    """Copia a imagem para o centro de um buffer com padding 'edge'.
+    
+    Reaproveita `buffer` se ele tiver o formato e o tipo certos, para que
+    passes sucessivos sobre imagens do mesmo tamanho não aloquem de novo.
+    """
+    altura, largura = imagem.shape[:2]
+    formato = (altura + 2 * pad_h, largura + 2 * pad_w) + imagem.shape[2:]
+    if buffer is None or buffer.shape != formato or buffer.dtype != imagem.dtype:
+        buffer = np.empty(formato, dtype=imagem.dtype)
+    
+    buffer[pad_h:pad_h+altura, pad_w:pad_w+largura] = imagem
+    if pad_w:
+        buffer[pad_h:pad_h+altura, :pad_w] = imagem[:, :1]
+        buffer[pad_h:pad_h+altura, pad_w+largura:] = imagem[:, -1:]
+    if pad_h:
+        buffer[:pad_h] = buffer[pad_h:pad_h+1]
+        buffer[pad_h+altura:] = buffer[pad_h+altura-1:pad_h+altura]
+    return buffer
+
+def _reduzir_padded(padded, forma, plano, operacao, saida):
+    """Erosão/dilatação de um buffer já com padding, escrita em `saida`.
+    
+    `padded` tem pad_h linhas e pad_w colunas a mais de cada lado que `saida`
+    (que pode ser uma faixa de linhas da saída final). plano None indica
+    retângulo cheio, aplicado como duas janelas 1D.
+    """
+    altura, largura = saida.shape[:2]
+    ee_altura, ee_largura = forma
+    
+    if plano is None:
+        resultado = _minmax_valido(padded, ee_altura, 0, operacao)[:altura]
+        saida[...] = _minmax_valido(resultado, ee_largura, 1, operacao)[:, :largura]
+        return saida
     
-    altura, largura = imagem.shape
-    ee_altura, ee_largura = elemento_estruturante.shape
     pad_h = ee_altura // 2
     pad_w = ee_largura // 2
+    primeira = True
+    for (eixo, inicio, comprimento), perpendiculares in plano.items():
+        janela = _minmax_valido(padded, comprimento, eixo, operacao)
+        for deslocamento in perpendiculares:
+            if eixo == 1:
+                i, j = pad_h + deslocamento, pad_w + inicio
+            else:
+                i, j = pad_h + inicio, pad_w + deslocamento
+            vista = janela[i:i+altura, j:j+largura]
+            if primeira:
+                saida[...] = vista
+                primeira = False
+            else:
+                operacao(saida, vista, out=saida)
+    return saida
+
+def minmax_retangular(imagem, forma, operacao):
+    """Erosão (np.minimum) ou dilatação (np.maximum) com elemento retangular cheio.
     
-    imagem_pad = np.pad(imagem, ((pad_h, pad_h), (pad_w, pad_w)), mode='edge')
-    resultado = np.zeros_like(imagem)
+    O retângulo é separável: aplica a janela 1D nas colunas e depois nas linhas.
+    """
+    padded = _preencher_padded(imagem, forma[0] // 2, forma[1] // 2)
+    return _reduzir_padded(padded, forma, None, operacao, np.empty_like(imagem))
+
+def _segmentos(elemento, eixo):
+    """Trechos contínuos do elemento ao longo de um eixo.
     
-    for i in range(altura):
-        for j in range(largura):
-            regiao = imagem_pad[i:i+ee_altura, j:j+ee_largura]
-            resultado[i,j] = np.min(regiao[elemento_estruturante == 1])
-            
-    return resultado
+    Returns:
+        lista de (deslocamento_perpendicular, inicio, comprimento), com
+        deslocamentos relativos ao centro do elemento
+    """
+    if eixo == 0:
+        elemento = elemento.T
+    centro_linha = elemento.shape[0] // 2
+    centro_coluna = elemento.shape[1] // 2
+    
+    trechos = []
+    for i, linha in enumerate(elemento):
+        j = 0
+        while j < len(linha):
+            if linha[j]:
+                inicio = j
+                while j < len(linha) and linha[j]:
+                    j += 1
+                trechos.append((i - centro_linha, inicio - centro_coluna, j - inicio))
+            else:
+                j += 1
+    return trechos
 
-def dilatacao(imagem, elemento_estruturante):
-  
-    if len(imagem.shape) == 3:
-        resultado = np.zeros_like(imagem)
-        for canal in range(3):
-            resultado[:,:,canal] = dilatacao(imagem[:,:,canal], elemento_estruturante)
+def _agrupar(trechos, eixo):
+    # Trechos com o mesmo início e comprimento compartilham a mesma janela 1D
+    grupos = {}
+    for deslocamento, inicio, comprimento in trechos:
+        grupos.setdefault((eixo, inicio, comprimento), []).append(deslocamento)
+    return grupos
+
+def _custo(grupos):
+    custo = 0
+    for (_, _, comprimento), perpendiculares in grupos.items():
+        if comprimento > 1:
+            custo += CUSTO_SEGMENTO
+        custo += len(perpendiculares)
+    return custo
+
+@lru_cache(maxsize=64)
+def _plano(forma, dados):
+    """Escolhe como aplicar um elemento estruturante (calculado uma vez por elemento).
+    
+    O elemento é a união de trechos 1D; erosão/dilatação por uma união é o
+    mínimo/máximo das erosões/dilatações por cada parte. Compara o custo de
+    reduzir pixel a pixel pela lista de deslocamentos com o de decompor em trechos de
+    linhas, de colunas ou misto (linhas longas mais colunas para o resto, como
+    a cruz = linha horizontal + linha vertical). Cada trecho usa a janela
+    van Herk/Gil-Werman, então discos grandes custam O(diâmetro) por pixel, e
+    não O(área).
+    
+    Returns:
+        dicionário {(eixo, inicio, comprimento): [deslocamentos perpendiculares]}
+    """
+    elemento = np.frombuffer(dados, dtype=bool).reshape(forma)
+    
+    pixels = [(dy, dx, 1) for dy, dx in deslocamentos(elemento)]
+    candidatos = [_agrupar(pixels, 1),
+                  _agrupar(_segmentos(elemento, 1), 1),
+                  _agrupar(_segmentos(elemento, 0), 0)]
+    
+    horizontais = [t for t in _segmentos(elemento, 1) if t[2] > 1]
+    coberto = np.zeros_like(elemento)
+    centro_linha, centro_coluna = elemento.shape[0] // 2, elemento.shape[1] // 2
+    for dy, inicio, comprimento in horizontais:
+        coberto[dy + centro_linha, inicio + centro_coluna:inicio + centro_coluna + comprimento] = True
+    restante = elemento & ~coberto
+    # Colunas completas do elemento que contêm pixels ainda não cobertos
+    verticais = [t for t in _segmentos(elemento, 0)
+                 if restante[t[1] + centro_linha:t[1] + centro_linha + t[2], t[0] + centro_coluna].any()]
+    misto = _agrupar(horizontais, 1)
+    misto.update(_agrupar(verticais, 0))
+    candidatos.append(misto)
+    
+    return min(candidatos, key=_custo)
+
+def deslocamentos(elemento_estruturante):
+    """Lista (dy, dx) dos pixels ativos do elemento, relativos ao centro."""
+    centro_linha = elemento_estruturante.shape[0] // 2
+    centro_coluna = elemento_estruturante.shape[1] // 2
+    ys, xs = np.nonzero(elemento_estruturante)
+    return list(zip((ys - centro_linha).tolist(), (xs - centro_coluna).tolist()))
+
+def _plano_elemento(elemento_estruturante):
+    # None indica retângulo cheio, que dispensa a decomposição em trechos
+    elemento = np.asarray(elemento_estruturante).astype(bool)
+    if not elemento.any():
+        raise ValueError("Elemento estruturante vazio")
+    if elemento.all():
+        return None
+    return _plano(elemento.shape, elemento.tobytes())
+
+def aplicar_elemento(imagem, elemento_estruturante, operacao):
+    """Erosão (np.minimum) ou dilatação (np.maximum) com elemento arbitrário.
+    
+    A imagem recebe padding 'edge' uma única vez; o resultado é a redução com
+    operacao sobre visões deslocadas desse buffer (ou de janelas 1D calculadas
+    sobre ele), nunca sobre janelas por pixel. Todos os canais são
+    processados juntos.
+    """
+    forma = np.shape(elemento_estruturante)
+    plano = _plano_elemento(elemento_estruturante)
+    padded = _preencher_padded(imagem, forma[0] // 2, forma[1] // 2)
+    return _reduzir_padded(padded, forma, plano, operacao, np.empty_like(imagem))
+
+def _diferenca(a, b):
+    # a - b saturado em 0, sem passar por um tipo maior
+    return np.subtract(a, b, out=np.zeros_like(a), where=a > b)
+
+class PipelineMorfologico:
+    """Operações morfológicas de um elemento estruturante sobre uma imagem.
+    
+    O plano do elemento é calculado uma vez e o buffer com padding é
+    reaproveitado entre os passes. Erosão, dilatação, abertura e fechamento
+    ficam guardados, de modo que gradiente, top-hat e black-hat reutilizam o
+    que já foi calculado (a abertura parte da erosão, o gradiente usa a
+    erosão e a dilatação, etc.).
+    
+    Imagens binárias (ImagemBinaria ou matriz 0/valor com canais iguais) usam
+    o modo com bits empacotados; as demais são processadas em faixas de
+    linhas em paralelo, com todos os canais (RGB ou RGBA) de uma vez.
+    """
+    def __init__(self, elemento_estruturante, imagem=None):
+        self.forma = np.shape(elemento_estruturante)
+        self.plano = _plano_elemento(elemento_estruturante)
+        self.pad_h = self.forma[0] // 2
+        self.pad_w = self.forma[1] // 2
+        self._padded = None
+        self.imagem = None
+        if imagem is not None:
+            self.definir_imagem(imagem)
+    
+    def definir_imagem(self, imagem):
+        if imagem is self.imagem:
+            return self
+        self.imagem = imagem
+        self._resultados = {}
+        self._valor = None
+        
+        if isinstance(imagem, ImagemBinaria):
+            self._entrada, self._binaria = imagem, True
+        else:
+            convertida = ImagemBinaria.de_matriz(imagem)
+            if convertida is not None:
+                self._entrada, self._valor = convertida
+                self._binaria = True
+            else:
+                self._entrada, self._binaria = imagem, False
+        return self
+    
+    def _passe(self, entrada, operacao):
+        if self.forma == (1, 1):
+            return entrada
+        if self._binaria:
+            binaria = erosao_binaria if operacao is np.minimum else dilatacao_binaria
+            return binaria(entrada, self.forma, self.plano)
+        
+        # Faixas leem linhas do mesmo buffer com padding e escrevem na sua fatia
+        self._padded = _preencher_padded(entrada, self.pad_h, self.pad_w, self._padded)
+        padded = self._padded
+        saida = np.empty_like(entrada)
+        
+        def processar(inicio, fim):
+            _reduzir_padded(padded[inicio:fim + 2 * self.pad_h], self.forma, self.plano,
+                            operacao, saida[inicio:fim])
+        
+        executar_em_faixas(entrada.shape[0], processar, raio=self.pad_h)
+        return saida
+    
+    def _diferenca(self, a, b):
+        if self._binaria:
+            return diferenca_binaria(a, b)
+        return _diferenca(a, b)
+    
+    def _obter(self, nome):
+        if nome not in self._resultados:
+            self._resultados[nome] = self._calcular(nome)
+        return self._resultados[nome]
+    
+    def _calcular(self, nome):
+        if nome == 'erosao':
+            return self._passe(self._entrada, np.minimum)
+        if nome == 'dilatacao':
+            return self._passe(self._entrada, np.maximum)
+        if nome == 'abertura':
+            return self._passe(self._obter('erosao'), np.maximum)
+        if nome == 'fechamento':
+            return self._passe(self._obter('dilatacao'), np.minimum)
+        if nome == 'gradiente':
+            return self._diferenca(self._obter('dilatacao'), self._obter('erosao'))
+        if nome == 'top_hat':
+            return self._diferenca(self._entrada, self._obter('abertura'))
+        if nome == 'black_hat':
+            return self._diferenca(self._obter('fechamento'), self._entrada)
+        raise ValueError(f"Operação morfológica desconhecida: {nome}")
+    
+    def resultado(self, nome):
+        """Resultado de uma operação, no mesmo formato da imagem de entrada.
+        
+        Args:
+            nome: 'erosao', 'dilatacao', 'abertura', 'fechamento', 'gradiente',
+                'top_hat' ou 'black_hat'
+        """
+        if self.imagem is None:
+            raise ValueError("Nenhuma imagem definida")
+        resultado = self._obter(nome)
+        if self._binaria and self._valor is not None:
+            return resultado.para_matriz(self._valor, self.imagem.shape, self.imagem.dtype)
         return resultado
     
-    altura, largura = imagem.shape
-    ee_altura, ee_largura = elemento_estruturante.shape
-    pad_h = ee_altura // 2
-    pad_w = ee_largura // 2
+    def erosao(self):
+        return self.resultado('erosao')
     
-    imagem_pad = np.pad(imagem, ((pad_h, pad_h), (pad_w, pad_w)), mode='edge')
-    resultado = np.zeros_like(imagem)
+    def dilatacao(self):
+        return self.resultado('dilatacao')
     
-    # Aplicar dilatação
-    for i in range(altura):
-        for j in range(largura):
-            regiao = imagem_pad[i:i+ee_altura, j:j+ee_largura]
-            resultado[i,j] = np.max(regiao[elemento_estruturante == 1])
-            
-    return resultado
+    def abertura(self):
+        return self.resultado('abertura')
+    
+    def fechamento(self):
+        return self.resultado('fechamento')
+    
+    def gradiente(self):
+        return self.resultado('gradiente')
+    
+    def top_hat(self):
+        return self.resultado('top_hat')
+    
+    def black_hat(self):
+        return self.resultado('black_hat')
+
+@memorizar
+def erosao(imagem, elemento_estruturante):
+    return PipelineMorfologico(elemento_estruturante, imagem).erosao()
+
+@memorizar
+def dilatacao(imagem, elemento_estruturante):
+    return PipelineMorfologico(elemento_estruturante, imagem).dilatacao()
 
+@memorizar
 def abertura(imagem, elemento_estruturante):
-    
-    return dilatacao(erosao(imagem, elemento_estruturante), elemento_estruturante)
+    return PipelineMorfologico(elemento_estruturante, imagem).abertura()
 
+@memorizar
 def fechamento(imagem, elemento_estruturante):
+    return PipelineMorfologico(elemento_estruturante, imagem).fechamento()
+
+@memorizar
+def gradiente_morfologico(imagem, elemento_estruturante):
+    """Dilatação menos erosão: realça as bordas dos objetos."""
+    return PipelineMorfologico(elemento_estruturante, imagem).gradiente()
+
+@memorizar
+def top_hat(imagem, elemento_estruturante):
+    """Imagem menos a abertura: detalhes claros menores que o elemento."""
+    return PipelineMorfologico(elemento_estruturante, imagem).top_hat()
+
+@memorizar
+def black_hat(imagem, elemento_estruturante):
+    """Fechamento menos a imagem: detalhes escuros menores que o elemento."""
+    return PipelineMorfologico(elemento_estruturante, imagem).black_hat()
+
+def _tabelas_zhang_suen():
+    """Tabelas de remoção (256 entradas) das duas sub-iterações do Zhang-Suen.
     
-    return erosao(dilatacao(imagem, elemento_estruturante), elemento_estruturante)
+    O índice é o byte formado pelos 8 vizinhos, P2 no bit 0 até P9 no bit 7:
+    P9 P2 P3
+    P8 P1 P4
+    P7 P6 P5
+    """
+    tabela1 = np.zeros(256, dtype=bool)
+    tabela2 = np.zeros(256, dtype=bool)
+    for codigo in range(256):
+        P2, P3, P4, P5, P6, P7, P8, P9 = [(codigo >> k) & 1 for k in range(8)]
+        vizinhos = [P2, P3, P4, P5, P6, P7, P8, P9]
+        
+        B = sum(vizinhos)  # Número de vizinhos != 0
+        A = sum(1 for k in range(8) if vizinhos[k] == 0 and vizinhos[(k+1) % 8] == 1)  # Transições 0->1
+        
+        if 2 <= B <= 6 and A == 1:
+            tabela1[codigo] = P2 * P4 * P6 == 0 and P4 * P6 * P8 == 0
+            tabela2[codigo] = P2 * P4 * P8 == 0 and P2 * P6 * P8 == 0
+    return tabela1, tabela2
+
+TABELAS_ZHANG_SUEN = _tabelas_zhang_suen()
 
+@memorizar
 def afinamento(imagem, max_iteracoes=-1):
     """Aplica algoritmo de afinamento morfológico (Zhang-Suen simplificado).
     
+    Os 8 vizinhos de cada pixel são empacotados num byte e consultados nas
+    tabelas de remoção de cada sub-iteração. Depois da primeira passada, só são
+    reavaliados os pixels vizinhos de remoções feitas desde a última avaliação
+    daquela sub-iteração; os demais não podem mudar de decisão.
+    
     Args:
         imagem: matriz da imagem (pode ser colorida ou grayscale)
         max_iteracoes: número máximo de iterações (-1 para convergência completa)
@@ -91,93 +436,60 @@ def afinamento(imagem, max_iteracoes=-1):
     # Inverte porque normalmente texto/objeto é preto em fundo branco
     imagem_bin = (imagem_gray < 127).astype(np.uint8)
     
-    def get_vizinhos(img, i, j):
-        """Retorna os 8 vizinhos em ordem: P2, P3, P4, P5, P6, P7, P8, P9
-        P9 P2 P3
-        P8 P1 P4
-        P7 P6 P5
-        """
-        return [
-            img[i-1, j],   # P2 (Norte)
-            img[i-1, j+1], # P3 (Nordeste)
-            img[i, j+1],   # P4 (Leste)
-            img[i+1, j+1], # P5 (Sudeste)
-            img[i+1, j],   # P6 (Sul)
-            img[i+1, j-1], # P7 (Sudoeste)
-            img[i, j-1],   # P8 (Oeste)
-            img[i-1, j-1]  # P9 (Noroeste)
-        ]
-    
-    def contar_vizinhos(vizinhos):
-        """Conta quantos vizinhos são 1 (objeto)"""
-        return sum(vizinhos)
-    
-    def contar_transicoes(vizinhos):
-        """Conta transições de 0->1 nos vizinhos (circular)"""
-        vizinhos_circular = vizinhos + [vizinhos[0]]
-        transicoes = 0
-        for k in range(len(vizinhos)):
-            if vizinhos_circular[k] == 0 and vizinhos_circular[k+1] == 1:
-                transicoes += 1
-        return transicoes
-    
     resultado = imagem_bin.copy()
     altura, largura = resultado.shape
+    plano = resultado.ravel()
+    
+    # Deslocamentos lineares de P2, P3, P4, P5, P6, P7, P8, P9
+    vizinhos = np.array([-largura, -largura + 1, 1, largura + 1,
+                         largura, largura - 1, -1, -largura - 1])
+    vizinhanca = np.array([dy * largura + dx for dy in (-1, 0, 1) for dx in (-1, 0, 1)])
+    
+    # Apenas pixels internos são avaliados, como no algoritmo original
+    interno = np.zeros((altura, largura), dtype=bool)
+    interno[1:-1, 1:-1] = True
+    interno = interno.ravel()
+    
+    def codigos(indices):
+        codigo = np.zeros(len(indices), dtype=np.uint8)
+        for k, deslocamento in enumerate(vizinhos):
+            codigo |= plano[indices + deslocamento] << k
+        return codigo
+    
+    def candidatos(removidos):
+        # Pixels do objeto na vizinhança 3x3 de alguma remoção
+        if removidos is None:
+            return np.flatnonzero(interno & (plano == 1))
+        if len(removidos) == 0:
+            return removidos
+        indices = np.unique((removidos[:, None] + vizinhanca[None, :]).ravel())
+        indices = indices[(indices >= 0) & (indices < plano.size)]
+        return indices[interno[indices] & (plano[indices] == 1)]
+    
+    # Remoções ainda não vistas por cada sub-iteração (None = avaliar tudo)
+    pendentes = [None, None]
     iteracao = 0
     
     while True:
         if max_iteracoes != -1 and iteracao >= max_iteracoes:
             break
+        verificar_cancelamento(iteracao / max_iteracoes if max_iteracoes > 0 else None)
         
         mudou = False
         
-        # Sub-iteração 1
-        marcados1 = []
-        for i in range(1, altura-1):
-            for j in range(1, largura-1):
-                if resultado[i, j] == 1:  # Apenas pixels do objeto
-                    vizinhos = get_vizinhos(resultado, i, j)
-                    P2, P3, P4, P5, P6, P7, P8, P9 = vizinhos
-                    
-                    # Condições do algoritmo Zhang-Suen (sub-iteração 1)
-                    B = contar_vizinhos(vizinhos)  # Número de vizinhos != 0
-                    A = contar_transicoes(vizinhos)  # Número de transições 0->1
-                    
-                    # Condições para remover o pixel
-                    if (2 <= B <= 6 and 
-                        A == 1 and 
-                        P2 * P4 * P6 == 0 and 
-                        P4 * P6 * P8 == 0):
-                        marcados1.append((i, j))
-        
-        # Remove pixels marcados na sub-iteração 1
-        for i, j in marcados1:
-            resultado[i, j] = 0
-            mudou = True
-        
-        # Sub-iteração 2
-        marcados2 = []
-        for i in range(1, altura-1):
-            for j in range(1, largura-1):
-                if resultado[i, j] == 1:  # Apenas pixels do objeto
-                    vizinhos = get_vizinhos(resultado, i, j)
-                    P2, P3, P4, P5, P6, P7, P8, P9 = vizinhos
-                    
-                    # Condições do algoritmo Zhang-Suen (sub-iteração 2)
-                    B = contar_vizinhos(vizinhos)
-                    A = contar_transicoes(vizinhos)
-                    
-                    # Condições para remover o pixel (diferentes da sub-iteração 1)
-                    if (2 <= B <= 6 and 
-                        A == 1 and 
-                        P2 * P4 * P8 == 0 and 
-                        P2 * P6 * P8 == 0):
-                        marcados2.append((i, j))
-        
-        # Remove pixels marcados na sub-iteração 2
-        for i, j in marcados2:
-            resultado[i, j] = 0
-            mudou = True
+        for sub, tabela in enumerate(TABELAS_ZHANG_SUEN):
+            indices = candidatos(pendentes[sub])
+            marcados = indices[tabela[codigos(indices)]]
+            
+            # Remove os pixels marcados de uma vez, depois de avaliar todos
+            plano[marcados] = 0
+            if len(marcados):
+                mudou = True
+            
+            outra = 1 - sub
+            pendentes[sub] = marcados
+            if pendentes[outra] is not None:
+                pendentes[outra] = np.concatenate([pendentes[outra], marcados])
         
         # Para se não houve mudanças
         if not mudou:
@@ -193,4 +505,4 @@ def afinamento(imagem, max_iteracoes=-1):
         resultado_rgb = np.stack([resultado, resultado, resultado], axis=2)
         return resultado_rgb
     
-    return resultado
\ No newline at end of file
+    return resultado
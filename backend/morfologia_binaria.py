@@ -0,0 +1,291 @@
+import weakref
+from functools import lru_cache
+
+import numpy as np
+
+BITS = 64
+
+# id da matriz gerada por ImagemBinaria.para_matriz -> (referência fraca à
+# matriz, ImagemBinaria, valor). Numa sequência de operações binárias, a
+# próxima não precisa reconferir nem reempacotar a imagem que recebe
+_EMPACOTADAS = {}
+
+
+class ImagemBinaria:
+    """Imagem binária com 1 bit por pixel, em palavras de 64 bits ao longo das linhas.
+
+    Depois de uma limiarização a imagem tem só 0/255 repetido em três canais
+    uint8, 24 bits por bit de informação; aqui ela ocupa 24 vezes menos. As
+    operações trabalham direto nas palavras (padding, deslocamentos, recorte);
+    os bits depois da última coluna ficam sempre em 0.
+    """
+
+    def __init__(self, palavras, altura, largura):
+        self.palavras = palavras
+        self.altura = altura
+        self.largura = largura
+
+    @classmethod
+    def de_mascara(cls, mascara):
+        altura, largura = mascara.shape
+        return cls(_para_palavras(mascara), altura, largura)
+
+    @classmethod
+    def de_matriz(cls, imagem):
+        """Converte uma matriz 0/valor (com canais iguais) em ImagemBinaria.
+
+        Matrizes geradas por para_matriz (ou visões inteiras delas) devolvem
+        a ImagemBinaria de origem, sem percorrer os pixels.
+
+        Returns:
+            tupla (ImagemBinaria, valor) ou None se a imagem não for binária
+        """
+        empacotada = _empacotada(imagem)
+        if empacotada is not None:
+            return empacotada
+
+        cinza = imagem[:, :, 0] if imagem.ndim == 3 else imagem
+        if imagem.ndim == 3:
+            for canal in range(1, imagem.shape[2]):
+                if not np.array_equal(imagem[:, :, canal], cinza):
+                    return None
+
+        valor = cinza.max()
+        mascara = cinza == valor
+        # Binária se todo pixel diferente de 0 for igual ao máximo
+        if valor != 0 and np.count_nonzero(cinza) != np.count_nonzero(mascara):
+            return None
+        return cls.de_mascara(mascara), valor
+
+    @property
+    def nbytes(self):
+        return self.palavras.nbytes
+
+    def mascara(self):
+        return _de_palavras(self.palavras, self.largura).view(bool)
+
+    def para_matriz(self, valor, formato, dtype=np.uint8):
+        """Matriz com `valor` nos pixels ativos e 0 nos demais, somente leitura.
+
+        Cada byte empacotado vira seus 8 pixels (com todos os canais) por uma
+        tabela de 256 entradas, sem passar por uma máscara booleana.
+        """
+        dtype = np.dtype(dtype)
+        canais = formato[2] if len(formato) == 3 else 1
+        valor = np.asarray(valor).astype(dtype)
+        num_bytes = -(-self.largura // 8)
+        bytes_linha = self.palavras.astype('>u8').view(np.uint8)[:, :num_bytes]
+        pixels = np.take(_tabela_pixels(valor.item(), canais, dtype.str), bytes_linha, axis=0)
+        pixels = pixels.reshape(self.altura, num_bytes * 8, canais)[:, :self.largura]
+        resultado = np.ascontiguousarray(pixels).reshape(formato)
+        resultado.flags.writeable = False
+        dono = _dono(resultado)
+        dono.flags.writeable = False
+        _EMPACOTADAS[id(dono)] = (weakref.ref(dono, _esquecer(id(dono))), _geometria(resultado),
+                                  self, valor[()])
+        return resultado
+
+
+@lru_cache(maxsize=16)
+def _tabela_pixels(valor, canais, dtype):
+    # (256, 8 * canais): os pixels representados por cada byte empacotado
+    bits = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1)
+    tabela = bits.astype(dtype) * np.asarray(valor, dtype=dtype)
+    return np.repeat(tabela, canais, axis=1)
+
+
+def _esquecer(chave):
+    return lambda _: _EMPACOTADAS.pop(chave, None)
+
+
+def _dono(matriz):
+    # Matriz que é dona da memória (visões de visões apontam direto para ela)
+    while isinstance(matriz.base, np.ndarray):
+        matriz = matriz.base
+    return matriz
+
+
+def _geometria(matriz):
+    return matriz.shape, matriz.strides, matriz.ctypes.data
+
+
+def _empacotada(imagem):
+    """(ImagemBinaria, valor) de uma matriz gerada por para_matriz, ou None.
+
+    Aceita a própria matriz ou uma visão dela com o mesmo formato e passos
+    (como a visão somente leitura do cache de resultados); a memória gerada
+    não pode ser escrita, então o conteúdo continua o mesmo.
+    """
+    if not isinstance(imagem, np.ndarray):
+        return None
+    dono = _dono(imagem)
+    registro = _EMPACOTADAS.get(id(dono))
+    if registro is None or registro[0]() is not dono or registro[1] != _geometria(imagem):
+        return None
+    return registro[2:]
+
+
+def _para_palavras(mascara):
+    # bool (H, W) -> uint64 (H, N); o bit mais alto da palavra 0 é a coluna 0
+    bytes_linha = np.packbits(mascara, axis=1)
+    altura, num_bytes = bytes_linha.shape
+    num_palavras = -(-num_bytes // 8)
+    buffer = np.zeros((altura, num_palavras * 8), dtype=np.uint8)
+    buffer[:, :num_bytes] = bytes_linha
+    return buffer.view('>u8').astype(np.uint64)
+
+
+def _de_palavras(palavras, largura):
+    # uint64 (H, N) -> uint8 0/1 (H, largura)
+    bytes_linha = palavras.astype('>u8').view(np.uint8)
+    return np.unpackbits(bytes_linha, axis=1, count=largura)
+
+
+def _colunas(inicio, fim, num_palavras):
+    """Linha de palavras (1, N) com os bits das colunas [inicio, fim) ligados."""
+    linha = np.zeros((1, num_palavras * BITS), dtype=bool)
+    linha[:, inicio:fim] = True
+    return _para_palavras(linha)
+
+
+def _coluna_cheia(palavras, x):
+    # Palavra com todos os bits iguais ao da coluna x, para cada linha
+    bit = (palavras[:, x // BITS] >> np.uint64(BITS - 1 - x % BITS)) & np.uint64(1)
+    return np.where(bit, ~np.uint64(0), np.uint64(0))[:, None]
+
+
+def _deslocar_colunas(palavras, n):
+    """resultado[:, x] = palavras[:, x + n]; o que sai da linha vira 0."""
+    if n == 0:
+        return palavras
+    q, r = divmod(n, BITS)
+    altura, num_palavras = palavras.shape
+
+    # Cada palavra do resultado junta os bits de duas palavras vizinhas da origem
+    base = abs(q) + 1
+    estendido = np.zeros((altura, num_palavras + 2 * base), dtype=np.uint64)
+    estendido[:, base:base + num_palavras] = palavras
+    atual = estendido[:, base + q:base + q + num_palavras]
+    if r == 0:
+        return atual.copy()
+    seguinte = estendido[:, base + q + 1:base + q + 1 + num_palavras]
+    return (atual << np.uint64(r)) | (seguinte >> np.uint64(BITS - r))
+
+
+def _deslocar_linhas(palavras, n):
+    """resultado[y] = palavras[y + n]; o que sai da imagem vira 0."""
+    if n == 0:
+        return palavras
+    resultado = np.zeros_like(palavras)
+    if n > 0:
+        resultado[:-n] = palavras[n:]
+    else:
+        resultado[-n:] = palavras[:n]
+    return resultado
+
+
+def _deslocar(palavras, dy, dx):
+    return _deslocar_colunas(_deslocar_linhas(palavras, dy), dx)
+
+
+def _janela(palavras, comprimento, eixo, operacao):
+    """AND/OR de `comprimento` pixels seguidos ao longo do eixo, por dobramento.
+
+    Usa O(log comprimento) deslocamentos: janelas de 1, 2, 4, ... pixels e
+    uma última combinação (sobreposta) para completar o comprimento.
+    """
+    deslocar = _deslocar_colunas if eixo == 1 else _deslocar_linhas
+    acumulado = palavras
+    m = 1
+    while 2 * m <= comprimento:
+        acumulado = operacao(acumulado, deslocar(acumulado, m))
+        m *= 2
+    if m < comprimento:
+        acumulado = operacao(acumulado, deslocar(acumulado, comprimento - m))
+    return acumulado
+
+
+def _preencher(binaria, pad_h, pad_w):
+    """Palavras com padding 'edge' de pad_h linhas e pad_w colunas de cada lado.
+
+    As colunas são deslocadas pad_w bits para a direita e as bordas recebem
+    o bit da primeira/última coluna de cada linha; as linhas de borda são
+    repetidas. Tudo sobre as palavras, sem desempacotar.
+    """
+    largura = binaria.largura
+    largura_padded = largura + 2 * pad_w
+    num_palavras = -(-largura_padded // BITS)
+    palavras = np.zeros((binaria.altura, num_palavras), dtype=np.uint64)
+    palavras[:, :binaria.palavras.shape[1]] = binaria.palavras
+    if pad_w:
+        palavras = _deslocar_colunas(palavras, -pad_w)
+        palavras |= _coluna_cheia(binaria.palavras, 0) & _colunas(0, pad_w, num_palavras)
+        palavras |= (_coluna_cheia(binaria.palavras, largura - 1)
+                     & _colunas(pad_w + largura, largura_padded, num_palavras))
+    if pad_h:
+        palavras = np.pad(palavras, ((pad_h, pad_h), (0, 0)), mode='edge')
+    return palavras
+
+
+def _recortar(palavras, pad_h, pad_w, altura, largura):
+    # Inverso de _preencher: tira o padding e zera os bits depois da última coluna
+    palavras = _deslocar_colunas(palavras[pad_h:pad_h + altura], pad_w)
+    num_palavras = -(-largura // BITS)
+    return palavras[:, :num_palavras] & _colunas(0, largura, num_palavras)
+
+
+def _aplicar(binaria, forma, plano, operacao):
+    ee_altura, ee_largura = forma
+    pad_h = ee_altura // 2
+    pad_w = ee_largura // 2
+
+    # Padding 'edge' uma única vez, como na morfologia em tons de cinza
+    palavras = _preencher(binaria, pad_h, pad_w)
+
+    if plano is None:
+        # Retângulo cheio: janela horizontal seguida da vertical
+        janela = _janela(palavras, ee_largura, 1, operacao)
+        janela = _janela(janela, ee_altura, 0, operacao)
+        resultado = _deslocar(janela, -pad_h, -pad_w)
+    else:
+        resultado = None
+        for (eixo, inicio, comprimento), perpendiculares in plano.items():
+            janela = _janela(palavras, comprimento, eixo, operacao)
+            for deslocamento in perpendiculares:
+                if eixo == 1:
+                    vista = _deslocar(janela, deslocamento, inicio)
+                else:
+                    vista = _deslocar(janela, inicio, deslocamento)
+                resultado = vista if resultado is None else operacao(resultado, vista)
+
+    palavras = _recortar(resultado, pad_h, pad_w, binaria.altura, binaria.largura)
+    return ImagemBinaria(palavras, binaria.altura, binaria.largura)
+
+
+def erosao_binaria(binaria, forma, plano=None):
+    """Erosão binária (AND de deslocamentos) sobre palavras de 64 bits.
+
+    Args:
+        binaria: ImagemBinaria
+        forma: (altura, largura) do elemento estruturante
+        plano: decomposição do elemento em trechos 1D, {(eixo, inicio,
+            comprimento): [deslocamentos]}; None para retângulo cheio
+    """
+    return _aplicar(binaria, forma, plano, np.bitwise_and)
+
+
+def dilatacao_binaria(binaria, forma, plano=None):
+    return _aplicar(binaria, forma, plano, np.bitwise_or)
+
+
+def abertura_binaria(binaria, forma, plano=None):
+    return dilatacao_binaria(erosao_binaria(binaria, forma, plano), forma, plano)
+
+
+def fechamento_binaria(binaria, forma, plano=None):
+    return erosao_binaria(dilatacao_binaria(binaria, forma, plano), forma, plano)
+
+
+def diferenca_binaria(a, b):
+    """Pixels ativos em `a` e inativos em `b` (a AND NOT b), bit a bit."""
+    return ImagemBinaria(a.palavras & ~b.palavras, a.altura, a.largura)
@@ -0,0 +1,185 @@
+import inspect
+
+import numpy as np
+from backend import filtros
+from backend import transformacoes as t
+from backend.reamostragem import INTERPOLACOES, reamostrar_afim
+from backend.filtros_frequencias import (
+    filtro_mediana, filtro_gaussiano, filtro_laplaciano, filtro_sobel,
+    limiarizacao_global, filtro_frequencia
+)
+from backend.morfologiaMatematica import (
+    criar_elemento_estruturante, erosao, dilatacao, abertura, fechamento,
+    afinamento, gradiente_morfologico, top_hat, black_hat
+)
+
+
+def _morfologia(operacao):
+    def aplicar(matriz, forma='quadrado', tamanho=3):
+        return operacao(matriz, criar_elemento_estruturante(forma, tamanho))
+    return aplicar
+
+
+def _mediana(matriz, tamanho=3):
+    return filtro_mediana(matriz, tamanho_kernel=tamanho)
+
+
+def _tabela(matriz, tabela):
+    # Tabela de 256 valores aplicada a cada canal de uma imagem uint8
+    return np.asarray(tabela, dtype=np.uint8)[matriz]
+
+
+def _translacao(matriz, x=0, y=0):
+    return t.transladar(matriz, x, y)
+
+
+def _rotacao(matriz, angulo, interpolacao='bilinear'):
+    return t.rotacionar(matriz, angulo, interpolacao)
+
+
+def _espelhamento(matriz, direcao='horizontal'):
+    return t.espelhar(matriz, direcao)
+
+
+def _escala(matriz, fator=1.0, interpolacao='bilinear'):
+    return t.escala(matriz, fator, fator, interpolacao)
+
+
+# Transformações que a interface deixa pendentes e reamostra juntas (ImageManager.transformar)
+GEOMETRICAS = ('rotacao', 'espelhamento', 'escala')
+
+
+def afim_da_etapa(nome, argumentos, altura, largura):
+    """Matriz 3x3, formato de saída e interpolação de uma etapa geométrica.
+
+    Returns:
+        tupla (matriz, (altura, largura), interpolacao)
+    """
+    if nome == 'rotacao':
+        return (t.matriz_rotacao(argumentos['angulo'], altura, largura), (altura, largura),
+                argumentos.get('interpolacao', 'bilinear'))
+    if nome == 'espelhamento':
+        return (t.matriz_espelhamento(argumentos.get('direcao', 'horizontal'), altura, largura),
+                (altura, largura), 'vizinho')
+    if nome == 'escala':
+        fator = argumentos.get('fator', 1.0)
+        matriz, formato = t.matriz_escala(fator, fator, altura, largura)
+        return matriz, formato, argumentos.get('interpolacao', 'bilinear')
+    raise ValueError(f"Etapa não geométrica: {nome}")
+
+
+def _transformacoes(matriz, etapas):
+    # Várias etapas geométricas numa única reamostragem, como a interface faz ao
+    # materializar as transformações pendentes: a afim composta é calculada
+    # para o tamanho desta imagem, com a interpolação mais cara entre as etapas
+    altura, largura = matriz.shape[:2]
+    afim = np.eye(3)
+    interpolacao = INTERPOLACOES[0]
+    for nome, argumentos in etapas:
+        m, (altura, largura), usada = afim_da_etapa(nome, argumentos, altura, largura)
+        afim = m @ afim
+        interpolacao = max(interpolacao, usada, key=INTERPOLACOES.index)
+    if (altura, largura) == matriz.shape[:2] and np.allclose(afim, np.eye(3)):
+        return matriz
+    return reamostrar_afim(matriz, np.linalg.inv(afim), (altura, largura), interpolacao)
+
+
+# Operações de imagem por nome, com os mesmos parâmetros dos menus; cada
+# função recebe a matriz e os parâmetros nomeados e devolve a nova matriz
+OPERACOES = {
+    'grayscale': filtros.grayscale,
+    'brilho_contraste': filtros.brilho_contraste,
+    'tabela': _tabela,
+    'mediana': _mediana,
+    'gaussiano': filtro_gaussiano,
+    'laplaciano': filtro_laplaciano,
+    'sobel': filtro_sobel,
+    'frequencia': filtro_frequencia,
+    'limiarizacao': limiarizacao_global,
+    'dilatacao': _morfologia(dilatacao),
+    'erosao': _morfologia(erosao),
+    'abertura': _morfologia(abertura),
+    'fechamento': _morfologia(fechamento),
+    'gradiente': _morfologia(gradiente_morfologico),
+    'top_hat': _morfologia(top_hat),
+    'black_hat': _morfologia(black_hat),
+    'afinamento': afinamento,
+    'translacao': _translacao,
+    'rotacao': _rotacao,
+    'espelhamento': _espelhamento,
+    'escala': _escala,
+    'transformacoes': _transformacoes,
+}
+
+_FORMAS = ('quadrado', 'cruz', 'disco', 'linha_horizontal', 'linha_vertical')
+
+# Valores aceitos pelos parâmetros de texto; as funções não reclamam de todos
+# (espelhamento e sobel ignoram uma direção desconhecida)
+VALORES = {
+    'sobel': {'direcao': ('x', 'y', 'ambos')},
+    'frequencia': {'tipo': ('ideal', 'butterworth', 'gaussiano'), 'passa': ('baixa', 'alta')},
+    'rotacao': {'interpolacao': INTERPOLACOES},
+    'espelhamento': {'direcao': ('horizontal', 'vertical')},
+    'escala': {'interpolacao': INTERPOLACOES},
+}
+VALORES.update({nome: {'forma': _FORMAS} for nome in
+                ('dilatacao', 'erosao', 'abertura', 'fechamento', 'gradiente', 'top_hat', 'black_hat')})
+
+# Parâmetros internos (caches, gradientes compartilhados), que não vêm do usuário
+_PARAMETROS_INTERNOS = ('cache', 'gradientes')
+
+
+def parametros(nome):
+    """Nomes e valores padrão dos parâmetros de uma operação.
+
+    Returns:
+        dicionário {parametro: padrão}, com inspect.Parameter.empty nos obrigatórios
+    """
+    assinatura = inspect.signature(OPERACOES[nome])
+    return {p.name: p.default for p in list(assinatura.parameters.values())[1:]
+            if p.name not in _PARAMETROS_INTERNOS}
+
+
+def validar_etapa(nome, argumentos):
+    """Confere o nome e os parâmetros de uma etapa antes de processar qualquer imagem.
+
+    Raises:
+        ValueError: operação desconhecida, parâmetro inexistente, obrigatório
+            faltando ou com valor fora dos aceitos
+    """
+    if nome not in OPERACOES:
+        raise ValueError(f"Operação desconhecida: {nome} (disponíveis: {', '.join(OPERACOES)})")
+    aceitos = parametros(nome)
+    desconhecidos = set(argumentos) - set(aceitos)
+    if desconhecidos:
+        raise ValueError(f"{nome}: parâmetros desconhecidos {sorted(desconhecidos)} "
+                         f"(aceitos: {', '.join(aceitos) or 'nenhum'})")
+    faltando = [p for p, padrao in aceitos.items()
+                if padrao is inspect.Parameter.empty and p not in argumentos]
+    if faltando:
+        raise ValueError(f"{nome}: parâmetros obrigatórios faltando {faltando}")
+    for parametro, valores in VALORES.get(nome, {}).items():
+        if parametro in argumentos and argumentos[parametro] not in valores:
+            raise ValueError(f"{nome}: {parametro}={argumentos[parametro]!r} inválido "
+                             f"(aceitos: {', '.join(valores)})")
+    if nome == 'transformacoes':
+        for etapa in argumentos['etapas']:
+            if len(etapa) != 2 or etapa[0] not in GEOMETRICAS:
+                raise ValueError(f"transformacoes: etapa {etapa!r} inválida "
+                                 f"(aceitas: {', '.join(GEOMETRICAS)})")
+            validar_etapa(*etapa)
+
+
+def aplicar_pipeline(matriz, etapas):
+    """Aplica as etapas em sequência.
+
+    Args:
+        matriz: imagem de entrada
+        etapas: lista de (nome, {parametro: valor})
+
+    Returns:
+        matriz resultante, contígua na memória
+    """
+    for nome, argumentos in etapas:
+        matriz = OPERACOES[nome](matriz, **argumentos)
+    return np.ascontiguousarray(matriz)
@@ -0,0 +1,158 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import numpy as np
+from backend.tarefas import (concluir_parte, dividir_tarefa, executar_como, publicar_parcial,
+                             tarefa_atual, verificar_cancelamento)
+
+# Faixas menores que isso não compensam o custo do halo e do agendamento
+ALTURA_MINIMA_FAIXA = 64
+# Faixas por thread; mais de uma equilibra melhor a carga
+FAIXAS_POR_THREAD = 2
+# Faixas mínimas de uma operação em segundo plano, para a exibição progressiva
+# ter o que mostrar antes do fim
+FAIXAS_PROGRESSIVAS = 16
+
+_executor = None
+_num_threads = None
+_lock = threading.Lock()
+
+
+def configurar_threads(num_threads=None):
+    """Define quantas threads o agendador usa (None = número de CPUs)."""
+    global _executor, _num_threads
+    with _lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+            _executor = None
+        _num_threads = num_threads
+
+
+def obter_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=_num_threads or os.cpu_count() or 1,
+                                           thread_name_prefix="faixas")
+        return _executor
+
+
+def numero_threads():
+    return _num_threads or os.cpu_count() or 1
+
+
+def dividir_faixas(altura, raio, num_faixas):
+    """Divide as linhas em faixas com halo de `raio` linhas acima e abaixo.
+
+    Returns:
+        lista de tuplas (inicio, fim, inicio_halo, fim_halo)
+    """
+    altura_minima = max(ALTURA_MINIMA_FAIXA, 2 * raio + 1)
+    num_faixas = max(1, min(num_faixas, altura // altura_minima))
+
+    limites = np.linspace(0, altura, num_faixas + 1).astype(int).tolist()
+    faixas = []
+    for inicio, fim in zip(limites[:-1], limites[1:]):
+        faixas.append((inicio, fim, max(0, inicio - raio), min(altura, fim + raio)))
+    return faixas
+
+
+def ordem_progressiva(n):
+    """Índices 0..n-1 do grosso para o fino: meio, quartos, oitavos...
+
+    Processadas nessa ordem, as faixas prontas se espalham pela imagem toda
+    desde o início, em vez de a preencherem de cima para baixo.
+    """
+    bits = max(1, (n - 1).bit_length())
+    ordem = []
+    for i in range(1 << bits):
+        # Inverte os bits de i (sequência de van der Corput)
+        j = int(format(i, f'0{bits}b')[::-1], 2)
+        if j < n:
+            ordem.append(j)
+    return ordem
+
+
+def executar_em_faixas(altura, funcao, raio=0, num_faixas=None):
+    """Chama funcao(inicio, fim) para cada faixa de linhas, em paralelo.
+
+    Para operações que leem de um buffer compartilhado (já com padding) e
+    escrevem direto na fatia [inicio:fim] de uma saída pré-alocada. As faixas
+    são despachadas em ordem_progressiva.
+    """
+    if num_faixas is None:
+        num_faixas = numero_threads() * FAIXAS_POR_THREAD
+    faixas = dividir_faixas(altura, raio, num_faixas)
+    faixas = [faixas[i] for i in ordem_progressiva(len(faixas))]
+    # Cada faixa roda como uma parte da tarefa atual (progresso e cancelamento)
+    tarefa = tarefa_atual()
+    partes = dividir_tarefa(len(faixas))
+
+    def executar_faixa(parte, inicio, fim):
+        verificar_cancelamento()
+        funcao(inicio, fim)
+        concluir_parte(parte)
+
+    # Chamadas feitas de dentro do próprio pool rodam direto, para não travar
+    if len(faixas) == 1 or threading.current_thread().name.startswith("faixas"):
+        for parte, (inicio, fim, _, _) in zip(partes, faixas):
+            executar_como(parte, executar_faixa, parte, inicio, fim)
+    else:
+        executor = obter_executor()
+        futuros = [executor.submit(executar_como, parte, executar_faixa, parte, inicio, fim)
+                   for parte, (inicio, fim, _, _) in zip(partes, faixas)]
+        try:
+            for futuro in futuros:
+                futuro.result()
+        finally:
+            # Se uma faixa foi cancelada, espera as outras pararem antes de sair
+            for futuro in futuros:
+                futuro.cancel()
+            wait(futuros)
+    if tarefa is not None:
+        tarefa.concluir_partes()
+
+
+def processar_em_faixas(imagem, operacao, raio, dtype=None, num_faixas=None):
+    """Executa uma operação de vizinhança em faixas de linhas, em paralelo.
+
+    Cada faixa recebe `raio` linhas extras (halo) de cada lado, para que as
+    linhas úteis vejam a mesma vizinhança que veriam na imagem inteira; o
+    padding que a operação faz nas bordas da faixa só afeta o halo, que é
+    descartado. Cada resultado é escrito direto na sua fatia da saída, sem
+    concatenar as faixas.
+
+    Args:
+        imagem: matriz (H, W) ou (H, W, C)
+        operacao: função que recebe uma faixa e devolve uma matriz do mesmo formato
+        raio: raio vertical do kernel da operação
+        dtype: tipo da saída (padrão: o da imagem)
+        num_faixas: número de faixas (padrão: FAIXAS_POR_THREAD por thread, e
+            pelo menos FAIXAS_PROGRESSIVAS dentro de uma tarefa)
+
+    Returns:
+        matriz com o mesmo formato da imagem
+    """
+    altura = imagem.shape[0]
+    if num_faixas is None:
+        num_faixas = numero_threads() * FAIXAS_POR_THREAD
+        if tarefa_atual() is not None:
+            num_faixas = max(num_faixas, FAIXAS_PROGRESSIVAS)
+    if len(dividir_faixas(altura, raio, num_faixas)) == 1:
+        return operacao(imagem)
+
+    saida = np.empty(imagem.shape, dtype=dtype or imagem.dtype)
+    # Em segundo plano, a interface pode exibir as faixas já prontas
+    parcial = publicar_parcial(saida)
+
+    def processar(inicio, fim):
+        inicio_halo = max(0, inicio - raio)
+        fim_halo = min(altura, fim + raio)
+        resultado = operacao(imagem[inicio_halo:fim_halo])
+        saida[inicio:fim] = resultado[inicio - inicio_halo:fim - inicio_halo]
+        if parcial is not None:
+            parcial.marcar(inicio, fim)
+
+    executar_em_faixas(altura, processar, raio, num_faixas)
+    return saida
@@ -0,0 +1,172 @@
+"""Pipelines de operações: gravação em JSON, otimização e reprodução em outras imagens.
+
+Um pipeline é uma lista de etapas (nome, {parametro: valor}), com os nomes
+de backend.operacoes.OPERACOES.
+"""
+import json
+
+import numpy as np
+from backend.operacoes import OPERACOES, aplicar_pipeline, validar_etapa
+
+VERSAO_FORMATO = 1
+
+# Cada pixel de saída depende só do mesmo pixel de entrada
+PONTUAIS = ('brilho_contraste', 'tabela', 'grayscale', 'limiarizacao')
+# Pontuais canal a canal: em uint8 se reduzem a uma tabela de 256 valores
+TABELAVEIS = ('brilho_contraste', 'tabela')
+# Vizinhança simétrica e padding simétrico ('reflect'/'edge'): o resultado não
+# muda se a imagem for espelhada ou girada 180° antes em vez de depois
+SIMETRICAS = ('mediana', 'dilatacao', 'erosao', 'abertura', 'fechamento',
+              'gradiente', 'top_hat', 'black_hat')
+# Aplicar duas vezes seguidas com os mesmos parâmetros é o mesmo que uma
+IDEMPOTENTES = ('grayscale', 'abertura', 'fechamento')
+
+_IDENTIDADE = list(range(256))
+
+
+def para_json(etapas):
+    return json.dumps({
+        'versao': VERSAO_FORMATO,
+        'etapas': [{'operacao': nome, 'parametros': argumentos} for nome, argumentos in etapas],
+    }, ensure_ascii=False, indent=2)
+
+
+def de_json(texto):
+    """Etapas de um pipeline gravado com para_json, já validadas.
+
+    Raises:
+        ValueError: formato inválido, operação ou parâmetro desconhecido
+    """
+    dados = json.loads(texto)
+    if not isinstance(dados, dict) or dados.get('versao') != VERSAO_FORMATO:
+        raise ValueError("Formato de pipeline não reconhecido")
+    etapas = []
+    for item in dados.get('etapas', []):
+        if not isinstance(item, dict) or 'operacao' not in item:
+            raise ValueError(f"Etapa inválida no pipeline: {item!r}")
+        nome, argumentos = item['operacao'], dict(item.get('parametros', {}))
+        validar_etapa(nome, argumentos)
+        etapas.append((nome, argumentos))
+    return etapas
+
+
+def salvar(etapas, caminho):
+    with open(caminho, 'w', encoding='utf-8') as arquivo:
+        arquivo.write(para_json(etapas))
+
+
+def carregar(caminho):
+    with open(caminho, encoding='utf-8') as arquivo:
+        return de_json(arquivo.read())
+
+
+def _neutra(nome, argumentos, dtype):
+    # Etapas que devolvem a própria imagem
+    if nome == 'brilho_contraste':
+        return (dtype == np.uint8 and argumentos.get('brilho', 0.0) == 0
+                and argumentos.get('contraste', 1.0) == 1)
+    if nome == 'tabela':
+        return list(argumentos['tabela']) == _IDENTIDADE
+    if nome == 'mediana':
+        return argumentos.get('tamanho', 3) in (0, 1)
+    if nome == 'translacao':
+        return argumentos.get('x', 0) == 0 and argumentos.get('y', 0) == 0
+    if nome == 'rotacao':
+        return argumentos['angulo'] % 360 == 0
+    if nome == 'escala':
+        return argumentos.get('fator', 1.0) == 1
+    return False
+
+
+def _permutacao(nome, argumentos):
+    # Só troca pixels de lugar: sem interpolação e sem preencher bordas
+    if nome == 'rotacao':
+        return argumentos['angulo'] % 180 == 0
+    return nome in ('espelhamento', 'translacao')
+
+
+def _comutam(geometrica, outra):
+    """True se aplicar `geometrica` antes de `outra` dá exatamente o mesmo resultado."""
+    nome, argumentos = geometrica
+    if not _permutacao(nome, argumentos):
+        return False
+    if outra[0] in PONTUAIS:
+        return True
+    # A translação é circular: na costura, a vizinhança não é a mesma
+    return nome != 'translacao' and outra[0] in SIMETRICAS
+
+
+def _tabela(etapas):
+    tabela = np.arange(256, dtype=np.uint8)
+    for nome, argumentos in etapas:
+        tabela = OPERACOES[nome](tabela, **argumentos)
+    return ('tabela', {'tabela': np.asarray(tabela, dtype=np.uint8).tolist()})
+
+
+def _combinar(a, b, dtype):
+    """Etapas que substituem o par vizinho (a, b), ou None se não há como juntar."""
+    (nome_a, args_a), (nome_b, args_b) = a, b
+    if nome_a in TABELAVEIS and nome_b in TABELAVEIS and dtype == np.uint8:
+        return [_tabela([a, b])]
+    if nome_a != nome_b:
+        return None
+    if nome_a in IDEMPOTENTES and args_a == args_b:
+        return [a]
+    if nome_a == 'espelhamento' and args_a.get('direcao', 'horizontal') == args_b.get('direcao', 'horizontal'):
+        return []
+    if nome_a == 'translacao':
+        return [('translacao', {'x': args_a.get('x', 0) + args_b.get('x', 0),
+                                'y': args_a.get('y', 0) + args_b.get('y', 0)})]
+    if nome_a == 'rotacao' and _permutacao(*a) and _permutacao(*b):
+        # Só 0° e 180° são permutações exatas; nos outros ângulos cada rotação
+        # recorta os cantos e interpola, então a soma não dá o mesmo resultado
+        return [('rotacao', dict(args_a, angulo=args_a['angulo'] + args_b['angulo']))]
+    return None
+
+
+def otimizar(etapas, dtype=np.uint8):
+    """Versão equivalente e mais barata do pipeline.
+
+    - remove etapas que não alteram a imagem (brilho 0 e contraste 1,
+      rotação de 360°, translação nula...);
+    - adianta espelhamentos, rotações de 180° e translações, que só trocam
+      pixels de lugar, para antes das etapas com que comutam exatamente
+      (pontuais e, exceto a translação, filtros de vizinhança simétrica), de
+      modo que fiquem juntas das outras etapas geométricas;
+    - junta vizinhas: espelhamentos iguais se cancelam, translações e
+      rotações de 180° somam, etapas pontuais em uint8 viram uma só tabela,
+      etapas idempotentes repetidas ficam uma só.
+
+    Args:
+        etapas: lista de (nome, {parametro: valor})
+        dtype: tipo da imagem de entrada (as tabelas só valem para uint8)
+
+    Returns:
+        nova lista de etapas
+    """
+    etapas = [(nome, dict(argumentos)) for nome, argumentos in etapas]
+    while True:
+        novas = [etapa for etapa in etapas if not _neutra(*etapa, dtype)]
+
+        for i in range(1, len(novas)):
+            j = i
+            while j > 0 and _comutam(novas[j], novas[j - 1]):
+                novas[j - 1], novas[j] = novas[j], novas[j - 1]
+                j -= 1
+
+        combinadas = []
+        for etapa in novas:
+            juncao = _combinar(combinadas[-1], etapa, dtype) if combinadas else None
+            if juncao is None:
+                combinadas.append(etapa)
+            else:
+                combinadas[-1:] = juncao
+
+        if combinadas == etapas:
+            return combinadas
+        etapas = combinadas
+
+
+def reproduzir(etapas, matriz):
+    """Aplica o pipeline (otimizado) a uma imagem."""
+    return aplicar_pipeline(matriz, otimizar(etapas, matriz.dtype))
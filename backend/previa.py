@@ -0,0 +1,127 @@
+import numpy as np
+from PIL import Image
+
+from backend.buffer_imagem import somente_leitura
+from backend.reamostragem import reduzir_area
+
+# Lado máximo das prévias exibidas na janela principal
+TAMANHO_PREVIA = 500
+# Região vazia: nada mudou desde a última atualização
+REGIAO_VAZIA = (0, 0, 0, 0)
+
+
+def abrir_previa(caminho, tamanho_max=TAMANHO_PREVIA):
+    """Abre o arquivo já reduzido para caber em tamanho_max x tamanho_max.
+
+    Em JPEGs, draft() faz o decodificador entregar a imagem em 1/2, 1/4 ou
+    1/8 da resolução, sem decodificar os pixels que seriam descartados.
+    """
+    imagem = Image.open(caminho)
+    imagem.draft(imagem.mode, (tamanho_max, tamanho_max))
+    imagem.thumbnail((tamanho_max, tamanho_max))
+    return imagem
+
+
+def unir_regioes(a, b):
+    """Menor retângulo que contém as duas regiões; None representa a imagem inteira."""
+    if a is None or b is None:
+        return None
+    if a[1] == a[0]:
+        return b
+    if b[1] == b[0]:
+        return a
+    return min(a[0], b[0]), max(a[1], b[1]), min(a[2], b[2]), max(a[3], b[3])
+
+
+def _metade(matriz):
+    # Média de blocos 2x2; em uint8 soma as quatro fatias em uint16, bem mais
+    # barato que a média genérica em float
+    if matriz.dtype != np.uint8:
+        return reduzir_area(matriz, 2, 2)
+    altura, largura = matriz.shape[0] // 2 * 2, matriz.shape[1] // 2 * 2
+    soma = matriz[0:altura:2, 0:largura:2].astype(np.uint16)
+    soma += matriz[1:altura:2, 0:largura:2]
+    soma += matriz[0:altura:2, 1:largura:2]
+    soma += matriz[1:altura:2, 1:largura:2]
+    soma += 2
+    soma >>= 2
+    return soma.astype(np.uint8)
+
+
+class PiramideMip:
+    """Pirâmide de versões da imagem, cada uma com metade do lado da anterior.
+
+    O nível 0 é a própria matriz (sem cópia); os seguintes são médias de
+    blocos 2x2 e param no primeiro nível menor que 2 * tamanho_min. A prévia
+    sai sempre de um nível com lado entre tamanho_min e 2 * tamanho_min, então
+    exibir não depende da resolução da imagem. Quando só uma região muda,
+    só os pixels correspondentes de cada nível são recalculados.
+    """
+
+    def __init__(self, tamanho_min=TAMANHO_PREVIA):
+        self.tamanho_min = tamanho_min
+        self.niveis = []
+
+    @property
+    def origem(self):
+        return self.niveis[0] if self.niveis else None
+
+    def atualizar(self, matriz, regiao=None):
+        """Atualiza a pirâmide para `matriz`.
+
+        Args:
+            matriz: nova matriz do nível 0
+            regiao: (y0, y1, x0, x1) alterado desde a última atualização, ou
+                None se não se sabe (a pirâmide é refeita)
+        """
+        if regiao is None or not self.niveis or matriz.shape != self.niveis[0].shape:
+            self.niveis = [matriz]
+            while max(self.niveis[-1].shape[:2]) >= 2 * self.tamanho_min:
+                self.niveis.append(_metade(self.niveis[-1]))
+            return
+
+        self.niveis[0] = matriz
+        y0, y1, x0, x1 = regiao
+        for k in range(1, len(self.niveis)):
+            if y1 <= y0 or x1 <= x0:
+                break
+            nivel = self.niveis[k]
+            altura, largura = nivel.shape[:2]
+            y0, y1 = y0 // 2, min(altura, -(-y1 // 2))
+            x0, x1 = x0 // 2, min(largura, -(-x1 // 2))
+            anterior = self.niveis[k - 1]
+            nivel[y0:y1, x0:x1] = _metade(anterior[2 * y0:2 * y1, 2 * x0:2 * x1])
+
+    def nivel(self, tamanho_max=TAMANHO_PREVIA):
+        """Menor nível com lado maior >= tamanho_max (ou o nível 0, se a imagem for menor)."""
+        for nivel in reversed(self.niveis):
+            if max(nivel.shape[:2]) >= tamanho_max:
+                return somente_leitura(nivel)
+        return somente_leitura(self.niveis[0]) if self.niveis else None
+
+
+def compor_parcial(base, saida, prontas):
+    """Prévia de um resultado em andamento: as linhas prontas sobre a imagem de entrada.
+
+    Args:
+        base: prévia reduzida da imagem de entrada
+        saida: matriz de saída da operação, em resolução cheia
+        prontas: faixas (inicio, fim) de linhas de `saida` já calculadas
+
+    Returns:
+        matriz do tamanho de `base`, ou None se a saída não tiver o mesmo
+        tipo e canais da entrada
+    """
+    if saida.shape[2:] != base.shape[2:] or saida.dtype != base.dtype:
+        return None
+    altura, largura = base.shape[:2]
+    # Amostra o pixel mais próximo do centro de cada pixel da prévia
+    linhas = ((np.arange(altura) + 0.5) * saida.shape[0] / altura).astype(np.intp)
+    colunas = ((np.arange(largura) + 0.5) * saida.shape[1] / largura).astype(np.intp)
+    pronta = np.zeros(saida.shape[0], dtype=bool)
+    for inicio, fim in list(prontas):
+        pronta[inicio:fim] = True
+    selecionadas = pronta[linhas]
+    quadro = np.array(base)
+    quadro[selecionadas] = saida[np.ix_(linhas[selecionadas], colunas)]
+    return quadro
@@ -0,0 +1,259 @@
+from functools import lru_cache
+
+import numpy as np
+
+# Pixels de saída por bloco de linhas; limita a memória dos temporários
+PIXELS_POR_BLOCO = 1 << 18
+
+INTERPOLACOES = ('vizinho', 'bilinear', 'bicubica')
+
+
+@lru_cache(maxsize=8)
+def _grade_base(altura, largura):
+    """Coordenadas (y, x) dos pixels de saída, em forma de grade aberta float32.
+
+    Guardada por (altura, largura): arrastar o slider de rotação várias vezes
+    sobre a mesma imagem não recria as coordenadas.
+    """
+    ys = np.arange(altura, dtype=np.float32)[:, None]
+    xs = np.arange(largura, dtype=np.float32)[None, :]
+    ys.flags.writeable = False
+    xs.flags.writeable = False
+    return ys, xs
+
+
+def _linhas_por_bloco(largura):
+    return max(1, PIXELS_POR_BLOCO // max(1, largura))
+
+
+def _cubico_perto(d, a=-0.5):
+    # Kernel cúbico de Keys para |d| <= 1
+    return ((a + 2) * d - (a + 3)) * d * d + 1
+
+
+def _cubico_longe(d, a=-0.5):
+    # Kernel cúbico de Keys para 1 < |d| < 2
+    return ((a * d - 5 * a) * d + 8 * a) * d - 4 * a
+
+
+def _pesos_cubicos(t):
+    # Pesos dos vizinhos -1, 0, 1 e 2 de uma posição com parte fracionária t
+    return [_cubico_longe(t + 1), _cubico_perto(t), _cubico_perto(1 - t), _cubico_longe(2 - t)]
+
+
+def _taps(coordenada, interpolacao):
+    """Índices inteiros e pesos dos vizinhos ao longo de um eixo.
+
+    Returns:
+        lista de (indices, pesos); pesos None para o vizinho mais próximo
+    """
+    if interpolacao == 'vizinho':
+        return [(np.floor(coordenada + 0.5).astype(np.intp), None)]
+
+    base = np.floor(coordenada)
+    t = coordenada - base
+    base = base.astype(np.intp)
+    if interpolacao == 'bilinear':
+        return [(base, 1 - t), (base + 1, t)]
+    if interpolacao == 'bicubica':
+        return [(base + k - 1, peso) for k, peso in enumerate(_pesos_cubicos(t))]
+    raise ValueError(f"Interpolação deve ser uma de {INTERPOLACOES}")
+
+
+def _amostrar(imagem, ys, xs, interpolacao, saida):
+    altura, largura = imagem.shape[:2]
+    extra = (None,) * (imagem.ndim - 2)
+    # Busca por índice linear: uma indexação 1D por vizinho
+    plano = imagem.reshape((altura * largura,) + imagem.shape[2:])
+
+    def eixo(coordenada, limite):
+        # (índices já limitados à imagem, pesos zerados fora dela)
+        taps = []
+        for indices, pesos in _taps(coordenada, interpolacao):
+            valido = (indices >= 0) & (indices < limite)
+            if pesos is None:
+                pesos = valido
+            else:
+                pesos = np.where(valido, pesos, np.float32(0))
+            taps.append((np.clip(indices, 0, limite - 1), pesos[(...,) + extra]))
+        return taps
+
+    taps_y = eixo(ys, altura)
+    taps_x = eixo(xs, largura)
+
+    if interpolacao == 'vizinho':
+        (yi, valido_y), (xi, valido_x) = taps_y[0], taps_x[0]
+        amostra = plano[yi * largura + xi]
+        saida[...] = np.where(valido_y & valido_x, amostra, 0)
+        return
+
+    # Vizinhos fora da imagem contam como 0, como o fundo da rotação original.
+    # Os pesos são separáveis: soma ao longo de x para cada linha vizinha, depois em y
+    acumulado = np.zeros(saida.shape, dtype=np.float32)
+    linha = np.empty(saida.shape, dtype=np.float32)
+    for yi, peso_y in taps_y:
+        base = yi * largura
+        linha.fill(0)
+        for xi, peso_x in taps_x:
+            linha += peso_x * plano[base + xi]
+        acumulado += peso_y * linha
+
+    if np.issubdtype(saida.dtype, np.integer):
+        info = np.iinfo(saida.dtype)
+        np.rint(acumulado, out=acumulado)
+        np.clip(acumulado, info.min, info.max, out=acumulado)
+    saida[...] = acumulado
+
+
+def reamostrar_afim(imagem, inversa, formato_saida=None, interpolacao='bilinear', saida=None):
+    """Aplica uma transformação afim por mapeamento inverso.
+
+    Cada pixel de saída (x, y) busca sua cor na posição inversa @ (x, y, 1)
+    da imagem de entrada, então não sobram buracos como no mapeamento direto.
+    A saída é processada em blocos de linhas com coordenadas float32, para que
+    a memória dos temporários não dependa do tamanho da imagem.
+
+    Args:
+        imagem: matriz (H, W) ou (H, W, C)
+        inversa: matriz 3x3 que leva coordenadas (x, y, 1) da saída para a entrada
+        formato_saida: (altura, largura) da saída (padrão: o da entrada)
+        interpolacao: 'vizinho', 'bilinear' ou 'bicubica'
+        saida: matriz onde escrever o resultado (por exemplo mapeada em disco)
+
+    Returns:
+        matriz com o mesmo tipo da entrada; regiões fora da imagem ficam em 0
+    """
+    if interpolacao not in INTERPOLACOES:
+        raise ValueError(f"Interpolação deve ser uma de {INTERPOLACOES}")
+    altura, largura = formato_saida or imagem.shape[:2]
+    if saida is None:
+        saida = np.empty((altura, largura) + imagem.shape[2:], dtype=imagem.dtype)
+    ys, xs = _grade_base(altura, largura)
+    (a, b, c), (d, e, f) = np.asarray(inversa, dtype=np.float32)[:2]
+
+    passo = _linhas_por_bloco(largura)
+    for inicio in range(0, altura, passo):
+        linhas = ys[inicio:inicio + passo]
+        xs_origem = a * xs + (b * linhas + c)
+        ys_origem = d * xs + (e * linhas + f)
+        _amostrar(imagem, ys_origem, xs_origem, interpolacao, saida[inicio:inicio + passo])
+    return saida
+
+
+
+def _kernel(interpolacao):
+    # (raio, função de peso) dos kernels da reamostragem separável
+    if interpolacao == 'bilinear':
+        return 1.0, lambda d: np.maximum(0, 1 - np.abs(d))
+    if interpolacao == 'bicubica':
+        def cubico(d):
+            d = np.abs(d)
+            return np.where(d <= 1, _cubico_perto(d), np.where(d < 2, _cubico_longe(d), 0))
+        return 2.0, cubico
+    raise ValueError("Interpolação separável deve ser 'bilinear' ou 'bicubica'")
+
+
+def pesos_1d(n_entrada, n_saida, interpolacao='bilinear'):
+    """Índices e pesos da reamostragem de um eixo de n_entrada para n_saida pixels.
+
+    Usa centros de pixel ((i + 0.5) / escala - 0.5). Na redução o kernel é
+    alargado pelo fator, para que cada saída cubra a área correspondente da
+    entrada (sem aliasing); vizinhos fora da imagem repetem a borda.
+
+    Returns:
+        tupla (indices, pesos), ambos (n_saida, num_vizinhos)
+    """
+    escala = n_saida / n_entrada
+    centros = (np.arange(n_saida) + 0.5) / escala - 0.5
+    if interpolacao == 'vizinho':
+        indices = np.clip(np.floor(centros + 0.5), 0, n_entrada - 1).astype(np.intp)
+        return indices[:, None], np.ones((n_saida, 1), dtype=np.float32)
+
+    raio, kernel = _kernel(interpolacao)
+    alcance = raio / min(escala, 1.0)
+    primeiro = np.floor(centros - alcance).astype(np.intp) + 1
+    num_vizinhos = int(np.ceil(2 * alcance))
+    vizinhos = primeiro[:, None] + np.arange(num_vizinhos)[None, :]
+
+    pesos = kernel((vizinhos - centros[:, None]) * min(escala, 1.0))
+    pesos /= pesos.sum(axis=1, keepdims=True)
+    return np.clip(vizinhos, 0, n_entrada - 1), pesos.astype(np.float32)
+
+
+def _combinar(linhas, indices, pesos, eixo):
+    # Soma ponderada dos vizinhos ao longo de um eixo, em float32
+    extra = (None,) * (linhas.ndim - 2)
+    acumulado = None
+    for k in range(indices.shape[1]):
+        vizinho = np.take(linhas, indices[:, k], axis=eixo)
+        if eixo == 0:
+            peso = pesos[:, k][(slice(None), None) + extra]
+        else:
+            peso = pesos[:, k][(None, slice(None)) + extra]
+        if acumulado is None:
+            acumulado = peso * vizinho
+        else:
+            acumulado += peso * vizinho
+    return acumulado
+
+
+def reamostrar_separavel(imagem, formato_saida, interpolacao='bilinear'):
+    """Redimensiona com dois passes 1D (linhas e colunas), em blocos de linhas.
+
+    Para cada bloco de linhas de saída, só as linhas de entrada que ele usa
+    passam pelo passe horizontal; o passe vertical escreve direto na saída.
+    Os temporários ficam do tamanho de um bloco, então ampliações grandes
+    não alocam grades de coordenadas do tamanho da saída.
+
+    Args:
+        imagem: matriz (H, W) ou (H, W, C)
+        formato_saida: (altura, largura) da saída
+        interpolacao: 'vizinho', 'bilinear' ou 'bicubica'
+    """
+    altura, largura = imagem.shape[:2]
+    nova_altura, nova_largura = formato_saida
+    saida = np.empty((nova_altura, nova_largura) + imagem.shape[2:], dtype=imagem.dtype)
+    indices_y, pesos_y = pesos_1d(altura, nova_altura, interpolacao)
+    indices_x, pesos_x = pesos_1d(largura, nova_largura, interpolacao)
+    inteiro = np.issubdtype(imagem.dtype, np.integer)
+
+    passo = _linhas_por_bloco(nova_largura)
+    for inicio in range(0, nova_altura, passo):
+        fim = min(inicio + passo, nova_altura)
+        bloco_y = indices_y[inicio:fim]
+        primeira, ultima = int(bloco_y.min()), int(bloco_y.max())
+
+        if interpolacao == 'vizinho':
+            saida[inicio:fim] = imagem[bloco_y[:, 0]][:, indices_x[:, 0]]
+            continue
+
+        horizontal = _combinar(imagem[primeira:ultima + 1], indices_x, pesos_x, 1)
+        resultado = _combinar(horizontal, bloco_y - primeira, pesos_y[inicio:fim], 0)
+        if inteiro:
+            info = np.iinfo(imagem.dtype)
+            np.rint(resultado, out=resultado)
+            np.clip(resultado, info.min, info.max, out=resultado)
+        saida[inicio:fim] = resultado
+    return saida
+
+
+def reduzir_area(imagem, fator_y, fator_x):
+    """Redução por fatores inteiros com a média de cada bloco fator_y x fator_x.
+
+    Linhas e colunas que sobram no fim (quando o tamanho não é múltiplo do
+    fator) são descartadas.
+    """
+    altura = imagem.shape[0] // fator_y
+    largura = imagem.shape[1] // fator_x
+    saida = np.empty((altura, largura) + imagem.shape[2:], dtype=imagem.dtype)
+
+    passo = _linhas_por_bloco(largura * fator_y * fator_x)
+    for inicio in range(0, altura, passo):
+        fim = min(inicio + passo, altura)
+        bloco = imagem[inicio * fator_y:fim * fator_y, :largura * fator_x]
+        blocos = bloco.reshape((fim - inicio, fator_y, largura, fator_x) + imagem.shape[2:])
+        media = blocos.mean(axis=(1, 3), dtype=np.float32)
+        if np.issubdtype(imagem.dtype, np.integer):
+            media = np.rint(media)
+        saida[inicio:fim] = media
+    return saida
@@ -0,0 +1,241 @@
+import threading
+import traceback
+from collections import deque
+
+# Intervalo entre as consultas de progresso feitas na thread da interface, em ms
+INTERVALO_MS = 50
+
+_local = threading.local()
+
+
+class Cancelada(Exception):
+    """Levantada dentro de uma operação quando a tarefa que a executa é cancelada."""
+
+
+class ResultadoParcial:
+    """Matriz de saída de uma operação em andamento e as faixas de linhas já prontas.
+
+    As faixas só entram em `prontas` depois de escritas, então a thread da
+    interface pode ler essas linhas de `saida` enquanto o resto é calculado.
+    """
+
+    def __init__(self, saida):
+        self.saida = saida
+        self.prontas = []
+
+    def marcar(self, inicio, fim):
+        self.prontas.append((inicio, fim))
+
+
+class Tarefa:
+    """Progresso e pedido de cancelamento de uma operação em andamento.
+
+    A operação consulta a tarefa nos seus laços longos (verificar_cancelamento);
+    cancelar() só marca o pedido, que é atendido no próximo ponto de consulta.
+    Uma tarefa pode ser dividida em partes (por exemplo uma por faixa de
+    linhas); o progresso dela passa a ser a média do progresso das partes.
+    """
+
+    def __init__(self, pai=None):
+        self._cancelamento = pai._cancelamento if pai is not None else threading.Event()
+        self._raiz = pai._raiz if pai is not None else self
+        self._progresso = 0.0
+        self._partes = None
+        # ResultadoParcial da operação, para exibição progressiva
+        self.parcial = None
+
+    @property
+    def progresso(self):
+        partes = self._partes
+        if partes:
+            return sum(parte.progresso for parte in partes) / len(partes)
+        return self._progresso
+
+    @property
+    def cancelada(self):
+        return self._cancelamento.is_set()
+
+    def cancelar(self):
+        self._cancelamento.set()
+
+    def verificar(self, progresso=None):
+        if progresso is not None:
+            self._progresso = progresso
+        if self._cancelamento.is_set():
+            raise Cancelada
+
+    def dividir(self, num_partes):
+        self._partes = [Tarefa(self) for _ in range(num_partes)]
+        return self._partes
+
+    def concluir_partes(self):
+        self._progresso = self.progresso
+        self._partes = None
+
+
+def tarefa_atual():
+    return getattr(_local, 'tarefa', None)
+
+
+def executar_como(tarefa, funcao, *args):
+    """Chama funcao(*args) com `tarefa` como a tarefa da thread atual."""
+    anterior = tarefa_atual()
+    _local.tarefa = tarefa
+    try:
+        return funcao(*args)
+    finally:
+        _local.tarefa = anterior
+
+
+def verificar_cancelamento(progresso=None):
+    """Ponto de cancelamento para laços longos; fora de uma tarefa não faz nada.
+
+    Args:
+        progresso: fração já concluída (0 a 1) da operação, se conhecida
+
+    Raises:
+        Cancelada: se a tarefa foi cancelada
+    """
+    tarefa = tarefa_atual()
+    if tarefa is not None:
+        tarefa.verificar(progresso)
+
+
+def publicar_parcial(saida):
+    """Expõe `saida` como o resultado parcial da tarefa atual.
+
+    Só vale para a operação mais externa: a primeira matriz publicada pela
+    própria tarefa. Chamadas de dentro de uma parte (uma faixa, um bloco) ou
+    fora de uma tarefa devolvem None.
+
+    Returns:
+        ResultadoParcial onde marcar as linhas prontas, ou None
+    """
+    tarefa = tarefa_atual()
+    if tarefa is None or tarefa._raiz is not tarefa or tarefa.parcial is not None:
+        return None
+    tarefa.parcial = ResultadoParcial(saida)
+    return tarefa.parcial
+
+
+def dividir_tarefa(num_partes):
+    """Partes da tarefa atual, uma por trecho de trabalho (None fora de uma tarefa)."""
+    tarefa = tarefa_atual()
+    if tarefa is None:
+        return [None] * num_partes
+    return tarefa.dividir(num_partes)
+
+
+def concluir_parte(parte):
+    if parte is not None:
+        parte.verificar(1.0)
+
+
+class ExecutorTarefas:
+    """Executa operações numa thread de trabalho, uma de cada vez, em ordem.
+
+    Progresso, resultado e erros voltam para a thread da interface por
+    `agendar` (no Tk, root.after), que consulta a tarefa a cada INTERVALO_MS;
+    os callbacks nunca rodam na thread de trabalho. O módulo não depende de
+    tkinter.
+
+    Args:
+        agendar: função agendar(ms, callback)
+        ao_progresso: chamada ao_progresso(fracao, mensagem=None) com a fração
+            concluída da tarefa atual, ou com None quando não há mais tarefas;
+            nesse caso `mensagem` diz se a última foi cancelada
+    """
+
+    def __init__(self, agendar, ao_progresso=None):
+        self._agendar = agendar
+        self._ao_progresso = ao_progresso
+        self._fila = deque()
+        self.atual = None
+
+    @property
+    def tarefa_em_andamento(self):
+        return self.atual[0] if self.atual is not None else None
+
+    def executar(self, calcular, ao_concluir=None, ao_erro=None, preparar=None):
+        """Põe uma operação na fila.
+
+        Args:
+            calcular: função que roda na thread de trabalho; recebe o valor de
+                `preparar()`, se houver, e devolve o resultado
+            ao_concluir: chamada com o resultado, na thread da interface
+            ao_erro: chamada com a exceção, na thread da interface (padrão:
+                imprime o traceback, como o Tk faz com erros em callbacks)
+            preparar: chamada na thread da interface logo antes de a operação
+                começar (depois das anteriores terem sido concluídas)
+
+        Returns:
+            a Tarefa, que pode ser cancelada
+        """
+        tarefa = Tarefa()
+        self._fila.append((tarefa, calcular, ao_concluir, ao_erro, preparar))
+        if self.atual is None:
+            self._iniciar_proxima()
+        return tarefa
+
+    def cancelar(self):
+        """Cancela a tarefa em andamento e as que estão na fila."""
+        for tarefa, *_ in self._fila:
+            tarefa.cancelar()
+        if self.atual is not None:
+            self.atual[0].cancelar()
+
+    def _iniciar_proxima(self, mensagem=None):
+        while self._fila:
+            tarefa, calcular, ao_concluir, ao_erro, preparar = self._fila.popleft()
+            if tarefa.cancelada:
+                continue
+            saida = {}
+            try:
+                argumentos = (preparar(),) if preparar is not None else ()
+            except Exception as erro:
+                self._entregar(ao_erro, erro)
+                continue
+
+            def trabalhar():
+                try:
+                    saida['resultado'] = executar_como(tarefa, calcular, *argumentos)
+                except BaseException as erro:
+                    saida['erro'] = erro
+
+            thread = threading.Thread(target=trabalhar, name="tarefa", daemon=True)
+            self.atual = (tarefa, thread, saida, ao_concluir, ao_erro)
+            thread.start()
+            self._agendar(INTERVALO_MS, self._acompanhar)
+            return
+
+        self.atual = None
+        if self._ao_progresso is not None:
+            self._ao_progresso(None, mensagem)
+
+    def _acompanhar(self):
+        tarefa, thread, saida, ao_concluir, ao_erro = self.atual
+        if thread.is_alive():
+            if self._ao_progresso is not None:
+                self._ao_progresso(tarefa.progresso)
+            self._agendar(INTERVALO_MS, self._acompanhar)
+            return
+
+        erro = saida.get('erro')
+        mensagem = None
+        if isinstance(erro, Cancelada):
+            mensagem = "Operação cancelada"
+        elif erro is not None:
+            self._entregar(ao_erro, erro)
+        elif ao_concluir is not None:
+            try:
+                ao_concluir(saida.get('resultado'))
+            except Exception as erro_conclusao:
+                self._entregar(ao_erro, erro_conclusao)
+        self._iniciar_proxima(mensagem)
+
+    @staticmethod
+    def _entregar(ao_erro, erro):
+        if ao_erro is not None:
+            ao_erro(erro)
+        else:
+            traceback.print_exception(type(erro), erro, erro.__traceback__)
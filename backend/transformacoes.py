@@ -1,102 +1,135 @@
 import numpy as np
 from PIL import Image
+from backend.cache import memorizar
+from backend.reamostragem import reamostrar_afim, reamostrar_separavel, reduzir_area
 
+@memorizar
 def invert_colors(matrix):
     edited_matrix = 255 - matrix
     return edited_matrix
 
+@memorizar
 def transladar(matrix, x_shift, y_shift):
+    altura, largura = matrix.shape[:2]
+    if y_shift % altura == 0 and x_shift % largura == 0:
+        return matrix
+    # O deslocamento circular não é uma visão, mas np.roll já copia em fatias
     translated_matrix = np.roll(matrix, shift=(y_shift, x_shift), axis=(0, 1))
     return translated_matrix
 
-def escala(matrix, sx, sy):
+def _fator_reducao(escala):
+    # Fator inteiro k se a escala for 1/k, senão None
+    if escala >= 1:
+        return None
+    fator = round(1 / escala)
+    return fator if np.isclose(fator * escala, 1) else None
+
+@memorizar
+def escala(matrix, sx, sy, interpolacao="bilinear"):
     altura, largura = matrix.shape[:2]
-    nova_altura = int(altura * sy)
-    nova_largura = int(largura * sx)
+    nova_altura = max(1, int(round(altura * sy, 9)))
+    nova_largura = max(1, int(round(largura * sx, 9)))
+    if (nova_altura, nova_largura) == (altura, largura):
+        return matrix
 
-    y_coords, x_coords = np.meshgrid(
-        np.linspace(0, altura - 1, nova_altura),
-        np.linspace(0, largura - 1, nova_largura),
-        indexing="ij"
-    )
+    # Redução por fator inteiro: média de cada bloco, sem aliasing
+    fator_y, fator_x = _fator_reducao(sy), _fator_reducao(sx)
+    if fator_y and fator_x and nova_altura == altura // fator_y and nova_largura == largura // fator_x:
+        return reduzir_area(matrix, fator_y, fator_x)
 
-    y_coords = y_coords.astype(int)
-    x_coords = x_coords.astype(int)
+    return reamostrar_separavel(matrix, (nova_altura, nova_largura), interpolacao)
 
-    scaled_matrix = matrix[y_coords, x_coords]
 
-    return scaled_matrix
+# Sem memorização: devolve uma visão em O(1), mais barato que calcular a chave
+def espelhar(matrix, mode="horizontal"):
+    # Visão com passo negativo: O(1) em tempo e memória, sem copiar pixels
+    if mode == "horizontal":
+        return matrix[:, ::-1]
+    elif mode == "vertical":
+        return matrix[::-1]
+    return matrix
 
+def matriz_escala(sx, sy, altura, largura):
+    """Matriz 3x3 e formato de saída de escala(), com centros de pixel alinhados.
 
-def espelhar(matrix, mode="horizontal"):
-    altura, largura = matrix.shape[:2]
+    Returns:
+        tupla (matriz, (nova_altura, nova_largura))
+    """
+    nova_altura = max(1, int(round(altura * sy, 9)))
+    nova_largura = max(1, int(round(largura * sx, 9)))
+    fy = nova_altura / altura
+    fx = nova_largura / largura
 
-    y, x = np.meshgrid(np.arange(altura), np.arange(largura), indexing="ij")
-    ones = np.ones_like(x)
-    coords = np.stack([x.ravel(), y.ravel(), ones.ravel()]).astype(float)
+    M = np.array([
+        [fx, 0,  (fx - 1) / 2],
+        [0,  fy, (fy - 1) / 2],
+        [0,  0,  1]
+    ])
+    return M, (nova_altura, nova_largura)
 
+def matriz_espelhamento(mode, altura, largura):
+    """Matriz 3x3 do espelhamento em torno do eixo central da imagem."""
     if mode == "horizontal":
-        M = np.array([
-            [-1, 0, 0],
+        return np.array([
+            [-1, 0, largura - 1],
             [0,  1, 0],
             [0,  0, 1]
         ])
-        coords[0] -= largura/2
-        coords = M @ coords
-        coords[0] += largura/2
-
-    elif mode == "vertical":
-        M = np.array([
-            [1,  0, 0],
-            [0, -1, 0],
-            [0,  0, 1]
-        ])
-        coords[1] -= altura/2
-        coords = M @ coords
-        coords[1] += altura/2
-
-    new_x = np.round(coords[0]).astype(int)
-    new_y = np.round(coords[1]).astype(int)
-
-    mirrored = np.zeros_like(matrix)
-    mask = (0 <= new_x) & (new_x < largura) & (0 <= new_y) & (new_y < altura)
-    mirrored[new_y[mask], new_x[mask]] = matrix[y.ravel()[mask], x.ravel()[mask]]
-
-    return mirrored
+    return np.array([
+        [1,  0, 0],
+        [0, -1, altura - 1],
+        [0,  0, 1]
+    ])
 
-def rotacionar(matrix, angle_degrees):
+def matriz_rotacao(angle_degrees, altura, largura):
+    """Matriz 3x3 (em coordenadas x, y, 1) da rotação em torno do centro da imagem."""
     angle = np.radians(angle_degrees)
     cos_t, sin_t = np.cos(angle), np.sin(angle)
+    # Centro do pixel central, para que 90°, 180° e 270° sejam permutações exatas
+    cx, cy = (largura - 1) / 2, (altura - 1) / 2
 
-    altura, largura = matrix.shape[:2]
-
-    y, x = np.meshgrid(np.arange(altura), np.arange(largura), indexing="ij")
-    ones = np.ones_like(x)
-    coords = np.stack([x.ravel(), y.ravel(), ones.ravel()]).astype(float)
-
-    cx, cy = largura / 2, altura / 2
-    coords[0] -= cx
-    coords[1] -= cy
-
-    M = np.array([
-        [cos_t, -sin_t, 0],
-        [sin_t,  cos_t, 0],
+    return np.array([
+        [cos_t, -sin_t, cx - cos_t * cx + sin_t * cy],
+        [sin_t,  cos_t, cy - sin_t * cx - cos_t * cy],
         [0,      0,     1]
     ])
 
-    new_coords = M @ coords
-
-    new_coords[0] += cx
-    new_coords[1] += cy
-
-    new_x = np.round(new_coords[0]).astype(int)
-    new_y = np.round(new_coords[1]).astype(int)
+def _rotacionar_90(matrix, quartos):
+    """Rotação horária de quartos * 90° sem reamostrar, no mesmo formato da entrada.
+
+    Returns:
+        visão da matriz (180° ou imagem quadrada), cópia da região comum
+        (retângulo com diferença par entre os lados) ou None se o centro
+        rotacionado não cai sobre um pixel
+    """
+    if quartos == 0:
+        return matrix
+    # np.rot90 gira no sentido anti-horário; a matriz de rotação é horária
+    girada = np.rot90(matrix, -quartos)
+    altura, largura = matrix.shape[:2]
+    if girada.shape[:2] == (altura, largura):
+        return girada
 
+    diferenca = altura - largura
+    if diferenca % 2:
+        return None
+    d = abs(diferenca) // 2
     rotated = np.zeros_like(matrix)
-
-    mask = (0 <= new_x) & (new_x < largura) & (0 <= new_y) & (new_y < altura)
-    rotated[new_y[mask], new_x[mask]] = matrix[y.ravel()[mask], x.ravel()[mask]]
-
+    if diferenca > 0:
+        rotated[d:d+largura] = girada[:, d:d+largura]
+    else:
+        rotated[:, d:d+altura] = girada[d:d+altura]
     return rotated
 
+@memorizar
+def rotacionar(matrix, angle_degrees, interpolacao="bilinear"):
+    altura, largura = matrix.shape[:2]
+    if angle_degrees % 90 == 0:
+        rotated = _rotacionar_90(matrix, int(angle_degrees // 90) % 4)
+        if rotated is not None:
+            return rotated
+
+    M = matriz_rotacao(angle_degrees, altura, largura)
 
+    # Mapeamento inverso: cada pixel de saída busca sua origem na imagem
+    return reamostrar_afim(matrix, np.linalg.inv(M), interpolacao=interpolacao)
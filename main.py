@@ -1,9 +1,74 @@
 import tkinter as tk
+from tkinter import ttk
 
 from menus import MenuManager
 from backend.image_manager import ImageManager
+from backend.previa import abrir_previa, compor_parcial
+from backend.tarefas import ExecutorTarefas
+import numpy as np
 from PIL import Image, ImageTk
 
+# Lado do quadrado onde cada imagem é exibida
+TAMANHO_PAINEL = 500
+
+
+class PainelImagem:
+    """Canvas de tamanho fixo com uma única PhotoImage, reaproveitada a cada atualização.
+
+    Em vez de criar um Label e uma PhotoImage novos a cada exibição, os pixels
+    novos são colados (paste) na PhotoImage existente, e só quando a versão do
+    conteúdo mudou.
+    """
+
+    def __init__(self, pai, coluna, tamanho=TAMANHO_PAINEL):
+        self.tamanho = tamanho
+        self.canvas = tk.Canvas(pai, width=tamanho, height=tamanho, highlightthickness=0)
+        self.canvas.grid(row=0, column=coluna, padx=5, pady=5, sticky='nsew')
+        self.fundo = tuple(c // 256 for c in self.canvas.winfo_rgb(self.canvas['background']))
+        self.foto = ImageTk.PhotoImage('RGB', (tamanho, tamanho))
+        self.item = self.canvas.create_image(tamanho // 2, tamanho // 2, image=self.foto,
+                                             state=tk.HIDDEN)
+        self.texto = self.canvas.create_text(tamanho // 2, tamanho // 2, state=tk.HIDDEN)
+        self.versao = None
+
+    def mostrar(self, imagem, versao=None, texto=""):
+        """Exibe uma PIL Image ou matriz, reduzida para caber no painel.
+
+        Args:
+            versao: identificador do conteúdo; se for igual ao da última
+                exibição nada é redesenhado (None redesenha sempre)
+            texto: mensagem exibida quando `imagem` é None
+        """
+        if versao is not None and versao == self.versao:
+            return
+        self.versao = versao
+        if imagem is None:
+            self.canvas.itemconfigure(self.item, state=tk.HIDDEN)
+            self.canvas.itemconfigure(self.texto, text=texto, state=tk.NORMAL)
+            return
+
+        if isinstance(imagem, np.ndarray):
+            imagem = Image.fromarray(imagem)
+        if imagem.width > self.tamanho or imagem.height > self.tamanho:
+            if imagem.width > imagem.height:
+                w = self.tamanho
+                h = int((self.tamanho / imagem.width) * imagem.height)
+            else:
+                h = self.tamanho
+                w = int((self.tamanho / imagem.height) * imagem.width)
+            imagem = imagem.resize((w, h))
+
+        # A PhotoImage tem o tamanho do painel: a imagem vai centralizada sobre o fundo
+        quadro = Image.new('RGB', (self.tamanho, self.tamanho), self.fundo)
+        posicao = ((self.tamanho - imagem.width) // 2, (self.tamanho - imagem.height) // 2)
+        if imagem.mode in ('RGBA', 'LA'):
+            quadro.paste(imagem.convert('RGB'), posicao, imagem.getchannel('A'))
+        else:
+            quadro.paste(imagem.convert('RGB'), posicao)
+        self.foto.paste(quadro)
+        self.canvas.itemconfigure(self.texto, state=tk.HIDDEN)
+        self.canvas.itemconfigure(self.item, state=tk.NORMAL)
+
 
 class MainWindow:
     def __init__(self):
@@ -13,6 +78,11 @@ class MainWindow:
 
         self.image_manager = ImageManager()
         self.image_manager.set_root(self)
+        # Operações pesadas rodam numa thread de trabalho; o Tk só recebe o resultado
+        self.tarefas = ExecutorTarefas(self.root.after, self.mostrar_progresso)
+        # Prévia da entrada da operação em andamento e faixas do resultado já exibidas
+        self._base_parcial = None
+        self._parciais_exibidas = 0
         self.menu_manager = MenuManager(self.root, self.on_menu_click, self.image_manager)
         self.create_widgets()
 
@@ -67,16 +137,102 @@ class MainWindow:
         self.image_frame.grid_columnconfigure(0, weight=1) 
         self.image_frame.grid_columnconfigure(1, weight=1)  
         
-        self.original_image_label = None
-        self.modified_image_label = None
+        self.painel_original = PainelImagem(self.image_frame, 0)
+        self.painel_modificado = PainelImagem(self.image_frame, 1)
+        
+        self.historico_frame = tk.Frame(self.root)
+        self.historico_frame.grid(row=4, column=0, pady=10, sticky='nsew')
+        
+        self.undo_button = tk.Button(self.historico_frame, text="Desfazer", command=self.desfazer)
+        self.undo_button.pack(side=tk.LEFT, padx=5, expand=True, fill=tk.X)
+        self.reset_image = tk.Button(self.historico_frame, text="Resetar imagem", command=self.resetar_imagem)
+        self.reset_image.pack(side=tk.LEFT, padx=5, expand=True, fill=tk.X)
+        self.redo_button = tk.Button(self.historico_frame, text="Refazer", command=self.refazer)
+        self.redo_button.pack(side=tk.LEFT, padx=5, expand=True, fill=tk.X)
+        
+        self.root.bind('<Control-z>', lambda e: self.desfazer())
+        self.root.bind('<Control-y>', lambda e: self.refazer())
+        
+        self.progresso_frame = tk.Frame(self.root)
+        self.progresso_frame.grid(row=5, column=0, pady=5, sticky='ew')
+        
+        self.barra_progresso = ttk.Progressbar(self.progresso_frame, maximum=1.0)
+        self.barra_progresso.pack(side=tk.LEFT, padx=5, expand=True, fill=tk.X)
+        self.status_texto = tk.Label(self.progresso_frame, text="")
+        self.status_texto.pack(side=tk.LEFT, padx=5)
+        self.cancel_button = tk.Button(self.progresso_frame, text="Cancelar", state=tk.DISABLED,
+                                       command=self.tarefas.cancelar)
+        self.cancel_button.pack(side=tk.LEFT, padx=5)
         
-        self.reset_image = tk.Button(self.root, text="Resetar imagem", command=self.resetar_imagem)
-        self.reset_image.grid(row=4, column=0, pady=10, sticky='nsew')
+        self.root.bind('<Escape>', lambda e: self.tarefas.cancelar())
+        
+    def aplicar(self, operacao, raio=0, etapas=()):
+        """Aplica uma operação à imagem editada em segundo plano e mostra o resultado.
+
+        A imagem de entrada é lida quando a operação começa (depois das que já
+        estão na fila); se ela mudar antes do fim (desfazer, reset), o
+        resultado é descartado. Enquanto a operação roda, as faixas já
+        calculadas aparecem no painel da imagem modificada (mostrar_progresso).
+        `etapas` descreve a operação no pipeline gravado (ver backend.operacoes).
+        """
+        entrada = None
+        
+        def preparar():
+            nonlocal entrada
+            entrada = self.image_manager.get_edited_matrix()
+            if entrada is None:
+                raise ValueError("Nenhuma imagem foi carregada ainda")
+            self._restaurar_parcial()
+            self._base_parcial = self.image_manager.get_display_matrix()
+            return entrada
+        
+        def concluir(resultado):
+            if self.image_manager.get_edited_matrix() is not entrada:
+                print("A imagem mudou durante a operação; resultado descartado")
+                return
+            self._parciais_exibidas = 0
+            self.image_manager.set_edited_matrix(resultado, etapas)
+            self.mostrar_modificacoes()
+        
+        self.tarefas.executar(lambda matriz: self.image_manager.calcular(matriz, operacao, raio),
+                              concluir, preparar=preparar)
+    
+    def mostrar_progresso(self, fracao, mensagem=None):
+        # None: nenhuma operação em andamento (mensagem: por exemplo, se foi cancelada)
+        self.barra_progresso['value'] = fracao or 0
+        self.status_texto.config(text=mensagem or "")
+        self.cancel_button.config(state=tk.DISABLED if fracao is None else tk.NORMAL)
+        if fracao is None:
+            self._restaurar_parcial()
+            return
+        # Exibição progressiva: redesenha só quando mais faixas ficaram prontas
+        tarefa = self.tarefas.tarefa_em_andamento
+        parcial = tarefa.parcial if tarefa is not None else None
+        if parcial is None or self._base_parcial is None or len(parcial.prontas) <= self._parciais_exibidas:
+            return
+        quadro = compor_parcial(self._base_parcial, parcial.saida, parcial.prontas)
+        if quadro is not None:
+            self._parciais_exibidas = len(parcial.prontas)
+            self.mostrar_previa(quadro)
+    
+    def _restaurar_parcial(self):
+        # Depois de um cancelamento, tira o resultado parcial do painel
+        if self._parciais_exibidas:
+            self._parciais_exibidas = 0
+            self.mostrar_modificacoes()
         
     def resetar_imagem(self):
         self.image_manager.reset_to_original()
         self.mostrar_modificacoes()
     
+    def desfazer(self):
+        if self.image_manager.desfazer():
+            self.mostrar_modificacoes()
+    
+    def refazer(self):
+        if self.image_manager.refazer():
+            self.mostrar_modificacoes()
+    
     def on_menu_click(self, menu_item):
         print(f"Selecionou o item de menu: {menu_item}")
         if "imagem aberta" in menu_item.lower():
@@ -92,50 +248,24 @@ class MainWindow:
         
     def mostrar_modificacoes(self):
         print("Mostrando modificações...")
-        if self.modified_image_label is not None:
-            self.modified_image_label.destroy()
-            
-        edited_matrix = self.image_manager.get_edited_matrix()
-        if edited_matrix is not None:
-            image = Image.fromarray(edited_matrix)
-            w = 0
-            h = 0
-            if image.width > 500 or image.height > 500:
-                if image.width > image.height:
-                    w = 500
-                    h = int((500 / image.width) * image.height)
-                else:
-                    h = 500
-                    w = int((500 / image.height) * image.width)
-                image = image.resize((w, h))
-            photo = ImageTk.PhotoImage(image)
-            self.modified_image_label = tk.Label(self.image_frame, image=photo)
-            self.modified_image_label.image = photo
-            self.modified_image_label.grid(row=0, column=1, padx=5, pady=5, sticky='nsew')
-        else:
-            self.modified_image_label = tk.Label(self.image_frame, text="Nenhuma imagem editada disponível")
-            self.modified_image_label.grid(row=0, column=1, padx=5, pady=5, sticky='nsew')
+        # Nível da pirâmide de prévia (no máximo 2x o tamanho exibido): o resize
+        # não depende da resolução da imagem. Sem mudança na imagem, nada é redesenhado
+        matriz = self.image_manager.get_display_matrix()
+        self.painel_modificado.mostrar(matriz, versao=self.image_manager.versao,
+                                       texto="Nenhuma imagem editada disponível")
+        
+    def mostrar_previa(self, matriz):
+        # Exibe uma matriz já reduzida no painel da imagem modificada (usada pelas
+        # prévias ao vivo dos diálogos, sem alterar a imagem editada)
+        self.painel_modificado.mostrar(matriz)
         
     def mostrar_imagem(self, image_path):
-        if self.original_image_label is not None:
-            self.original_image_label.destroy()
-            
-        image = Image.open(image_path)
-        w = 0
-        h = 0
-        if image.width > 500 or image.height > 500:
-            if image.width > image.height:
-                w = 500
-                h = int((500 / image.width) * image.height)
-            else:
-                h = 500
-                w = int((500 / image.height) * image.width)
-            image = image.resize((w, h))
-        photo = ImageTk.PhotoImage(image)
-
-        self.original_image_label = tk.Label(self.image_frame, image=photo)
-        self.original_image_label.image = photo
-        self.original_image_label.grid(row=0, column=0, padx=5, pady=5, sticky='nsew')
+        if self.image_manager.mapeada:
+            image = Image.fromarray(self.image_manager.get_display_matrix(use_original=True))
+        else:
+            # Decodifica já reduzido (draft() em JPEGs), sem passar pela resolução cheia
+            image = abrir_previa(image_path)
+        self.painel_original.mostrar(image)
 
 
 if __name__ == "__main__":
@@ -1,10 +1,15 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox
+from backend import pipeline
+from backend.cache import cache_resultados
 
 def criar_menu_arquivo(root, callback, image_manager):
     menu = tk.Menu(root, tearoff=0)
     menu.add_command(label="Abrir imagem", command=lambda: abrir_imagem(image_manager, callback))
     menu.add_command(label="Salvar imagem", command=lambda: salvar_imagem(image_manager, callback))
+    menu.add_command(label="Salvar pipeline", command=lambda: salvar_pipeline(image_manager, callback))
+    menu.add_command(label="Aplicar pipeline", command=lambda: aplicar_pipeline(image_manager, callback))
+    menu.add_command(label="Estatísticas do cache", command=lambda: mostrar_estatisticas_cache())
     menu.add_command(label="Sobre", command=lambda: mostrar_sobre())
     menu.add_separator()
     menu.add_command(label="Sair", command=root.quit)
@@ -13,7 +18,7 @@ def criar_menu_arquivo(root, callback, image_manager):
 def abrir_imagem(image_manager, callback):
     file_path = filedialog.askopenfilename(
         title="Abrir Imagem",
-        filetypes=[("Image Files", "*.png;*.jpg;*.jpeg;*.bmp;*.tiff"), ("All Files", "*.*")]
+        filetypes=[("Image Files", "*.png;*.jpg;*.jpeg;*.bmp;*.tif;*.tiff;*.npy"), ("All Files", "*.*")]
     )
     if file_path:
         try:
@@ -32,7 +37,8 @@ def salvar_imagem(image_manager, callback):
         title="Salvar Imagem",
         defaultextension=".png",
         filetypes=[("PNG files", "*.png"), ("JPEG files", "*.jpg;*.jpeg"), 
-                  ("BMP files", "*.bmp"), ("TIFF files", "*.tiff"), ("All Files", "*.*")]
+                  ("BMP files", "*.bmp"), ("TIFF files", "*.tif;*.tiff"), ("NumPy files", "*.npy"),
+                  ("All Files", "*.*")]
     )
     
     if file_path:
@@ -43,6 +49,53 @@ def salvar_imagem(image_manager, callback):
         except Exception as e:
             messagebox.showerror("Erro", f"Erro ao salvar a imagem: {str(e)}")
 
+def salvar_pipeline(image_manager, callback):
+    etapas = image_manager.get_pipeline()
+    if not etapas:
+        messagebox.showwarning("Aviso", "Nenhuma operação aplicada para salvar")
+        return
+
+    file_path = filedialog.asksaveasfilename(
+        title="Salvar Pipeline",
+        defaultextension=".json",
+        filetypes=[("JSON files", "*.json"), ("All Files", "*.*")]
+    )
+    if file_path:
+        try:
+            pipeline.salvar(etapas, file_path)
+            callback(f"Pipeline salvo: {file_path}")
+        except Exception as e:
+            messagebox.showerror("Erro", f"Erro ao salvar o pipeline: {str(e)}")
+
+def aplicar_pipeline(image_manager, callback):
+    if image_manager.get_edited_matrix() is None:
+        messagebox.showwarning("Aviso", "Nenhuma imagem aberta")
+        return
+
+    file_path = filedialog.askopenfilename(
+        title="Aplicar Pipeline",
+        filetypes=[("JSON files", "*.json"), ("All Files", "*.*")]
+    )
+    if file_path:
+        try:
+            etapas = pipeline.carregar(file_path)
+        except Exception as e:
+            messagebox.showerror("Erro", f"Erro ao abrir o pipeline: {str(e)}")
+            return
+        image_manager.root.aplicar(lambda matriz: image_manager.reproduzir_pipeline(matriz, etapas),
+                                   raio=None, etapas=etapas)
+        callback(f"Pipeline aplicado: {file_path}")
+
+def mostrar_estatisticas_cache():
+    estatisticas = cache_resultados.estatisticas()
+    messagebox.showinfo("Estatísticas do cache",
+        f"Acertos: {estatisticas['acertos']}\n" +
+        f"Falhas: {estatisticas['falhas']}\n" +
+        f"Taxa de acerto: {estatisticas['taxa_acerto']:.0%}\n\n" +
+        f"Resultados guardados: {estatisticas['entradas']}\n" +
+        f"Memória: {estatisticas['bytes'] / 2**20:.1f} MB de "
+        f"{cache_resultados.limite_bytes / 2**20:.0f} MB")
+
 def mostrar_sobre():
     messagebox.showinfo("Sobre", 
         "Image Stream\n\n" +
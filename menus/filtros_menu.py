@@ -4,9 +4,10 @@ from backend import filtros
 from backend.filtros_frequencias import (
     filtro_mediana, filtro_gaussiano, 
     filtro_laplaciano, filtro_sobel,
-    limiarizacao_global
+    limiarizacao_global, filtro_frequencia, raio_gaussiano
 )
-from .utils import janela_base
+from backend.gradientes import PAD as RAIO_GRADIENTES
+from .utils import PreviaInterativa, janela_base
 
 def criar_menu_filtros(root, callback, image_manager):
     menu = tk.Menu(root, tearoff=0)
@@ -23,11 +24,13 @@ def criar_menu_filtros(root, callback, image_manager):
     submenu_pa.add_command(label="Sobel", command=lambda: filtro_sobel_janela(image_manager))
     menu.add_cascade(label="Passa-alta", menu=submenu_pa)
     
+    menu.add_command(label="Domínio da frequência", command=lambda: filtro_frequencia_janela(image_manager))
+    
     menu.add_command(label="Limiarização", command=lambda: limiarizacao_global_janela(image_manager))
     return menu
 
 def brilho_contraste_janela(image_manager):
-    janela = janela_base("Brilho e Contraste")
+    janela = janela_base("Brilho e Contraste", altura=240)
     
     label_brilho = tk.Label(janela, text="Brilho:")
     label_brilho.pack()
@@ -39,10 +42,14 @@ def brilho_contraste_janela(image_manager):
     input_contraste = tk.Entry(janela)
     input_contraste.pack()
     
+    previa = PreviaInterativa(janela, image_manager, lambda proxy, escala: filtros.brilho_contraste(
+        proxy, *ler_brilho_contraste(input_brilho.get(), input_contraste.get())))
+    previa.vincular(input_brilho, input_contraste)
+    
     botao = tk.Button(janela, text="Aplicar", command=lambda: aplicar_brilho_contraste(image_manager, input_brilho.get(), input_contraste.get()))
     botao.pack(pady=10)
 
-def aplicar_brilho_contraste(image_manager, brilho, contraste):
+def ler_brilho_contraste(brilho, contraste):
     try:
         brilho = float(brilho)
     except ValueError:
@@ -51,20 +58,19 @@ def aplicar_brilho_contraste(image_manager, brilho, contraste):
         contraste = float(contraste)
     except ValueError:
         contraste = 1.0
-    edi_matrix = image_manager.get_edited_matrix()
-    matrix = filtros.brilho_contraste(edi_matrix, brilho, contraste)
-    image_manager.set_edited_matrix(matrix)
-    image_manager.root.mostrar_modificacoes()
+    return brilho, contraste
+
+def aplicar_brilho_contraste(image_manager, brilho, contraste):
+    brilho, contraste = ler_brilho_contraste(brilho, contraste)
+    image_manager.root.aplicar(lambda matriz: filtros.brilho_contraste(matriz, brilho, contraste),
+                               etapas=[('brilho_contraste', {'brilho': brilho, 'contraste': contraste})])
 
 def grayscale_janela(image_manager):
     janela = janela_base("Grayscale")
     botao = tk.Button(janela, text="Aplicar", command=lambda: aplicar_grayscale(image_manager))
     botao.pack(pady=10)
 def aplicar_grayscale(image_manager):
-    edi_matrix = image_manager.get_edited_matrix()
-    matrix = filtros.grayscale(edi_matrix)
-    image_manager.set_edited_matrix(matrix)
-    image_manager.root.mostrar_modificacoes()
+    image_manager.root.aplicar(filtros.grayscale, etapas=[('grayscale', {})])
 
 def filtro_mediana_janela(image_manager):
     janela = janela_base("Filtro de Mediana")
@@ -86,13 +92,11 @@ def aplicar_filtro_mediana(image_manager, kernel_size):
     except ValueError:
         kernel_size = 3
     
-    edi_matrix = image_manager.get_edited_matrix()
-    matrix = filtro_mediana(edi_matrix, tamanho_kernel=kernel_size)
-    image_manager.set_edited_matrix(matrix)
-    image_manager.root.mostrar_modificacoes()
+    image_manager.root.aplicar(lambda matriz: filtro_mediana(matriz, tamanho_kernel=kernel_size),
+                               raio=kernel_size // 2, etapas=[('mediana', {'tamanho': kernel_size})])
 
 def filtro_gaussiano_janela(image_manager):
-    janela = janela_base("Filtro Gaussiano")
+    janela = janela_base("Filtro Gaussiano", altura=230)
     
     label_sigma = tk.Label(janela, text="Sigma (desvio padrão):")
     label_sigma.pack()
@@ -100,19 +104,80 @@ def filtro_gaussiano_janela(image_manager):
     input_sigma.insert(0, "1.0")  
     input_sigma.pack()
     
+    # O sigma é em pixels: no proxy reduzido ele encolhe na mesma proporção
+    previa = PreviaInterativa(janela, image_manager, lambda proxy, escala: filtro_gaussiano(
+        proxy, sigma=ler_sigma(input_sigma.get()) * escala))
+    previa.vincular(input_sigma)
+    
     botao = tk.Button(janela, text="Aplicar", command=lambda: aplicar_filtro_gaussiano(image_manager, input_sigma.get()))
     botao.pack(pady=10)
 
-def aplicar_filtro_gaussiano(image_manager, sigma):
+def ler_sigma(sigma):
     try:
         sigma = float(sigma)
     except ValueError:
         sigma = 1.0
+    return sigma if sigma > 0 else 1.0
+
+def aplicar_filtro_gaussiano(image_manager, sigma):
+    sigma = ler_sigma(sigma)
     
-    edi_matrix = image_manager.get_edited_matrix()
-    matrix = filtro_gaussiano(edi_matrix, sigma=sigma)
-    image_manager.set_edited_matrix(matrix)
-    image_manager.root.mostrar_modificacoes()
+    image_manager.root.aplicar(
+        lambda matriz: filtro_gaussiano(matriz, sigma=sigma, cache=image_manager.cache_espectro),
+        raio=raio_gaussiano(sigma), etapas=[('gaussiano', {'sigma': sigma})])
+
+def filtro_frequencia_janela(image_manager):
+    janela = janela_base("Filtro no Domínio da Frequência", altura=420)
+    
+    label_tipo = tk.Label(janela, text="Tipo:")
+    label_tipo.pack()
+    tipo_var = tk.StringVar(value="gaussiano")
+    tk.Radiobutton(janela, text="Ideal", variable=tipo_var, value="ideal").pack()
+    tk.Radiobutton(janela, text="Butterworth", variable=tipo_var, value="butterworth").pack()
+    tk.Radiobutton(janela, text="Gaussiano", variable=tipo_var, value="gaussiano").pack()
+    
+    passa_var = tk.StringVar(value="baixa")
+    tk.Radiobutton(janela, text="Passa-baixa", variable=passa_var, value="baixa").pack()
+    tk.Radiobutton(janela, text="Passa-alta", variable=passa_var, value="alta").pack()
+    
+    label_corte = tk.Label(janela, text="Raio de corte (D0):")
+    label_corte.pack()
+    input_corte = tk.Entry(janela)
+    input_corte.insert(0, "30")
+    input_corte.pack()
+    
+    label_ordem = tk.Label(janela, text="Ordem (Butterworth):")
+    label_ordem.pack()
+    input_ordem = tk.Entry(janela)
+    input_ordem.insert(0, "2")
+    input_ordem.pack()
+    
+    botao = tk.Button(janela, text="Aplicar",
+                     command=lambda: aplicar_filtro_frequencia(image_manager,
+                                                             tipo_var.get(),
+                                                             passa_var.get(),
+                                                             input_corte.get(),
+                                                             input_ordem.get()))
+    botao.pack(pady=10)
+
+def aplicar_filtro_frequencia(image_manager, tipo, passa, corte, ordem):
+    try:
+        corte = float(corte)
+        if corte <= 0:
+            corte = 30.0
+    except ValueError:
+        corte = 30.0
+    try:
+        ordem = int(ordem)
+        if ordem < 1:
+            ordem = 2
+    except ValueError:
+        ordem = 2
+    
+    image_manager.root.aplicar(lambda matriz: filtro_frequencia(
+        matriz, tipo=tipo, passa=passa, corte=corte, ordem=ordem,
+        cache=image_manager.cache_espectro), raio=None,
+        etapas=[('frequencia', {'tipo': tipo, 'passa': passa, 'corte': corte, 'ordem': ordem})])
 
 def filtro_laplaciano_janela(image_manager):
     janela = janela_base("Filtro Laplaciano")
@@ -134,10 +199,9 @@ def aplicar_filtro_laplaciano(image_manager, kernel_size):
     except ValueError:
         kernel_size = 3
     
-    edi_matrix = image_manager.get_edited_matrix()
-    matrix = filtro_laplaciano(edi_matrix, ksize=kernel_size)
-    image_manager.set_edited_matrix(matrix)
-    image_manager.root.mostrar_modificacoes()
+    image_manager.root.aplicar(lambda matriz: filtro_laplaciano(
+        matriz, ksize=kernel_size, gradientes=image_manager.get_gradientes(matriz)), raio=RAIO_GRADIENTES,
+        etapas=[('laplaciano', {'ksize': kernel_size})])
 
 def filtro_sobel_janela(image_manager):
     janela = janela_base("Filtro Sobel", altura=300)
@@ -170,13 +234,12 @@ def aplicar_filtro_sobel(image_manager, direcao, kernel_size):
     except ValueError:
         kernel_size = 3
     
-    edi_matrix = image_manager.get_edited_matrix()
-    matrix = filtro_sobel(edi_matrix, direcao=direcao, ksize=kernel_size)
-    image_manager.set_edited_matrix(matrix)
-    image_manager.root.mostrar_modificacoes()
+    image_manager.root.aplicar(lambda matriz: filtro_sobel(
+        matriz, direcao=direcao, ksize=kernel_size, gradientes=image_manager.get_gradientes(matriz)),
+        raio=RAIO_GRADIENTES, etapas=[('sobel', {'direcao': direcao, 'ksize': kernel_size})])
 
 def limiarizacao_global_janela(image_manager): 
-    janela = janela_base("Limiarização Global(Threshold)")
+    janela = janela_base("Limiarização Global(Threshold)", altura=260)
     
     label_limiar = tk.Label(janela, text="Valor do limiar (0-255):")
     label_limiar.pack()
@@ -190,13 +253,17 @@ def limiarizacao_global_janela(image_manager):
     input_max.insert(0, "255")  
     input_max.pack()
     
+    previa = PreviaInterativa(janela, image_manager, lambda proxy, escala: limiarizacao_global(
+        proxy, *ler_limiares(input_limiar.get(), input_max.get())))
+    previa.vincular(input_limiar, input_max)
+    
     botao = tk.Button(janela, text="Aplicar", 
                      command=lambda: aplicar_limiarizacao_global(image_manager, 
                                                                input_limiar.get(),
                                                                input_max.get()))
     botao.pack(pady=10)
 
-def aplicar_limiarizacao_global(image_manager, limiar, valor_max):
+def ler_limiares(limiar, valor_max):
     try:
         limiar = int(limiar)
         if not 0 <= limiar <= 255:
@@ -210,9 +277,10 @@ def aplicar_limiarizacao_global(image_manager, limiar, valor_max):
             valor_max = 255
     except ValueError:
         valor_max = 255
-    
-    edi_matrix = image_manager.get_edited_matrix()
-    matrix = limiarizacao_global(edi_matrix, limiar=limiar, valor_max=valor_max)
-    image_manager.set_edited_matrix(matrix)
-    image_manager.root.mostrar_modificacoes()
-    image_manager.root.mostrar_modificacoes()
\ No newline at end of file
+    return limiar, valor_max
+
+def aplicar_limiarizacao_global(image_manager, limiar, valor_max):
+    limiar, valor_max = ler_limiares(limiar, valor_max)
+    image_manager.root.aplicar(lambda matriz: limiarizacao_global(
+        matriz, limiar=limiar, valor_max=valor_max, gradientes=image_manager.get_gradientes(matriz)),
+        etapas=[('limiarizacao', {'limiar': limiar, 'valor_max': valor_max})])
\ No newline at end of file
@@ -1,7 +1,8 @@
 import tkinter as tk
 from backend.morfologiaMatematica import (
     criar_elemento_estruturante, erosao,
-    dilatacao, abertura, fechamento, afinamento
+    dilatacao, abertura, fechamento, afinamento,
+    gradiente_morfologico, top_hat, black_hat
 )
 from .utils import janela_base
 
@@ -11,6 +12,9 @@ def criar_menu_morfologia(root, callback, image_manager):
     menu.add_command(label="Erosão", command=lambda: erosao_janela(image_manager))
     menu.add_command(label="Abertura", command=lambda: abertura_janela(image_manager))
     menu.add_command(label="Fechamento", command=lambda: fechamento_janela(image_manager))
+    menu.add_command(label="Gradiente morfológico", command=lambda: gradiente_janela(image_manager))
+    menu.add_command(label="Top-hat", command=lambda: top_hat_janela(image_manager))
+    menu.add_command(label="Black-hat", command=lambda: black_hat_janela(image_manager))
     menu.add_command(label="Afinamento", command=lambda: afinamento_janela(image_manager))
     return menu
 
@@ -22,6 +26,9 @@ def criar_controles_elemento_estruturante(janela):
     forma_var = tk.StringVar(value="quadrado")
     tk.Radiobutton(janela, text="Quadrado", variable=forma_var, value="quadrado").pack()
     tk.Radiobutton(janela, text="Cruz", variable=forma_var, value="cruz").pack()
+    tk.Radiobutton(janela, text="Disco", variable=forma_var, value="disco").pack()
+    tk.Radiobutton(janela, text="Linha horizontal", variable=forma_var, value="linha_horizontal").pack()
+    tk.Radiobutton(janela, text="Linha vertical", variable=forma_var, value="linha_vertical").pack()
     
     label_tamanho = tk.Label(janela, text="Tamanho (3, 5, 7, ...):")
     label_tamanho.pack()
@@ -32,7 +39,7 @@ def criar_controles_elemento_estruturante(janela):
     return forma_var, input_tamanho
 
 def dilatacao_janela(image_manager):
-    janela = janela_base("Dilatação", altura=300)
+    janela = janela_base("Dilatação", altura=380)
     forma_var, input_tamanho = criar_controles_elemento_estruturante(janela)
     
     botao = tk.Button(janela, text="Aplicar",
@@ -42,7 +49,7 @@ def dilatacao_janela(image_manager):
     botao.pack(pady=10)
 
 def erosao_janela(image_manager):
-    janela = janela_base("Erosão", altura=300)
+    janela = janela_base("Erosão", altura=380)
     forma_var, input_tamanho = criar_controles_elemento_estruturante(janela)
     
     botao = tk.Button(janela, text="Aplicar",
@@ -52,7 +59,7 @@ def erosao_janela(image_manager):
     botao.pack(pady=10)
 
 def abertura_janela(image_manager):
-    janela = janela_base("Abertura", altura=300)
+    janela = janela_base("Abertura", altura=380)
     forma_var, input_tamanho = criar_controles_elemento_estruturante(janela)
     
     botao = tk.Button(janela, text="Aplicar",
@@ -62,7 +69,7 @@ def abertura_janela(image_manager):
     botao.pack(pady=10)
 
 def fechamento_janela(image_manager):
-    janela = janela_base("Fechamento", altura=300)
+    janela = janela_base("Fechamento", altura=380)
     forma_var, input_tamanho = criar_controles_elemento_estruturante(janela)
     
     botao = tk.Button(janela, text="Aplicar",
@@ -71,6 +78,36 @@ def fechamento_janela(image_manager):
                                                       input_tamanho.get()))
     botao.pack(pady=10)
 
+def gradiente_janela(image_manager):
+    janela = janela_base("Gradiente morfológico", altura=380)
+    forma_var, input_tamanho = criar_controles_elemento_estruturante(janela)
+    
+    botao = tk.Button(janela, text="Aplicar",
+                     command=lambda: aplicar_gradiente(image_manager,
+                                                     forma_var.get(),
+                                                     input_tamanho.get()))
+    botao.pack(pady=10)
+
+def top_hat_janela(image_manager):
+    janela = janela_base("Top-hat", altura=380)
+    forma_var, input_tamanho = criar_controles_elemento_estruturante(janela)
+    
+    botao = tk.Button(janela, text="Aplicar",
+                     command=lambda: aplicar_top_hat(image_manager,
+                                                   forma_var.get(),
+                                                   input_tamanho.get()))
+    botao.pack(pady=10)
+
+def black_hat_janela(image_manager):
+    janela = janela_base("Black-hat", altura=380)
+    forma_var, input_tamanho = criar_controles_elemento_estruturante(janela)
+    
+    botao = tk.Button(janela, text="Aplicar",
+                     command=lambda: aplicar_black_hat(image_manager,
+                                                     forma_var.get(),
+                                                     input_tamanho.get()))
+    botao.pack(pady=10)
+
 def afinamento_janela(image_manager):
     janela = janela_base("Afinamento", altura=280)
     
@@ -109,37 +146,50 @@ def aplicar_dilatacao(image_manager, forma, tamanho):
     tamanho = validar_tamanho(tamanho)
     elemento = criar_elemento_estruturante(forma, tamanho)
     
-    edi_matrix = image_manager.get_edited_matrix()
-    matrix = dilatacao(edi_matrix, elemento)
-    image_manager.set_edited_matrix(matrix)
-    image_manager.root.mostrar_modificacoes()
+    image_manager.root.aplicar(lambda matriz: dilatacao(matriz, elemento), raio=elemento.shape[0] // 2,
+                               etapas=[('dilatacao', {'forma': forma, 'tamanho': tamanho})])
 
 def aplicar_erosao(image_manager, forma, tamanho):
     tamanho = validar_tamanho(tamanho)
     elemento = criar_elemento_estruturante(forma, tamanho)
     
-    edi_matrix = image_manager.get_edited_matrix()
-    matrix = erosao(edi_matrix, elemento)
-    image_manager.set_edited_matrix(matrix)
-    image_manager.root.mostrar_modificacoes()
+    image_manager.root.aplicar(lambda matriz: erosao(matriz, elemento), raio=elemento.shape[0] // 2,
+                               etapas=[('erosao', {'forma': forma, 'tamanho': tamanho})])
 
 def aplicar_abertura(image_manager, forma, tamanho):
     tamanho = validar_tamanho(tamanho)
     elemento = criar_elemento_estruturante(forma, tamanho)
     
-    edi_matrix = image_manager.get_edited_matrix()
-    matrix = abertura(edi_matrix, elemento)
-    image_manager.set_edited_matrix(matrix)
-    image_manager.root.mostrar_modificacoes()
+    image_manager.root.aplicar(lambda matriz: abertura(matriz, elemento), raio=elemento.shape[0] // 2 * 2,
+                               etapas=[('abertura', {'forma': forma, 'tamanho': tamanho})])
 
 def aplicar_fechamento(image_manager, forma, tamanho):
     tamanho = validar_tamanho(tamanho)
     elemento = criar_elemento_estruturante(forma, tamanho)
     
-    edi_matrix = image_manager.get_edited_matrix()
-    matrix = fechamento(edi_matrix, elemento)
-    image_manager.set_edited_matrix(matrix)
-    image_manager.root.mostrar_modificacoes()
+    image_manager.root.aplicar(lambda matriz: fechamento(matriz, elemento), raio=elemento.shape[0] // 2 * 2,
+                               etapas=[('fechamento', {'forma': forma, 'tamanho': tamanho})])
+
+def aplicar_gradiente(image_manager, forma, tamanho):
+    tamanho = validar_tamanho(tamanho)
+    elemento = criar_elemento_estruturante(forma, tamanho)
+    
+    image_manager.root.aplicar(lambda matriz: gradiente_morfologico(matriz, elemento), raio=elemento.shape[0] // 2,
+                               etapas=[('gradiente', {'forma': forma, 'tamanho': tamanho})])
+
+def aplicar_top_hat(image_manager, forma, tamanho):
+    tamanho = validar_tamanho(tamanho)
+    elemento = criar_elemento_estruturante(forma, tamanho)
+    
+    image_manager.root.aplicar(lambda matriz: top_hat(matriz, elemento), raio=elemento.shape[0] // 2 * 2,
+                               etapas=[('top_hat', {'forma': forma, 'tamanho': tamanho})])
+
+def aplicar_black_hat(image_manager, forma, tamanho):
+    tamanho = validar_tamanho(tamanho)
+    elemento = criar_elemento_estruturante(forma, tamanho)
+    
+    image_manager.root.aplicar(lambda matriz: black_hat(matriz, elemento), raio=elemento.shape[0] // 2 * 2,
+                               etapas=[('black_hat', {'forma': forma, 'tamanho': tamanho})])
 
 def aplicar_afinamento(image_manager, iteracoes_str):
     try:
@@ -147,7 +197,5 @@ def aplicar_afinamento(image_manager, iteracoes_str):
     except ValueError:
         iteracoes = 10
     
-    edi_matrix = image_manager.get_edited_matrix()
-    matrix = afinamento(edi_matrix, iteracoes)
-    image_manager.set_edited_matrix(matrix)
-    image_manager.root.mostrar_modificacoes()
\ No newline at end of file
+    image_manager.root.aplicar(lambda matriz: afinamento(matriz, iteracoes), raio=None,
+                               etapas=[('afinamento', {'max_iteracoes': iteracoes})])
\ No newline at end of file
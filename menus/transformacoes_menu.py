@@ -1,6 +1,6 @@
 import tkinter as tk
 import backend.transformacoes as t
-from .utils import janela_base
+from .utils import PreviaInterativa, janela_base
 
 def criar_menu_transformacoes(root, callback, image_manager):
     menu = tk.Menu(root, tearoff=0)
@@ -33,24 +33,36 @@ def transladar(image_manager, x_shift=0, y_shift=0):
         y_shift = int(y_shift)
     except ValueError:
         y_shift = 0
-    edi_matrix = image_manager.get_edited_matrix()
-    matrix = t.transladar(edi_matrix, x_shift, y_shift)
-    image_manager.set_edited_matrix(matrix)
-    image_manager.root.mostrar_modificacoes()
+    image_manager.root.aplicar(lambda matriz: t.transladar(matriz, x_shift, y_shift), raio=None,
+                               etapas=[('translacao', {'x': x_shift, 'y': y_shift})])
     
 def rotacionar_janela(image_manager):
-    janela = janela_base("Rotacionar")
+    janela = janela_base("Rotacionar", altura=330)
     label = tk.Label(janela, text="Ângulo (em graus):")
     label.pack()
     slider_angulo = tk.Scale(janela, from_=0, to=360, orient=tk.HORIZONTAL)
     slider_angulo.pack()
-    botao = tk.Button(janela, text="Aplicar", command=lambda: rotacionar(image_manager, slider_angulo.get()))
+    label_interpolacao = tk.Label(janela, text="Interpolação:")
+    label_interpolacao.pack()
+    var = tk.StringVar(value="bilinear")
+    previa = PreviaInterativa(janela, image_manager, lambda proxy, escala: t.rotacionar(
+        proxy, slider_angulo.get(), var.get()))
+    slider_angulo.config(command=previa.agendar)
+    tk.Radiobutton(janela, text="Vizinho mais próximo", variable=var, value="vizinho", command=previa.agendar).pack()
+    tk.Radiobutton(janela, text="Bilinear", variable=var, value="bilinear", command=previa.agendar).pack()
+    tk.Radiobutton(janela, text="Bicúbica", variable=var, value="bicubica", command=previa.agendar).pack()
+    botao = tk.Button(janela, text="Aplicar", command=lambda: rotacionar(image_manager, slider_angulo.get(), var.get()))
     botao.pack(pady=10)
     
-def rotacionar(image_manager, angle):
-    edi_matrix = image_manager.get_edited_matrix()
-    matrix = t.rotacionar(edi_matrix, angle)
-    image_manager.set_edited_matrix(matrix)
+def rotacionar(image_manager, angle, interpolacao="bilinear"):
+    # Transformações geométricas ficam pendentes e são reamostradas juntas; até lá
+    # mostrar_modificacoes só transforma a prévia reduzida
+    altura, largura = image_manager.get_formato()
+    M = t.matriz_rotacao(angle, altura, largura)
+    image_manager.transformar(M, (altura, largura),
+                              lambda matrix: t.rotacionar(matrix, angle, interpolacao),
+                              interpolacao,
+                              etapa=('rotacao', {'angulo': angle, 'interpolacao': interpolacao}))
     image_manager.root.mostrar_modificacoes()
 
 def espelhar_janela(image_manager):
@@ -65,9 +77,11 @@ def espelhar_janela(image_manager):
     botao = tk.Button(janela, text="Aplicar", command=lambda: espelhar(image_manager, var.get()))
     botao.pack(pady=10)
 def espelhar(image_manager, mode):
-    edi_matrix = image_manager.get_edited_matrix()
-    matrix = t.espelhar(edi_matrix, mode)
-    image_manager.set_edited_matrix(matrix)
+    altura, largura = image_manager.get_formato()
+    M = t.matriz_espelhamento(mode, altura, largura)
+    image_manager.transformar(M, (altura, largura),
+                              lambda matrix: t.espelhar(matrix, mode),
+                              "vizinho", etapa=('espelhamento', {'direcao': mode}))
     image_manager.root.mostrar_modificacoes()
     
 def aumentar_janela(image_manager):
@@ -86,9 +100,7 @@ def aumentar(image_manager, factor):
         factor = int(factor)
     except ValueError:
         factor = 1
-    edi_matrix = image_manager.get_edited_matrix()
-    matrix = t.escala(edi_matrix, factor, factor)
-    image_manager.set_edited_matrix(matrix)
+    escalar(image_manager, factor)
     image_manager.root.mostrar_modificacoes()
 
 def diminuir_janela(image_manager):
@@ -105,8 +117,12 @@ def diminuir(image_manager, factor):
         factor = int(factor)
     except ValueError:
         factor = 1
-    edi_matrix = image_manager.get_edited_matrix()
-    matrix = t.escala(edi_matrix, 1/factor, 1/factor)
-    image_manager.set_edited_matrix(matrix)
+    escalar(image_manager, 1/factor)
     image_manager.root.mostrar_modificacoes()
-    
\ No newline at end of file
+
+def escalar(image_manager, fator):
+    altura, largura = image_manager.get_formato()
+    M, formato = t.matriz_escala(fator, fator, altura, largura)
+    image_manager.transformar(M, formato,
+                              lambda matrix: t.escala(matrix, fator, fator),
+                              "bilinear", etapa=('escala', {'fator': fator}))
@@ -1,8 +1,83 @@
 import tkinter as tk
 
+# Espera depois da última mudança nos controles antes de recalcular a prévia, em ms
+ATRASO_PREVIA_MS = 40
+
 def janela_base(nome, altura=200):
     janela = tk.Toplevel()
     janela.title(nome)
     janela.geometry(f"300x{altura}")
     tk.Label(janela, text=nome).pack(pady=20)
-    return janela
\ No newline at end of file
+    return janela
+
+
+class PreviaInterativa:
+    """Prévia ao vivo dos parâmetros de um diálogo, numa cópia reduzida da imagem.
+
+    A cópia (proxy) é o nível da pirâmide de prévia da imagem editada, com
+    lado entre 500 e 1000 pixels, obtida uma vez por diálogo. Cada mudança
+    nos controles só reagenda o cálculo (debounce), então uma sequência
+    rápida de mudanças calcula só a última. A imagem em resolução cheia só é
+    processada no "Aplicar"; ao fechar o diálogo volta a exibir a imagem editada.
+
+    Args:
+        janela: Toplevel do diálogo (recebe o checkbox "Prévia ao vivo")
+        image_manager: ImageManager com a imagem editada
+        operacao: função (proxy, escala) -> matriz; `escala` é o lado do proxy
+            dividido pelo da imagem, para ajustar parâmetros em pixels
+    """
+
+    def __init__(self, janela, image_manager, operacao):
+        self.janela = janela
+        self.image_manager = image_manager
+        self.operacao = operacao
+        self._agendado = None
+        self._origem = None
+        self._versao = None
+        self._proxy = None
+        self._escala = 1.0
+        self.ativa = tk.BooleanVar(value=True)
+        tk.Checkbutton(janela, text="Prévia ao vivo", variable=self.ativa,
+                       command=self.agendar).pack()
+        janela.bind('<Destroy>', self._fechar, add='+')
+
+    def vincular(self, *entradas):
+        """Recalcula a prévia a cada tecla digitada nas entradas."""
+        for entrada in entradas:
+            entrada.bind('<KeyRelease>', self.agendar, add='+')
+
+    def agendar(self, *_):
+        if self._agendado is not None:
+            self.janela.after_cancel(self._agendado)
+        self._agendado = self.janela.after(ATRASO_PREVIA_MS, self._atualizar)
+
+    def _obter_proxy(self):
+        # Refaz o proxy se a imagem editada mudou (ex.: depois de um "Aplicar")
+        manager = self.image_manager
+        if manager.edited_matrix is not self._origem or manager.versao != self._versao:
+            # Com transformações pendentes, o proxy já vem transformado
+            self._proxy = manager.get_display_matrix()
+            self._origem = manager.edited_matrix
+            self._versao = manager.versao
+            if self._proxy is not None:
+                self._escala = self._proxy.shape[1] / manager.get_formato()[1]
+        return self._proxy
+
+    def _atualizar(self):
+        self._agendado = None
+        if not self.ativa.get():
+            self.image_manager.root.mostrar_modificacoes()
+            return
+        proxy = self._obter_proxy()
+        if proxy is not None:
+            self.image_manager.root.mostrar_previa(self.operacao(proxy, self._escala))
+
+    def _fechar(self, evento):
+        # <Destroy> também chega para os widgets filhos
+        if evento.widget is not self.janela:
+            return
+        if self._agendado is not None:
+            self.janela.after_cancel(self._agendado)
+            self._agendado = None
+        if self._proxy is not None:
+            self.image_manager.root.mostrar_modificacoes()
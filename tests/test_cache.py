@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from backend.cache import CacheResultados, memorizar
+
+
+def _cache_contado(limite_bytes):
+    cache = CacheResultados(limite_bytes)
+    chamadas = []
+
+    @memorizar(cache=cache)
+    def somar(matriz, valor):
+        chamadas.append(valor)
+        return matriz + valor
+
+    return cache, somar, chamadas
+
+
+def test_acertos_e_falhas():
+    cache, somar, chamadas = _cache_contado(1 << 20)
+    imagem = np.arange(12, dtype=np.uint8).reshape(3, 4)
+    primeiro = somar(imagem, 1)
+    # Mesmo conteúdo em outra matriz: acerto
+    assert somar(imagem.copy(), 1) is primeiro
+    somar(imagem, 2)
+    assert chamadas == [1, 2]
+    estatisticas = cache.estatisticas()
+    assert (estatisticas['acertos'], estatisticas['falhas']) == (1, 2)
+    assert estatisticas['taxa_acerto'] == pytest.approx(1 / 3)
+    assert estatisticas['entradas'] == 2
+    assert estatisticas['bytes'] == 2 * imagem.nbytes
+
+
+def test_descarta_o_menos_usado_recentemente():
+    imagem = np.zeros((10, 10), dtype=np.uint8)
+    cache, somar, chamadas = _cache_contado(3 * imagem.nbytes)
+    for valor in (1, 2, 3):
+        somar(imagem, valor)
+    # Usar o 1 o torna o mais recente: o próximo a sair é o 2
+    somar(imagem, 1)
+    somar(imagem, 4)
+    assert cache.estatisticas()['entradas'] == 3
+    assert cache.estatisticas()['bytes'] <= cache.limite_bytes
+    chamadas.clear()
+    for valor in (1, 3, 4):
+        somar(imagem, valor)
+    assert chamadas == []
+    somar(imagem, 2)
+    assert chamadas == [2]
+
+
+def test_resultado_maior_que_o_limite_nao_e_guardado():
+    imagem = np.zeros((10, 10), dtype=np.uint8)
+    cache, somar, chamadas = _cache_contado(imagem.nbytes - 1)
+    somar(imagem, 1)
+    somar(imagem, 1)
+    assert chamadas == [1, 1]
+    assert cache.estatisticas()['entradas'] == 0
+
+
+def test_resultados_sao_somente_leitura():
+    cache, somar, _ = _cache_contado(1 << 20)
+    resultado = somar(np.zeros((4, 4), dtype=np.uint8), 1)
+    assert not resultado.flags.writeable
+    with pytest.raises(ValueError):
+        resultado[0, 0] = 5
+    np.testing.assert_array_equal(somar(np.zeros((4, 4), dtype=np.uint8), 1), 1)
@@ -0,0 +1,67 @@
+import time
+
+import numpy as np
+import pytest
+
+from backend.filtros_frequencias import filtro_gaussiano
+
+
+def gaussiano_referencia(imagem, sigma=1.0):
+    # Implementação original, pixel a pixel com np.sum(vizinhanca * kernel)
+    tamanho_kernel = int(6 * sigma + 1)
+    if tamanho_kernel % 2 == 0:
+        tamanho_kernel += 1
+    x = np.linspace(-(tamanho_kernel//2), tamanho_kernel//2, tamanho_kernel)
+    x, y = np.meshgrid(x, x)
+    kernel = np.exp(-(x**2 + y**2)/(2*sigma**2))
+    kernel = kernel / kernel.sum()
+
+    pad = tamanho_kernel // 2
+    canais = imagem.reshape(imagem.shape[0], imagem.shape[1], -1)
+    resultado = np.zeros(canais.shape, dtype=np.float64)
+    for canal in range(canais.shape[2]):
+        padded = np.pad(canais[:, :, canal], pad, mode='reflect')
+        for i in range(imagem.shape[0]):
+            for j in range(imagem.shape[1]):
+                resultado[i, j, canal] = np.sum(padded[i:i+tamanho_kernel, j:j+tamanho_kernel] * kernel)
+    return np.clip(resultado, 0, 255).astype(np.uint8).reshape(imagem.shape)
+
+
+def _imagens():
+    rng = np.random.default_rng(0)
+    rampa = np.tile(np.arange(0, 256, 4, dtype=np.uint8), (24, 1))
+    rampa_vertical = np.ascontiguousarray(rampa.T)
+    rampa_rgb = np.stack([rampa, rampa[:, ::-1], np.full_like(rampa, 77)], axis=-1)
+    plana = np.full((30, 30, 3), 200, dtype=np.uint8)
+    aleatoria = rng.integers(0, 256, (25, 33, 3), dtype=np.uint8)
+    return [rampa, rampa_vertical, rampa_rgb, plana, aleatoria]
+
+
+@pytest.mark.parametrize('imagem', _imagens())
+@pytest.mark.parametrize('sigma', [0.5, 1.0, 1.5, 2.0])
+def test_no_maximo_1_da_referencia(imagem, sigma):
+    # Só o truncamento de valores exatamente inteiros pode mudar (ver convolucao_separavel)
+    diferenca = filtro_gaussiano(imagem, sigma).astype(int) - gaussiano_referencia(imagem, sigma)
+    assert np.abs(diferenca).max() <= 1
+
+
+@pytest.mark.parametrize('sigma', [1.0, 3.0])
+def test_inteiros_exatos_mantidos(sigma):
+    plana = np.full((40, 50, 3), 200, dtype=np.uint8)
+    np.testing.assert_array_equal(filtro_gaussiano(plana, sigma), plana)
+    # Numa rampa linear o kernel simétrico devolve o próprio valor, longe das bordas
+    rampa = np.tile(np.arange(0, 256, 2, dtype=np.uint8), (40, 1))
+    borda = 3 * int(sigma) + 1
+    np.testing.assert_array_equal(filtro_gaussiano(rampa, sigma)[:, borda:-borda],
+                                  rampa[:, borda:-borda])
+
+
+@pytest.mark.parametrize('imagem', [
+    np.stack([np.tile((np.arange(2000) % 256).astype(np.uint8), (2000, 1))] * 3, axis=-1),
+    np.full((2000, 2000, 3), 200, dtype=np.uint8),
+], ids=['rampa', 'plana'])
+def test_tempo_em_imagens_suaves(imagem):
+    # 4 MP RGB, sigma 3: rampas e regiões planas custam o mesmo que ruído
+    inicio = time.perf_counter()
+    filtro_gaussiano(imagem, 3.0)
+    assert time.perf_counter() - inicio < 2.0
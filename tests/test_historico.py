@@ -0,0 +1,148 @@
+import numpy as np
+import pytest
+
+from backend.historico import Historico, LINHAS_POR_FAIXA, RECENTES_SEM_COMPRESSAO
+from backend.transformacoes import escala, rotacionar
+
+
+def _estados(quantidade, formato=(300, 40, 3)):
+    rng = np.random.default_rng(0)
+    estados = [rng.integers(0, 200, formato, dtype=np.uint8)]
+    for i in range(quantidade):
+        anterior = estados[-1]
+        if i % 3 == 0:
+            # Imagem toda alterada: vira diferença comprimida
+            novo = anterior + np.uint8(1)
+        elif i % 3 == 1:
+            # Só uma faixa: a diferença tem faixas zeradas, que não são guardadas
+            novo = anterior.copy()
+            novo[LINHAS_POR_FAIXA:] += np.uint8(2)
+        else:
+            novo = anterior.copy()
+            novo[10:20, 5:15] = i
+        estados.append(novo)
+    return estados
+
+
+def _registrar(historico, estados):
+    for anterior, atual in zip(estados, estados[1:]):
+        historico.registrar(anterior, atual)
+
+
+def _ida_e_volta(historico, estados):
+    atual = estados[-1]
+    for esperado in reversed(estados[:-1]):
+        atual = historico.desfazer(atual)
+        np.testing.assert_array_equal(atual, esperado)
+    assert historico.desfazer(atual) is None
+    for esperado in estados[1:]:
+        atual = historico.refazer(atual)
+        np.testing.assert_array_equal(atual, esperado)
+    assert historico.refazer(atual) is None
+
+
+def test_desfazer_refazer_sem_compressao():
+    estados = _estados(6)
+    historico = Historico()
+    _registrar(historico, estados)
+    assert not any(e.compactada for e in historico.desfazer_pilha)
+    _ida_e_volta(historico, estados)
+
+
+def test_desfazer_refazer_com_entradas_comprimidas():
+    estados = _estados(9)
+    # Cabe tudo comprimido, mas não sem compressão
+    historico = Historico(orcamento_bytes=estados[0].nbytes * 3)
+    _registrar(historico, estados)
+    pilha = historico.desfazer_pilha
+    assert len(pilha) == 9
+    assert pilha[0].compactada
+    assert not any(e.compactada for e in pilha[-RECENTES_SEM_COMPRESSAO:])
+    assert any(e.delta for e in pilha)
+    _ida_e_volta(historico, estados)
+    # Ida e volta de novo, agora com as inversas das entradas comprimidas
+    _ida_e_volta(historico, estados)
+    assert historico.uso_bytes <= historico.orcamento_bytes
+
+
+def test_estados_restaurados_sao_somente_leitura():
+    estados = _estados(4)
+    historico = Historico(orcamento_bytes=0)
+    _registrar(historico, estados[:2])
+    historico.orcamento_bytes = estados[0].nbytes * 3
+    _registrar(historico, estados[1:])
+    anterior = historico.desfazer(estados[-1])
+    with pytest.raises(ValueError):
+        anterior[0, 0] = 0
+
+
+def test_mudanca_de_formato():
+    rng = np.random.default_rng(1)
+    original = rng.integers(0, 256, (30, 50, 3), dtype=np.uint8)
+    rotacionada = rotacionar(original, 30, 'bilinear')
+    reduzida = escala(rotacionada, 0.5, 0.5, 'bilinear')
+    estados = [original, rotacionada, reduzida, reduzida + np.uint8(1)]
+    historico = Historico()
+    _registrar(historico, estados)
+    _ida_e_volta(historico, estados)
+
+
+def test_mudanca_de_formato_comprimida():
+    rng = np.random.default_rng(2)
+    original = rng.integers(0, 256, (40, 60), dtype=np.uint8)
+    rotacionada = rotacionar(original, 90, 'vizinho')
+    ampliada = escala(rotacionada, 1.5, 2, 'vizinho')
+    estados = [original, rotacionada, ampliada, ampliada.copy(), ampliada + np.uint8(3)]
+    estados[3][0:5] = 0
+    historico = Historico()
+    _registrar(historico, estados)
+    for entrada in historico.desfazer_pilha:
+        entrada.compactar()
+    assert [e.delta for e in historico.desfazer_pilha] == [1, 0, 0, 1]
+    _ida_e_volta(historico, estados)
+
+
+def test_descarta_mais_antigas_acima_do_orcamento():
+    rng = np.random.default_rng(3)
+    # Ruído independente: comprimir não ajuda, só descartar
+    estados = [rng.integers(0, 256, (64, 64, 3), dtype=np.uint8) for _ in range(8)]
+    orcamento = estados[0].nbytes * 3
+    historico = Historico(orcamento_bytes=orcamento)
+    _registrar(historico, estados)
+    assert historico.uso_bytes <= orcamento
+    mantidas = len(historico.desfazer_pilha)
+    assert 0 < mantidas < 7
+    # As mantidas são as mais recentes
+    _ida_e_volta(historico, estados[-mantidas - 1:])
+
+
+def test_orcamento_respeitado_ao_desfazer():
+    estados = _estados(9)
+    historico = Historico(orcamento_bytes=estados[0].nbytes * 3)
+    _registrar(historico, estados)
+    atual = estados[-1]
+    for _ in range(5):
+        atual = historico.desfazer(atual)
+        assert historico.uso_bytes <= historico.orcamento_bytes
+
+
+def test_regiao_e_etapas():
+    estados = _estados(3)
+    historico = Historico()
+    historico.registrar(estados[2], estados[3], etapas=('a',))
+    assert historico.ultima_regiao == (10, 20, 5, 15)
+    anterior = historico.desfazer(estados[3], etapas=('a', 'b'))
+    np.testing.assert_array_equal(anterior, estados[2])
+    assert historico.ultimas_etapas == ('a',)
+    historico.refazer(anterior, etapas=('a',))
+    assert historico.ultimas_etapas == ('a', 'b')
+
+
+def test_registrar_apaga_refazer():
+    estados = _estados(3)
+    historico = Historico()
+    _registrar(historico, estados)
+    atual = historico.desfazer(estados[-1])
+    assert historico.pode_refazer()
+    historico.registrar(atual, atual + np.uint8(5))
+    assert not historico.pode_refazer()
@@ -0,0 +1,138 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+import backend.transformacoes as t
+from backend.filtros import brilho_contraste
+from backend.filtros_frequencias import filtro_mediana
+from backend.image_manager import ImageManager
+from backend.operacoes import aplicar_pipeline
+from backend.pipeline import de_json, para_json
+from backend.reamostragem import reamostrar_afim
+
+
+@pytest.fixture
+def manager(tmp_path):
+    rng = np.random.default_rng(0)
+    caminho = tmp_path / 'imagem.png'
+    Image.fromarray(rng.integers(0, 256, (48, 64, 3), dtype=np.uint8)).save(caminho)
+    manager = ImageManager()
+    manager.set_image_path(str(caminho))
+    manager.load_image()
+    return manager
+
+
+def _espelhar(manager, direcao):
+    altura, largura = manager.get_formato()
+    manager.transformar(t.matriz_espelhamento(direcao, altura, largura), (altura, largura),
+                        lambda matriz: t.espelhar(matriz, direcao), 'vizinho',
+                        etapa=('espelhamento', {'direcao': direcao}))
+
+
+def _rotacionar(manager, angulo):
+    altura, largura = manager.get_formato()
+    manager.transformar(t.matriz_rotacao(angulo, altura, largura), (altura, largura),
+                        lambda matriz: t.rotacionar(matriz, angulo, 'bilinear'), 'bilinear',
+                        etapa=('rotacao', {'angulo': angulo, 'interpolacao': 'bilinear'}))
+
+
+def _escalar(manager, fator):
+    altura, largura = manager.get_formato()
+    matriz, formato = t.matriz_escala(fator, fator, altura, largura)
+    manager.transformar(matriz, formato, lambda m: t.escala(m, fator, fator), 'bilinear',
+                        etapa=('escala', {'fator': fator}))
+
+
+def test_previa_nao_materializa(manager):
+    editada = manager.edited_matrix
+    versao = manager.versao
+    _espelhar(manager, 'horizontal')
+    _rotacionar(manager, 30)
+    previa = manager.get_display_matrix()
+    assert manager.edited_matrix is editada
+    assert len(manager.transformacoes_pendentes) == 2
+    assert manager.versao != versao
+    assert previa.shape == editada.shape
+
+
+def test_previa_em_resolucao_cheia_igual_a_materializada(manager):
+    _espelhar(manager, 'horizontal')
+    _espelhar(manager, 'vertical')
+    previa = manager.get_display_matrix()
+    np.testing.assert_array_equal(previa, manager.get_edited_matrix())
+
+
+def test_previa_reduzida_acompanha_a_materializada(tmp_path):
+    # Maior que duas vezes o lado da prévia: a pirâmide tem um nível reduzido
+    y, x = np.mgrid[0:1100, 0:1200]
+    caminho = tmp_path / 'rampa.png'
+    Image.fromarray(((x + y) * 255 // 2300).astype(np.uint8)).save(caminho)
+    manager = ImageManager()
+    manager.set_image_path(str(caminho))
+    manager.load_image()
+
+    _rotacionar(manager, 30)
+    _espelhar(manager, 'vertical')
+    previa = manager.get_display_matrix()
+    assert len(manager.transformacoes_pendentes) == 2
+    manager.materializar()
+    referencia = manager.get_display_matrix()
+    assert previa.shape == referencia.shape == (550, 600)
+    # Reamostragens em resoluções diferentes: só diferenças de interpolação
+    diferenca = np.abs(previa.astype(int) - referencia.astype(int))
+    assert np.percentile(diferenca, 99) <= 2
+
+
+def _operacoes_diretas(imagem):
+    # As mesmas operações do teste abaixo, chamadas sem o ImageManager: as três
+    # transformações seguidas são uma reamostragem só, como na interface
+    resultado = brilho_contraste(imagem, 20.0, 1.1)
+    altura, largura = resultado.shape[:2]
+    afim = (t.matriz_rotacao(20, altura, largura) @ t.matriz_espelhamento('horizontal', altura, largura)
+            @ t.matriz_rotacao(30, altura, largura))
+    resultado = reamostrar_afim(resultado, np.linalg.inv(afim), interpolacao='bilinear')
+    resultado = filtro_mediana(resultado, 5)
+    return t.escala(resultado, 0.5, 0.5)
+
+
+def test_pipeline_gravado_reproduz_as_operacoes(manager):
+    original = manager.get_original_matrix()
+    manager.processar(lambda m: brilho_contraste(m, 20.0, 1.1),
+                      etapas=[('brilho_contraste', {'brilho': 20.0, 'contraste': 1.1})])
+    _rotacionar(manager, 30)
+    _espelhar(manager, 'horizontal')
+    _rotacionar(manager, 20)
+    manager.processar(lambda m: filtro_mediana(m, 5), etapas=[('mediana', {'tamanho': 5})])
+    # A última fica pendente: o pipeline já a inclui
+    _escalar(manager, 0.5)
+    etapas = de_json(para_json(manager.get_pipeline()))
+    assert [nome for nome, _ in etapas] == ['brilho_contraste', 'transformacoes', 'mediana', 'escala']
+
+    resultado = manager.get_edited_matrix()
+    np.testing.assert_array_equal(resultado, _operacoes_diretas(original))
+    np.testing.assert_array_equal(manager.reproduzir_pipeline(original, etapas), resultado)
+
+    # Outra imagem, de outro tamanho: as matrizes são recalculadas para ela
+    outra = np.random.default_rng(1).integers(0, 256, (37, 52, 3), dtype=np.uint8)
+    reproduzidas = manager.reproduzir_pipeline([outra, original], etapas)
+    np.testing.assert_array_equal(reproduzidas[0], _operacoes_diretas(outra))
+    np.testing.assert_array_equal(reproduzidas[1], resultado)
+
+    # Uma a uma, as rotações recortariam e interpolariam duas vezes
+    uma_a_uma = [('brilho_contraste', {'brilho': 20.0, 'contraste': 1.1})] + \
+        [tuple(etapa) for etapa in etapas[1][1]['etapas']] + etapas[2:]
+    assert uma_a_uma[1:4] == [('rotacao', {'angulo': 30, 'interpolacao': 'bilinear'}),
+                              ('espelhamento', {'direcao': 'horizontal'}),
+                              ('rotacao', {'angulo': 20, 'interpolacao': 'bilinear'})]
+    assert not np.array_equal(aplicar_pipeline(original, uma_a_uma), resultado)
+
+
+def test_transformacoes_que_se_cancelam(manager):
+    original = manager.get_original_matrix()
+    _rotacionar(manager, 30)
+    _rotacionar(manager, -30)
+    np.testing.assert_array_equal(manager.get_edited_matrix(), original)
+    etapas = manager.get_pipeline()
+    assert [nome for nome, _ in etapas] == ['transformacoes']
+    np.testing.assert_array_equal(manager.reproduzir_pipeline(original, etapas), original)
+
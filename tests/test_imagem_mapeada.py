@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+import backend.imagem_mapeada as im
+from backend.filtros_frequencias import filtro_gaussiano, filtro_mediana
+from backend.morfologiaMatematica import aplicar_elemento, criar_elemento_estruturante
+from backend.tarefas import Tarefa, executar_como
+
+
+@pytest.fixture
+def blocos_pequenos(monkeypatch):
+    # Blocos de poucas linhas, para que a imagem de teste passe por vários
+    def usar(linhas, imagem):
+        bytes_linha = imagem.nbytes // imagem.shape[0]
+        monkeypatch.setattr(im, 'BYTES_POR_BLOCO', linhas * bytes_linha)
+    return usar
+
+
+def _imagem(formato, seed=0):
+    return np.random.default_rng(seed).integers(0, 256, formato, dtype=np.uint8)
+
+
+def _dilatar_disco(imagem):
+    return aplicar_elemento(imagem, criar_elemento_estruturante('disco', 7), np.maximum)
+
+
+@pytest.mark.parametrize('operacao, raio', [
+    (lambda imagem: filtro_gaussiano.sem_cache(imagem, 1.5), 5),
+    (lambda imagem: filtro_mediana.sem_cache(imagem, 5), 2),
+    (_dilatar_disco, 3),
+])
+@pytest.mark.parametrize('linhas', [1, 4, 9])
+@pytest.mark.parametrize('formato', [(45, 23), (38, 17, 3)])
+def test_blocos_com_halo_igual_a_imagem_inteira(blocos_pequenos, operacao, raio, linhas, formato):
+    imagem = _imagem(formato)
+    blocos_pequenos(linhas, imagem)
+    assert im.linhas_por_bloco(imagem, raio) < formato[0]
+    resultado = im.processar_em_blocos(imagem, operacao, raio)
+    assert isinstance(resultado, np.memmap)
+    np.testing.assert_array_equal(resultado, operacao(imagem))
+
+
+def test_blocos_marcam_as_linhas_prontas(blocos_pequenos):
+    imagem = _imagem((50, 20, 3))
+    blocos_pequenos(8, imagem)
+    saida = np.zeros_like(imagem)
+    tarefa = Tarefa()
+    resultado = executar_como(tarefa, im.processar_em_blocos, imagem, _dilatar_disco, 3, saida)
+    assert resultado is saida
+    np.testing.assert_array_equal(saida, _dilatar_disco(imagem))
+    assert tarefa.parcial.saida is saida
+    prontas = sorted(tarefa.parcial.prontas)
+    assert prontas[0][0] == 0 and prontas[-1][1] == 50
+    assert all(a[1] == b[0] for a, b in zip(prontas, prontas[1:]))
+    assert tarefa.progresso == 1.0
+
+
+@pytest.mark.parametrize('formato', [(31, 45), (31, 45, 3), (20, 33, 4)])
+@pytest.mark.parametrize('extensao', ['.tif', '.npy'])
+def test_salvar_em_blocos_e_abrir_mapeada(blocos_pequenos, tmp_path, formato, extensao):
+    imagem = _imagem(formato)
+    blocos_pequenos(4, imagem)
+    caminho = str(tmp_path / ('imagem' + extensao))
+    im.salvar_em_blocos(imagem, caminho, im.modo_da_matriz(imagem))
+
+    mapeada, modo = im.abrir_mapeada(caminho, forcar=True)
+    assert isinstance(mapeada, np.memmap)
+    assert modo == im.modo_da_matriz(imagem)
+    np.testing.assert_array_equal(mapeada, imagem)
+    if extensao == '.tif':
+        # O TIFF escrito à mão também é lido pelo Pillow
+        with Image.open(caminho) as lida:
+            assert lida.mode == modo
+            np.testing.assert_array_equal(np.array(lida), imagem)
+
+
+def test_tiff_pequeno_so_mapeado_quando_forcado(tmp_path):
+    caminho = str(tmp_path / 'pequena.tif')
+    im.salvar_em_blocos(_imagem((10, 12, 3)), caminho)
+    assert im.abrir_mapeada(caminho) is None
+    assert im.abrir_mapeada(caminho, forcar=True) is not None
+
+
+def test_tiff_comprimido_nao_e_mapeado(tmp_path):
+    caminho = str(tmp_path / 'comprimida.tif')
+    Image.fromarray(_imagem((10, 12, 3))).save(caminho, compression='tiff_deflate')
+    assert im.abrir_mapeada(caminho, forcar=True) is None
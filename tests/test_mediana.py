@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+from backend.mediana import mediana_histograma
+
+
+def mediana_referencia(imagem, tamanho_kernel=3):
+    # Implementação original, pixel a pixel com np.median
+    pad = tamanho_kernel // 2
+    canais = imagem.reshape(imagem.shape[0], imagem.shape[1], -1)
+    resultado = np.zeros_like(canais)
+    for canal in range(canais.shape[2]):
+        padded = np.pad(canais[:, :, canal], pad, mode='reflect')
+        for i in range(imagem.shape[0]):
+            for j in range(imagem.shape[1]):
+                resultado[i, j, canal] = np.median(padded[i:i+tamanho_kernel, j:j+tamanho_kernel])
+    return resultado.reshape(imagem.shape)
+
+
+def _imagens():
+    rng = np.random.default_rng(0)
+    plana = np.full((40, 40, 3), 250, dtype=np.uint8)
+    quase_plana = plana.copy()
+    quase_plana[10, 10] = 3
+    quase_plana[30, 5] = 7
+    ruido_leve = np.clip(120 + rng.integers(-3, 4, (30, 50)), 0, 255).astype(np.uint8)
+    aleatoria = rng.integers(0, 256, (25, 33, 3), dtype=np.uint8)
+    return [plana, quase_plana, ruido_leve, aleatoria]
+
+
+@pytest.mark.parametrize('imagem', _imagens())
+@pytest.mark.parametrize('tamanho', [3, 5])
+def test_igual_a_referencia(imagem, tamanho):
+    np.testing.assert_array_equal(mediana_histograma(imagem, tamanho),
+                                  mediana_referencia(imagem, tamanho))
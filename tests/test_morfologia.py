@@ -0,0 +1,185 @@
+import numpy as np
+import pytest
+
+from backend.morfologiaMatematica import (
+    PipelineMorfologico, afinamento, aplicar_elemento, criar_elemento_estruturante,
+    minmax_retangular
+)
+
+OPERACOES = ('erosao', 'dilatacao', 'abertura', 'fechamento', 'gradiente', 'top_hat', 'black_hat')
+
+
+def _imagens():
+    rng = np.random.default_rng(0)
+    return {
+        'rgb': rng.integers(0, 256, (19, 23, 3), dtype=np.uint8),
+        'cinza': rng.integers(0, 256, (21, 17), dtype=np.uint8),
+        'rgba': rng.integers(0, 256, (16, 25, 4), dtype=np.uint8),
+    }
+
+
+def _reduzir_ingenuo(imagem, elemento, reducao):
+    # Janela por pixel com padding 'edge', como os filtros originais
+    if imagem.ndim == 3:
+        return np.stack([_reduzir_ingenuo(imagem[:, :, c], elemento, reducao)
+                         for c in range(imagem.shape[2])], axis=2)
+    altura, largura = imagem.shape
+    ee_altura, ee_largura = elemento.shape
+    padded = np.pad(imagem, ((ee_altura // 2,) * 2, (ee_largura // 2,) * 2), mode='edge')
+    resultado = np.empty_like(imagem)
+    for i in range(altura):
+        for j in range(largura):
+            regiao = padded[i:i + ee_altura, j:j + ee_largura]
+            resultado[i, j] = reducao(regiao[elemento == 1])
+    return resultado
+
+
+def _referencia(imagem, elemento, nome):
+    def diferenca(a, b):
+        return (np.maximum(a.astype(int) - b, 0)).astype(a.dtype)
+    ero = _reduzir_ingenuo(imagem, elemento, np.min)
+    dil = _reduzir_ingenuo(imagem, elemento, np.max)
+    abertura = _reduzir_ingenuo(ero, elemento, np.max)
+    fechamento = _reduzir_ingenuo(dil, elemento, np.min)
+    return {'erosao': ero, 'dilatacao': dil, 'abertura': abertura, 'fechamento': fechamento,
+            'gradiente': diferenca(dil, ero), 'top_hat': diferenca(imagem, abertura),
+            'black_hat': diferenca(fechamento, imagem)}[nome]
+
+
+ELEMENTOS = [('quadrado', 3), ('cruz', 3), ('cruz', 5), ('disco', 3), ('disco', 5),
+             ('disco', 7), ('linha_horizontal', 7), ('linha_vertical', 5)]
+
+
+@pytest.mark.parametrize('tipo', ['rgb', 'cinza', 'rgba'])
+@pytest.mark.parametrize('forma', [(3, 3), (5, 1), (1, 7), (3, 5), (7, 7)])
+def test_minmax_retangular(tipo, forma):
+    imagem = _imagens()[tipo]
+    elemento = np.ones(forma, dtype=np.uint8)
+    np.testing.assert_array_equal(minmax_retangular(imagem, forma, np.minimum),
+                                  _reduzir_ingenuo(imagem, elemento, np.min))
+    np.testing.assert_array_equal(minmax_retangular(imagem, forma, np.maximum),
+                                  _reduzir_ingenuo(imagem, elemento, np.max))
+
+
+@pytest.mark.parametrize('tipo', ['rgb', 'cinza', 'rgba'])
+@pytest.mark.parametrize('forma, tamanho', ELEMENTOS)
+def test_aplicar_elemento(tipo, forma, tamanho):
+    imagem = _imagens()[tipo]
+    elemento = criar_elemento_estruturante(forma, tamanho)
+    np.testing.assert_array_equal(aplicar_elemento(imagem, elemento, np.minimum),
+                                  _reduzir_ingenuo(imagem, elemento, np.min))
+    np.testing.assert_array_equal(aplicar_elemento(imagem, elemento, np.maximum),
+                                  _reduzir_ingenuo(imagem, elemento, np.max))
+
+
+def test_aplicar_elemento_irregular():
+    imagem = _imagens()['rgb']
+    elemento = np.array([[0, 1, 1, 0, 0],
+                         [1, 0, 1, 1, 1],
+                         [0, 0, 1, 0, 0]], dtype=np.uint8)
+    np.testing.assert_array_equal(aplicar_elemento(imagem, elemento, np.minimum),
+                                  _reduzir_ingenuo(imagem, elemento, np.min))
+
+
+@pytest.mark.parametrize('tipo', ['rgb', 'cinza', 'rgba'])
+@pytest.mark.parametrize('forma, tamanho', [('quadrado', 3), ('cruz', 5), ('disco', 5)])
+def test_pipeline_igual_a_referencia(tipo, forma, tamanho):
+    imagem = _imagens()[tipo]
+    elemento = criar_elemento_estruturante(forma, tamanho)
+    pipeline = PipelineMorfologico(elemento, imagem)
+    assert not pipeline._binaria
+    for nome in OPERACOES:
+        np.testing.assert_array_equal(pipeline.resultado(nome), _referencia(imagem, elemento, nome))
+
+
+def test_pipeline_reaproveita_intermediarios():
+    imagem = _imagens()['rgb']
+    elemento = criar_elemento_estruturante('disco', 5)
+    pipeline = PipelineMorfologico(elemento, imagem)
+    pipeline.gradiente()
+    assert set(pipeline._resultados) == {'erosao', 'dilatacao', 'gradiente'}
+    erosao = pipeline.erosao()
+    assert erosao is pipeline._resultados['erosao']
+    pipeline.top_hat()
+    # A abertura parte da erosão já calculada
+    assert pipeline._resultados['erosao'] is erosao
+    assert set(pipeline._resultados) == {'erosao', 'dilatacao', 'gradiente', 'abertura', 'top_hat'}
+    np.testing.assert_array_equal(pipeline._resultados['abertura'],
+                                  _referencia(imagem, elemento, 'abertura'))
+
+    # Outra imagem descarta os intermediários da anterior
+    outra = imagem[::-1].copy()
+    pipeline.definir_imagem(outra)
+    assert pipeline._resultados == {}
+    np.testing.assert_array_equal(pipeline.black_hat(), _referencia(outra, elemento, 'black_hat'))
+
+
+def _afinamento_ingenuo(imagem, max_iteracoes):
+    # Zhang-Suen pixel a pixel, como o filtro original
+    if imagem.ndim == 3:
+        cinza = np.mean(imagem, axis=2).astype(np.uint8)
+    else:
+        cinza = imagem
+    resultado = (cinza < 127).astype(np.uint8)
+    altura, largura = resultado.shape
+
+    def vizinhos(i, j):
+        r = resultado
+        return [r[i-1, j], r[i-1, j+1], r[i, j+1], r[i+1, j+1],
+                r[i+1, j], r[i+1, j-1], r[i, j-1], r[i-1, j-1]]
+
+    iteracao = 0
+    while max_iteracoes == -1 or iteracao < max_iteracoes:
+        mudou = False
+        for sub in range(2):
+            marcados = []
+            for i in range(1, altura - 1):
+                for j in range(1, largura - 1):
+                    if resultado[i, j] != 1:
+                        continue
+                    v = vizinhos(i, j)
+                    P2, P3, P4, P5, P6, P7, P8, P9 = v
+                    B = sum(v)
+                    A = sum(1 for k in range(8) if v[k] == 0 and v[(k + 1) % 8] == 1)
+                    if sub == 0:
+                        condicao = P2 * P4 * P6 == 0 and P4 * P6 * P8 == 0
+                    else:
+                        condicao = P2 * P4 * P8 == 0 and P2 * P6 * P8 == 0
+                    if 2 <= B <= 6 and A == 1 and condicao:
+                        marcados.append((i, j))
+            for i, j in marcados:
+                resultado[i, j] = 0
+                mudou = True
+        if not mudou:
+            break
+        iteracao += 1
+
+    resultado = ((1 - resultado) * 255).astype(np.uint8)
+    if imagem.ndim == 3:
+        return np.stack([resultado] * 3, axis=2)
+    return resultado
+
+
+def _formas_escuras(canais):
+    # Traços grossos escuros sobre fundo claro, com ruído
+    rng = np.random.default_rng(5)
+    cinza = np.full((40, 48), 230, dtype=np.uint8)
+    cinza[5:15, 4:40] = 20
+    cinza[10:36, 20:29] = 30
+    y, x = np.ogrid[:40, :48]
+    cinza[(y - 28) ** 2 + (x - 10) ** 2 <= 36] = 10
+    cinza[rng.random(cinza.shape) < 0.05] = 0
+    if canais == 0:
+        return cinza
+    return np.stack([cinza] * canais, axis=2) + rng.integers(0, 10, (40, 48, canais), dtype=np.uint8)
+
+
+@pytest.mark.parametrize('canais', [0, 3, 4])
+@pytest.mark.parametrize('iteracoes', [1, 3, -1])
+def test_afinamento(canais, iteracoes):
+    imagem = _formas_escuras(canais)
+    esperado = _afinamento_ingenuo(imagem, iteracoes)
+    np.testing.assert_array_equal(afinamento(imagem, iteracoes), esperado)
+    if iteracoes != -1:
+        # Ainda não convergiu: cada limite de iterações dá um resultado diferente
+        assert not np.array_equal(esperado, _afinamento_ingenuo(imagem, -1))
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from backend.filtros_frequencias import limiarizacao_global
+from backend.morfologiaMatematica import (
+    PipelineMorfologico, aplicar_elemento, criar_elemento_estruturante, erosao
+)
+from backend.morfologia_binaria import ImagemBinaria
+
+OPERACOES = ('erosao', 'dilatacao', 'abertura', 'fechamento', 'gradiente', 'top_hat', 'black_hat')
+
+
+def _referencia_cinza(imagem, elemento, nome):
+    # Mesmas operações pelo caminho em tons de cinza (uint8, padding 'edge')
+    def diferenca(a, b):
+        return np.where(a > b, a - b, 0).astype(a.dtype)
+    ero = aplicar_elemento(imagem, elemento, np.minimum)
+    dil = aplicar_elemento(imagem, elemento, np.maximum)
+    abertura = aplicar_elemento(ero, elemento, np.maximum)
+    fechamento = aplicar_elemento(dil, elemento, np.minimum)
+    return {'erosao': ero, 'dilatacao': dil, 'abertura': abertura, 'fechamento': fechamento,
+            'gradiente': diferenca(dil, ero), 'top_hat': diferenca(imagem, abertura),
+            'black_hat': diferenca(fechamento, imagem)}[nome]
+
+
+@pytest.mark.parametrize('largura', [7, 63, 64, 65, 130])
+@pytest.mark.parametrize('forma, tamanho', [('quadrado', 3), ('cruz', 5), ('disco', 7),
+                                             ('linha_horizontal', 9), ('linha_vertical', 5)])
+def test_igual_ao_caminho_em_tons_de_cinza(largura, forma, tamanho):
+    rng = np.random.default_rng(largura)
+    mascara = rng.random((37, largura)) < 0.6
+    elemento = criar_elemento_estruturante(forma, tamanho)
+    for imagem in (mascara.astype(np.uint8) * 255, np.stack([mascara.astype(np.uint8) * 200] * 3, -1)):
+        pipeline = PipelineMorfologico(elemento, imagem)
+        assert pipeline._binaria
+        for nome in OPERACOES:
+            np.testing.assert_array_equal(pipeline.resultado(nome),
+                                          _referencia_cinza(imagem, elemento, nome))
+
+
+def test_de_matriz_recusa_imagens_nao_binarias():
+    imagem = np.zeros((4, 5, 3), dtype=np.uint8)
+    imagem[1, 1] = 255
+    assert ImagemBinaria.de_matriz(imagem) is not None
+    imagem[2, 2] = 100
+    assert ImagemBinaria.de_matriz(imagem) is None
+    imagem[2, 2] = (0, 255, 0)
+    assert ImagemBinaria.de_matriz(imagem) is None
+
+
+def test_resultado_binario_fica_empacotado():
+    imagem = np.random.default_rng(0).integers(0, 256, (40, 128, 3), dtype=np.uint8)
+    limiarizada = limiarizacao_global(imagem, limiar=100)
+    assert not limiarizada.flags.writeable
+    binaria, valor = ImagemBinaria.de_matriz(limiarizada)
+    assert valor == 255 and binaria.nbytes * 24 == limiarizada.nbytes
+    # O resultado da erosão (visão do cache de resultados) também é reconhecido sem conversão
+    elemento = criar_elemento_estruturante('cruz', 3)
+    erodida = erosao(limiarizada, elemento)
+    assert ImagemBinaria.de_matriz(erodida)[0] is PipelineMorfologico(elemento, erodida)._entrada
+    # Uma cópia ou um recorte não reaproveita os bits de outra matriz
+    assert ImagemBinaria.de_matriz(np.array(limiarizada))[0] is not binaria
+    recorte, _ = ImagemBinaria.de_matriz(limiarizada[5:])
+    assert recorte.altura == 35
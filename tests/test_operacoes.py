@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+from backend.cli import destinos_saida, ler_etapa, main
+from backend.operacoes import validar_etapa
+
+
+@pytest.mark.parametrize('texto', [
+    'espelhamento:direcao=x',
+    'sobel:direcao=horizontal',
+    'rotacao:angulo=30,interpolacao=linear',
+    'escala:fator=2,interpolacao=cubica',
+    'erosao:forma=circulo',
+    'frequencia:tipo=gaussiano,passa=media',
+])
+def test_valor_fora_dos_aceitos(texto):
+    with pytest.raises(ValueError, match='inválido'):
+        ler_etapa(texto)
+
+
+@pytest.mark.parametrize('texto, esperado', [
+    ('espelhamento:direcao=vertical', ('espelhamento', {'direcao': 'vertical'})),
+    ('sobel:direcao=x,ksize=5', ('sobel', {'direcao': 'x', 'ksize': 5})),
+    ('rotacao:angulo=30,interpolacao=bicubica', ('rotacao', {'angulo': 30, 'interpolacao': 'bicubica'})),
+    ('abertura:forma=linha_vertical,tamanho=5', ('abertura', {'forma': 'linha_vertical', 'tamanho': 5})),
+])
+def test_valores_aceitos(texto, esperado):
+    assert ler_etapa(texto) == esperado
+
+
+def test_parametros_conferidos():
+    with pytest.raises(ValueError, match='desconhecida'):
+        validar_etapa('borrar', {})
+    with pytest.raises(ValueError, match='desconhecidos'):
+        validar_etapa('grayscale', {'sigma': 2})
+    with pytest.raises(ValueError, match='obrigatórios'):
+        validar_etapa('rotacao', {})
+
+
+def test_transformacoes_so_aceitam_etapas_geometricas():
+    validar_etapa('transformacoes', {'etapas': [['rotacao', {'angulo': 30}], ['escala', {'fator': 2}]]})
+    with pytest.raises(ValueError, match='inválida'):
+        validar_etapa('transformacoes', {'etapas': [['mediana', {'tamanho': 3}]]})
+    with pytest.raises(ValueError, match='inválido'):
+        validar_etapa('transformacoes', {'etapas': [['espelhamento', {'direcao': 'x'}]]})
+
+
+def test_cli_recusa_valor_invalido(tmp_path):
+    with pytest.raises(SystemExit) as saida:
+        main([str(tmp_path), str(tmp_path / 'saida'), '-o', 'espelhamento:direcao=x'])
+    assert saida.value.code == 2
+
+
+def test_cli_recusa_saidas_com_o_mesmo_nome(tmp_path, capsys):
+    entrada = tmp_path / 'entrada'
+    entrada.mkdir()
+    imagem = Image.fromarray(np.zeros((4, 4, 3), dtype=np.uint8))
+    for nome in ('a.png', 'a.jpg', 'b.png'):
+        imagem.save(entrada / nome)
+    with pytest.raises(SystemExit) as saida:
+        main([str(entrada), str(tmp_path / 'saida'), '-f', 'png', '-o', 'grayscale'])
+    assert saida.value.code == 2
+    assert 'a.png (a.jpg, a.png)' in capsys.readouterr().err
+    assert not (tmp_path / 'saida').exists()
+
+
+def test_destinos_saida(tmp_path):
+    destinos = destinos_saida(['a.png', 'a.jpg', 'b.tif'], str(tmp_path))
+    assert destinos['a.jpg'] == str(tmp_path / 'a.jpg')
+    destinos = destinos_saida(['a.png', 'b.jpg'], str(tmp_path), '.npy')
+    assert destinos == {'a.png': str(tmp_path / 'a.npy'), 'b.jpg': str(tmp_path / 'b.npy')}
@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+
+import backend.paralelo as paralelo
+from backend.filtros_frequencias import filtro_gaussiano, filtro_mediana
+from backend.morfologiaMatematica import aplicar_elemento, criar_elemento_estruturante
+from backend.tarefas import Tarefa, executar_como
+
+
+@pytest.fixture
+def faixas_finas(monkeypatch):
+    # Várias threads e faixas de poucas linhas, para testar muitas fronteiras
+    monkeypatch.setattr(paralelo, 'ALTURA_MINIMA_FAIXA', 4)
+    paralelo.configurar_threads(3)
+    yield
+    paralelo.configurar_threads(None)
+
+
+def _imagem(formato, seed=0):
+    return np.random.default_rng(seed).integers(0, 256, formato, dtype=np.uint8)
+
+
+def _erodir_cruz(imagem):
+    return aplicar_elemento(imagem, criar_elemento_estruturante('cruz', 7), np.minimum)
+
+
+OPERACOES = [
+    (lambda imagem: filtro_gaussiano.sem_cache(imagem, 2.0), 6),
+    (lambda imagem: filtro_mediana.sem_cache(imagem, 5), 2),
+    (_erodir_cruz, 3),
+]
+
+
+@pytest.mark.parametrize('operacao, raio', OPERACOES)
+@pytest.mark.parametrize('num_faixas', [2, 7, 16])
+@pytest.mark.parametrize('formato', [(97, 31), (83, 29, 3)])
+def test_faixas_iguais_a_uma_chamada(faixas_finas, operacao, raio, num_faixas, formato):
+    imagem = _imagem(formato)
+    assert len(paralelo.dividir_faixas(formato[0], raio, num_faixas)) > 1
+    resultado = paralelo.processar_em_faixas(imagem, operacao, raio, num_faixas=num_faixas)
+    np.testing.assert_array_equal(resultado, operacao(imagem))
+
+
+def test_faixas_dentro_de_uma_tarefa(faixas_finas):
+    imagem = _imagem((120, 40, 3))
+    tarefa = Tarefa()
+    resultado = executar_como(tarefa, paralelo.processar_em_faixas, imagem, _erodir_cruz, 3)
+    np.testing.assert_array_equal(resultado, _erodir_cruz(imagem))
+    # Dentro de uma tarefa há pelo menos FAIXAS_PROGRESSIVAS faixas, todas marcadas
+    prontas = sorted(tarefa.parcial.prontas)
+    assert len(prontas) >= paralelo.FAIXAS_PROGRESSIVAS
+    assert prontas[0][0] == 0 and prontas[-1][1] == 120
+    assert all(a[1] == b[0] for a, b in zip(prontas, prontas[1:]))
+    assert tarefa.parcial.saida is resultado
+    assert tarefa.progresso == 1.0
+
+
+def test_imagem_baixa_usa_uma_chamada():
+    imagem = _imagem((paralelo.ALTURA_MINIMA_FAIXA + 10, 8))
+    chamadas = []
+
+    def operacao(faixa):
+        chamadas.append(faixa.shape)
+        return faixa
+
+    assert paralelo.processar_em_faixas(imagem, operacao, 2, num_faixas=8) is imagem
+    assert chamadas == [imagem.shape]
+
+
+@pytest.mark.parametrize('altura, raio, num_faixas', [(100, 0, 4), (517, 3, 9), (64, 40, 8), (1000, 5, 1)])
+def test_executar_em_faixas_cobre_cada_linha_uma_vez(faixas_finas, altura, raio, num_faixas):
+    contagem = np.zeros(altura, dtype=int)
+
+    def funcao(inicio, fim):
+        contagem[inicio:fim] += 1
+
+    paralelo.executar_em_faixas(altura, funcao, raio, num_faixas)
+    np.testing.assert_array_equal(contagem, 1)
+    for inicio, fim, inicio_halo, fim_halo in paralelo.dividir_faixas(altura, raio, num_faixas):
+        assert fim - inicio >= min(altura, 2 * raio + 1)
+        assert (inicio_halo, fim_halo) == (max(0, inicio - raio), min(altura, fim + raio))
+
+
+@pytest.mark.parametrize('n', [1, 2, 5, 8, 13])
+def test_ordem_progressiva_e_permutacao(n):
+    ordem = paralelo.ordem_progressiva(n)
+    assert sorted(ordem) == list(range(n))
+    assert ordem[0] == 0
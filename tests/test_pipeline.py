@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from backend.operacoes import aplicar_pipeline
+from backend.pipeline import de_json, otimizar, para_json, reproduzir
+
+# (etapas, número de etapas depois da otimização), uma entrada por regra
+CASOS = {
+    'neutras': ([('brilho_contraste', {'brilho': 0.0, 'contraste': 1.0}),
+                 ('rotacao', {'angulo': 360}), ('translacao', {'x': 0, 'y': 0}),
+                 ('mediana', {'tamanho': 1}), ('escala', {'fator': 1.0})], 0),
+    'tabelas': ([('brilho_contraste', {'brilho': 30.0, 'contraste': 1.2}),
+                 ('tabela', {'tabela': list(range(255, -1, -1))}),
+                 ('brilho_contraste', {'brilho': -10.0, 'contraste': 0.9})], 1),
+    'grayscale_repetido': ([('grayscale', {}), ('grayscale', {})], 1),
+    'abertura_repetida': ([('abertura', {'forma': 'disco', 'tamanho': 5}),
+                           ('abertura', {'forma': 'disco', 'tamanho': 5})], 1),
+    'espelhamentos_cancelam': ([('espelhamento', {'direcao': 'horizontal'}),
+                                ('mediana', {'tamanho': 3}),
+                                ('brilho_contraste', {'brilho': 20.0, 'contraste': 1.0}),
+                                ('espelhamento', {'direcao': 'horizontal'})], 2),
+    'rotacao_180_atravessa': ([('rotacao', {'angulo': 180, 'interpolacao': 'bilinear'}),
+                               ('erosao', {'forma': 'cruz', 'tamanho': 3}),
+                               ('limiarizacao', {'limiar': 100}),
+                               ('rotacao', {'angulo': 180, 'interpolacao': 'bilinear'})], 2),
+    'rotacoes_180_somam': ([('rotacao', {'angulo': 180, 'interpolacao': 'bicubica'}),
+                            ('rotacao', {'angulo': 180, 'interpolacao': 'bicubica'}),
+                            ('rotacao', {'angulo': 180, 'interpolacao': 'bicubica'})], 1),
+    'translacoes_somam': ([('translacao', {'x': 5, 'y': -3}), ('grayscale', {}),
+                           ('translacao', {'x': -2, 'y': 7})], 2),
+    'rotacoes_90_nao_somam': ([('rotacao', {'angulo': 90, 'interpolacao': 'bilinear'}),
+                               ('rotacao', {'angulo': 90, 'interpolacao': 'bilinear'})], 2),
+    'rotacoes_30_nao_somam': ([('rotacao', {'angulo': 30, 'interpolacao': 'bilinear'}),
+                               ('rotacao', {'angulo': 30, 'interpolacao': 'bilinear'})], 2),
+    'translacao_nao_atravessa_filtro': ([('translacao', {'x': 4, 'y': 0}),
+                                         ('mediana', {'tamanho': 3}),
+                                         ('translacao', {'x': -4, 'y': 0})], 3),
+}
+
+
+@pytest.fixture
+def imagem():
+    return np.random.default_rng(0).integers(0, 256, (30, 41, 3), dtype=np.uint8)
+
+
+@pytest.mark.parametrize('caso', CASOS)
+def test_reproduzir_igual_ao_pipeline_sem_otimizar(caso, imagem):
+    etapas, num_otimizadas = CASOS[caso]
+    assert len(otimizar(etapas, imagem.dtype)) == num_otimizadas
+    np.testing.assert_array_equal(reproduzir(etapas, imagem), aplicar_pipeline(imagem, etapas))
+
+
+def test_json_ida_e_volta():
+    etapas = CASOS['rotacao_180_atravessa'][0]
+    assert de_json(para_json(etapas)) == etapas
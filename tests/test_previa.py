@@ -0,0 +1,98 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+from backend.previa import PiramideMip, abrir_previa, compor_parcial, unir_regioes
+
+
+def _imagem(formato, seed=0):
+    return np.random.default_rng(seed).integers(0, 256, formato, dtype=np.uint8)
+
+
+def _metade_referencia(matriz):
+    altura, largura = matriz.shape[0] // 2, matriz.shape[1] // 2
+    blocos = matriz[:2 * altura, :2 * largura].astype(int)
+    blocos = blocos.reshape((altura, 2, largura, 2) + matriz.shape[2:])
+    # Média com arredondamento para cima no meio
+    return ((blocos.sum(axis=(1, 3)) + 2) // 4).astype(np.uint8)
+
+
+@pytest.mark.parametrize('formato, esperados', [
+    ((45, 70, 3), [(45, 70), (22, 35), (11, 17)]),
+    ((41, 20), [(41, 20), (20, 10), (10, 5)]),
+    ((39, 19), [(39, 19), (19, 9)]),
+    ((9, 9, 4), [(9, 9)]),
+    ((40, 41), [(40, 41), (20, 20), (10, 10)]),
+])
+def test_formatos_dos_niveis(formato, esperados):
+    imagem = _imagem(formato)
+    piramide = PiramideMip(tamanho_min=10)
+    piramide.atualizar(imagem)
+    assert [nivel.shape[:2] for nivel in piramide.niveis] == esperados
+    assert piramide.origem is imagem
+    for anterior, nivel in zip(piramide.niveis, piramide.niveis[1:]):
+        assert nivel.shape[2:] == formato[2:]
+        np.testing.assert_array_equal(nivel, _metade_referencia(anterior))
+    # Nunca um nível abaixo do tamanho pedido, a não ser a própria imagem
+    for tamanho in (5, 10, 20, 100):
+        nivel = piramide.nivel(tamanho)
+        candidatos = [n for n in piramide.niveis if max(n.shape[:2]) >= tamanho]
+        esperado = candidatos[-1] if candidatos else imagem
+        assert nivel.shape == esperado.shape
+        assert not nivel.flags.writeable
+
+
+def test_atualizar_regiao_igual_a_refazer():
+    imagem = _imagem((90, 130, 3))
+    piramide = PiramideMip(tamanho_min=10)
+    piramide.atualizar(imagem)
+    editada = imagem.copy()
+    editada[31:57, 13:78] = 255 - editada[31:57, 13:78]
+    piramide.atualizar(editada, (31, 57, 13, 78))
+    refeita = PiramideMip(tamanho_min=10)
+    refeita.atualizar(editada)
+    assert len(piramide.niveis) == len(refeita.niveis)
+    for nivel, esperado in zip(piramide.niveis, refeita.niveis):
+        np.testing.assert_array_equal(nivel, esperado)
+
+
+def test_unir_regioes():
+    assert unir_regioes((1, 5, 2, 6), (3, 9, 0, 4)) == (1, 9, 0, 6)
+    assert unir_regioes((0, 0, 0, 0), (3, 9, 0, 4)) == (3, 9, 0, 4)
+    assert unir_regioes(None, (3, 9, 0, 4)) is None
+
+
+def _compor_referencia(base, saida, prontas):
+    altura, largura = base.shape[:2]
+    quadro = base.copy()
+    for i in range(altura):
+        y = int((i + 0.5) * saida.shape[0] / altura)
+        if any(inicio <= y < fim for inicio, fim in prontas):
+            for j in range(largura):
+                quadro[i, j] = saida[y, int((j + 0.5) * saida.shape[1] / largura)]
+    return quadro
+
+
+@pytest.mark.parametrize('formato', [(120, 90), (120, 90, 3)])
+@pytest.mark.parametrize('prontas', [[], [(0, 120)], [(60, 75), (0, 15)], [(37, 38)]])
+def test_compor_parcial(formato, prontas):
+    saida = _imagem(formato, seed=1)
+    base = _imagem((40, 30) + formato[2:], seed=2)
+    quadro = compor_parcial(base, saida, prontas)
+    np.testing.assert_array_equal(quadro, _compor_referencia(base, saida, prontas))
+    # A base (prévia exibida) não é alterada
+    assert quadro is not base
+
+
+def test_compor_parcial_com_outros_canais():
+    base = _imagem((40, 30, 3))
+    assert compor_parcial(base, _imagem((120, 90)), [(0, 120)]) is None
+    assert compor_parcial(base, np.zeros((120, 90, 3), dtype=np.float32), [(0, 120)]) is None
+
+
+def test_abrir_previa_reduz_jpeg(tmp_path):
+    caminho = str(tmp_path / 'foto.jpg')
+    Image.fromarray(_imagem((1200, 1700, 3))).save(caminho)
+    previa = abrir_previa(caminho, 300)
+    assert max(previa.size) <= 300
+    assert previa.size[0] > previa.size[1]
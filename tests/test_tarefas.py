@@ -0,0 +1,118 @@
+import threading
+import time
+
+import pytest
+
+from backend.tarefas import ExecutorTarefas, INTERVALO_MS, verificar_cancelamento
+
+
+class RootFalso:
+    """Substitui root.after: guarda os callbacks e os roda em rodar(), nesta thread."""
+
+    def __init__(self):
+        self.agendados = []
+        self.intervalos = []
+
+    def after(self, ms, callback):
+        self.intervalos.append(ms)
+        self.agendados.append(callback)
+
+    def rodar(self, ate=lambda: False, limite=5.0):
+        fim = time.monotonic() + limite
+        while self.agendados and not ate():
+            assert time.monotonic() < fim, "tarefa não terminou"
+            time.sleep(0.001)
+            self.agendados.pop(0)()
+
+
+@pytest.fixture
+def executor():
+    root = RootFalso()
+    progresso = []
+    executor = ExecutorTarefas(root.after, lambda *args: progresso.append(args))
+    executor.root = root
+    executor.progresso = progresso
+    return executor
+
+
+def test_progresso_e_resultado_na_thread_da_interface(executor):
+    liberar = threading.Event()
+    threads = {}
+
+    def calcular(valor):
+        threads['calcular'] = threading.current_thread()
+        verificar_cancelamento(0.5)
+        liberar.wait(5)
+        return valor * 2
+
+    def concluir(resultado):
+        threads['concluir'] = threading.current_thread()
+        threads['resultado'] = resultado
+
+    executor.executar(calcular, concluir, preparar=lambda: 21)
+    executor.root.rodar(ate=lambda: (0.5,) in executor.progresso)
+    assert executor.tarefa_em_andamento.progresso == 0.5
+    liberar.set()
+    executor.root.rodar()
+
+    assert threads['resultado'] == 42
+    assert threads['calcular'] is not threading.main_thread()
+    assert threads['concluir'] is threading.main_thread()
+    assert set(executor.root.intervalos) == {INTERVALO_MS}
+    assert executor.progresso[-1] == (None, None)
+    assert executor.tarefa_em_andamento is None
+
+
+def test_cancelamento(executor):
+    iniciou = threading.Event()
+    executadas = []
+
+    def calcular():
+        iniciou.set()
+        while True:
+            verificar_cancelamento()
+            time.sleep(0.001)
+
+    executor.executar(calcular, lambda r: executadas.append('primeira'))
+    executor.executar(lambda _: executadas.append('segunda'),
+                      preparar=lambda: executadas.append('preparar'))
+    assert iniciou.wait(5)
+    executor.cancelar()
+    executor.root.rodar()
+
+    # A da fila também foi cancelada: nem preparada, nem executada
+    assert executadas == []
+    assert executor.progresso[-1] == (None, "Operação cancelada")
+    assert executor.tarefa_em_andamento is None
+
+    # Uma nova tarefa depois do cancelamento roda normalmente
+    executor.executar(lambda: 1, lambda r: executadas.append(r))
+    executor.root.rodar()
+    assert executadas == [1]
+    assert executor.progresso[-1] == (None, None)
+
+
+def test_tarefas_em_ordem_e_erros_entregues(executor):
+    ordem = []
+    erros = []
+    executor.executar(lambda: ordem.append('a'))
+    executor.executar(lambda: 1 / 0, ao_erro=erros.append)
+    executor.executar(lambda _: ordem.append('c'), preparar=lambda: ordem.append('preparar c'))
+    executor.root.rodar()
+    assert ordem == ['a', 'preparar c', 'c']
+    assert len(erros) == 1 and isinstance(erros[0], ZeroDivisionError)
+    assert executor.progresso[-1] == (None, None)
+
+
+def test_erro_ao_preparar_pula_a_tarefa(executor):
+    erros = []
+    executadas = []
+
+    def preparar():
+        raise ValueError("sem imagem")
+
+    executor.executar(lambda: executadas.append('x'), ao_erro=erros.append, preparar=preparar)
+    executor.executar(lambda: executadas.append('y'))
+    executor.root.rodar()
+    assert executadas == ['y']
+    assert [str(e) for e in erros] == ["sem imagem"]
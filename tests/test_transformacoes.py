@@ -0,0 +1,181 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+import backend.transformacoes as t
+from backend.reamostragem import reamostrar_afim
+
+
+def _imagem(formato, seed=0):
+    return np.random.default_rng(seed).integers(0, 256, formato, dtype=np.uint8)
+
+
+def _afim_ingenuo(imagem, inversa, interpolacao):
+    # Pixel a pixel em float64; vizinhos fora da imagem valem 0
+    altura, largura = imagem.shape[:2]
+    saida = np.zeros(imagem.shape, dtype=np.float64)
+    for y in range(altura):
+        for x in range(largura):
+            xo, yo, _ = inversa @ (x, y, 1)
+            if interpolacao == 'vizinho':
+                xi, yi = int(np.floor(xo + 0.5)), int(np.floor(yo + 0.5))
+                if 0 <= yi < altura and 0 <= xi < largura:
+                    saida[y, x] = imagem[yi, xi]
+                continue
+            x0, y0 = int(np.floor(xo)), int(np.floor(yo))
+            tx, ty = xo - x0, yo - y0
+            for yi, py in ((y0, 1 - ty), (y0 + 1, ty)):
+                for xi, px in ((x0, 1 - tx), (x0 + 1, tx)):
+                    if 0 <= yi < altura and 0 <= xi < largura:
+                        saida[y, x] += py * px * imagem[yi, xi]
+    return np.clip(np.rint(saida), 0, 255).astype(np.uint8)
+
+
+@pytest.mark.parametrize('interpolacao', ['vizinho', 'bilinear'])
+@pytest.mark.parametrize('angulo', [30, -75, 200])
+def test_rotacao_afim_em_imagem_retangular(interpolacao, angulo):
+    imagem = _imagem((21, 34, 3))
+    inversa = np.linalg.inv(t.matriz_rotacao(angulo, 21, 34))
+    esperado = _afim_ingenuo(imagem, inversa, interpolacao)
+    obtido = t.rotacionar(imagem, angulo, interpolacao)
+    assert obtido.shape == imagem.shape
+    # Coordenadas e acumulação em float32: o arredondamento pode mudar em 1
+    np.testing.assert_allclose(obtido, esperado, rtol=0, atol=0 if interpolacao == 'vizinho' else 1)
+
+
+def test_afim_com_formato_de_saida_diferente():
+    imagem = _imagem((18, 40))
+    # Transposição: a saída (40, 18) lê a entrada com x e y trocados
+    inversa = np.array([[0, 1, 0], [1, 0, 0], [0, 0, 1]], dtype=float)
+    np.testing.assert_array_equal(reamostrar_afim(imagem, inversa, (40, 18), 'vizinho'), imagem.T)
+    np.testing.assert_array_equal(reamostrar_afim(imagem, inversa, (40, 18), 'bilinear'), imagem.T)
+
+
+@pytest.mark.parametrize('quartos', [1, 3])
+def test_rotacao_afim_de_90_igual_a_permutacao(quartos):
+    # Diferença par entre os lados: o caminho sem reamostragem também vale
+    imagem = _imagem((20, 32, 3))
+    inversa = np.linalg.inv(t.matriz_rotacao(90 * quartos, 20, 32))
+    afim = reamostrar_afim(imagem, inversa, interpolacao='vizinho')
+    np.testing.assert_array_equal(afim, t._rotacionar_90(imagem, quartos))
+
+
+@pytest.mark.parametrize('formato', [(15, 22), (15, 22, 3), (9, 12, 4)])
+def test_espelhar_igual_a_flip(formato):
+    imagem = _imagem(formato)
+    for direcao, eixo in (('horizontal', 1), ('vertical', 0)):
+        espelhada = t.espelhar(imagem, direcao)
+        np.testing.assert_array_equal(espelhada, np.flip(imagem, eixo))
+        assert np.shares_memory(espelhada, imagem)
+
+
+@pytest.mark.parametrize('quartos', [1, 2, 3])
+@pytest.mark.parametrize('formato', [(16, 16), (16, 16, 3), (11, 11, 4)])
+def test_rotacionar_90_quadrada_igual_a_rot90(quartos, formato):
+    imagem = _imagem(formato)
+    girada = t._rotacionar_90(imagem, quartos)
+    np.testing.assert_array_equal(girada, np.rot90(imagem, -quartos))
+    assert np.shares_memory(girada, imagem)
+    np.testing.assert_array_equal(t.rotacionar(imagem, 90 * quartos), girada)
+
+
+@pytest.mark.parametrize('quartos', [1, 3])
+@pytest.mark.parametrize('altura, largura', [(12, 20), (20, 12)])
+def test_rotacionar_90_retangular(quartos, altura, largura):
+    imagem = _imagem((altura, largura, 3))
+    girada = t._rotacionar_90(imagem, quartos)
+    assert girada.shape == imagem.shape
+    # Só o quadrado central aparece na tela original; o resto fica em 0
+    d = abs(altura - largura) // 2
+    esperado = np.zeros_like(imagem)
+    rot90 = np.rot90(imagem, -quartos)
+    if altura > largura:
+        esperado[d:d + largura] = rot90[:, d:d + largura]
+    else:
+        esperado[:, d:d + altura] = rot90[d:d + altura]
+    np.testing.assert_array_equal(girada, esperado)
+    np.testing.assert_array_equal(t._rotacionar_90(imagem, 2), np.rot90(imagem, 2))
+
+
+def test_rotacionar_90_com_diferenca_impar_reamostra():
+    imagem = _imagem((12, 19))
+    assert t._rotacionar_90(imagem, 1) is None
+    inversa = np.linalg.inv(t.matriz_rotacao(90, 12, 19))
+    np.testing.assert_array_equal(t.rotacionar(imagem, 90, 'vizinho'),
+                                  reamostrar_afim(imagem, inversa, interpolacao='vizinho'))
+
+
+@pytest.mark.parametrize('dx, dy', [(3, -2), (0, 5), (-40, 0), (22, 15)])
+def test_transladar_igual_a_roll(dx, dy):
+    imagem = _imagem((15, 22, 3))
+    np.testing.assert_array_equal(t.transladar(imagem, dx, dy),
+                                  np.roll(imagem, (dy, dx), axis=(0, 1)))
+
+
+def _pesos_densos(n_entrada, n_saida, interpolacao):
+    # Matriz (n_saida, n_entrada) de pesos com centros de pixel e borda repetida
+    if interpolacao == 'bilinear':
+        raio, kernel = 1, lambda d: max(0.0, 1 - abs(d))
+    else:
+        def kernel(d, a=-0.5):
+            d = abs(d)
+            if d <= 1:
+                return (a + 2) * d ** 3 - (a + 3) * d ** 2 + 1
+            if d < 2:
+                return a * d ** 3 - 5 * a * d ** 2 + 8 * a * d - 4 * a
+            return 0.0
+        raio = 2
+    escala = n_saida / n_entrada
+    reducao = min(escala, 1.0)
+    pesos = np.zeros((n_saida, n_entrada))
+    for i in range(n_saida):
+        centro = (i + 0.5) / escala - 0.5
+        alcance = raio / reducao
+        for k in range(int(np.floor(centro - alcance)), int(np.ceil(centro + alcance)) + 1):
+            pesos[i, min(max(k, 0), n_entrada - 1)] += kernel((k - centro) * reducao)
+    return pesos / pesos.sum(axis=1, keepdims=True)
+
+
+def _escala_densa(imagem, formato, interpolacao):
+    pesos_y = _pesos_densos(imagem.shape[0], formato[0], interpolacao)
+    pesos_x = _pesos_densos(imagem.shape[1], formato[1], interpolacao)
+    resultado = np.einsum('ij,jk...,lk->il...', pesos_y, imagem.astype(np.float64), pesos_x)
+    return np.clip(np.rint(resultado), 0, 255).astype(np.uint8)
+
+
+@pytest.mark.parametrize('interpolacao', ['bilinear', 'bicubica'])
+@pytest.mark.parametrize('sx, sy', [(2, 2), (1.5, 0.7), (0.4, 0.4), (3, 1)])
+@pytest.mark.parametrize('formato', [(23, 31), (23, 31, 3)])
+def test_escala_separavel_igual_a_referencia(interpolacao, sx, sy, formato):
+    imagem = _imagem(formato)
+    escalada = t.escala(imagem, sx, sy, interpolacao)
+    assert escalada.shape[:2] == (round(formato[0] * sy), round(formato[1] * sx))
+    esperado = _escala_densa(imagem, escalada.shape[:2], interpolacao)
+    np.testing.assert_allclose(escalada, esperado, rtol=0, atol=1)
+
+
+@pytest.mark.parametrize('sx, sy', [(2, 2), (0.5, 3), (0.3, 0.3)])
+def test_escala_igual_ao_pillow(sx, sy):
+    imagem = _imagem((40, 56, 3))
+    vizinho = t.escala(imagem, sx, sy, 'vizinho')
+    tamanho = vizinho.shape[1::-1]
+    np.testing.assert_array_equal(vizinho, np.asarray(Image.fromarray(imagem).resize(tamanho, Image.NEAREST)))
+    # O Pillow renormaliza os pesos nas bordas em vez de repetir a borda
+    bilinear = t.escala(imagem, sx, sy, 'bilinear')
+    pillow = np.asarray(Image.fromarray(imagem).resize(tamanho, Image.BILINEAR))
+    np.testing.assert_allclose(bilinear[3:-3, 3:-3], pillow[3:-3, 3:-3], rtol=0, atol=1)
+
+
+@pytest.mark.parametrize('fator', [2, 3, 4])
+@pytest.mark.parametrize('formato', [(24, 36), (25, 38, 3), (26, 29, 4)])
+def test_escala_por_fator_inteiro_usa_media_da_area(fator, formato):
+    imagem = _imagem(formato)
+    reduzida = t.escala(imagem, 1 / fator, 1 / fator)
+    altura, largura = formato[0] // fator, formato[1] // fator
+    assert reduzida.shape == (altura, largura) + formato[2:]
+    esperado = np.empty(reduzida.shape)
+    for i in range(altura):
+        for j in range(largura):
+            bloco = imagem[i * fator:(i + 1) * fator, j * fator:(j + 1) * fator]
+            esperado[i, j] = bloco.reshape((-1,) + formato[2:]).mean(axis=0)
+    np.testing.assert_array_equal(reduzida, np.rint(esperado))